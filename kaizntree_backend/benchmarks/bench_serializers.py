@@ -0,0 +1,44 @@
+"""
+Compare ItemSerializer with ItemReadSerializer on list pages.
+
+Run from kaizntree_backend:
+
+    python -m benchmarks.bench_serializers
+"""
+import timeit
+
+from benchmarks.common import load_items, migrate
+from kaizntree_app.models import Item
+from kaizntree_app.serializers import ItemReadSerializer, ItemSerializer
+
+PAGE_SIZES = [10, 100, 1000]
+REPEAT = 5
+
+
+def best_of(func, number):
+    return min(timeit.repeat(func, number=number, repeat=REPEAT)) / number
+
+
+def main():
+    migrate()
+    user = load_items('bench', max(PAGE_SIZES))
+    items = Item.objects.filter(user_id=user.id).order_by('created', 'id')
+
+    print(f'{"page size":>10} {"ItemSerializer":>16} {"ItemReadSerializer":>20} {"speedup":>8}')
+    for page_size in PAGE_SIZES:
+        number = max(1, 1000 // page_size)
+        page = items[:page_size]
+
+        def serialize_models():
+            return ItemSerializer(list(page), many=True).data
+
+        def serialize_values():
+            return ItemReadSerializer(list(page.values(*ItemReadSerializer.fields()))).data
+
+        baseline = best_of(serialize_models, number)
+        fast = best_of(serialize_values, number)
+        print(f'{page_size:>10} {baseline * 1000:>14.2f}ms {fast * 1000:>18.2f}ms {baseline / fast:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""Shared setup for the benchmark runners."""
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from kaizntree_app.models import Item  # noqa: E402
+
+PASSWORD = 'benchmark-password'
+
+
+def migrate():
+    call_command('migrate', verbosity=0)
+
+
+def load_items(username, count, batch_size=1000):
+    """Create a user owning `count` items spread over categories, tags and flags."""
+    user = User.objects.create_user(username=username, password=PASSWORD)
+    tags = [key for key, _ in Item.TAG_CHOICES]
+    Item.objects.bulk_create(
+        (
+            Item(
+                user_id=user,
+                SKU=f'{username}-SKU{index}',
+                name=f'{username} Item {index}',
+                category=f'Category {index % 10}',
+                tags=tags[index % len(tags)],
+                cost=f'{index % 1000}.{index % 100:02d}',
+                in_stock=index % 50,
+                available_stock=index % 50,
+                minimum_stock=10,
+                desired_stock=30,
+                is_assembly=index % 2 == 0,
+                is_component=index % 3 == 0,
+                is_purchaseable=index % 5 == 0,
+                is_sellable=index % 7 == 0,
+                is_bundle=index % 11 == 0,
+            )
+            for index in range(count)
+        ),
+        batch_size=batch_size,
+    )
+    return user
@@ -0,0 +1,47 @@
+"""
+Compare two benchmark result files written by benchmarks.run.
+
+    python -m benchmarks.compare before.json after.json --threshold 20
+
+Exits with status 1 when any scenario's p50 latency grows by more than
+`--threshold` percent or its query count goes up.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path) as results:
+        return json.load(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=20.0,
+                        help='allowed p50 slowdown in percent')
+    args = parser.parse_args()
+
+    before, after = load(args.before)['scenarios'], load(args.after)['scenarios']
+    regressions = []
+    print(f'{"scenario":<32} {"p50 before":>11} {"p50 after":>10} {"change":>8} {"queries":>9}')
+    for name in sorted(set(before) & set(after)):
+        old, new = before[name], after[name]
+        change = (new['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100 if old['p50_ms'] else 0.0
+        queries = f'{old["queries"]}->{new["queries"]}'
+        print(f'{name:<32} {old["p50_ms"]:>9.2f}ms {new["p50_ms"]:>8.2f}ms {change:>7.1f}% {queries:>9}')
+        if change > args.threshold or new['queries'] > old['queries']:
+            regressions.append(name)
+
+    for name in sorted(set(after) - set(before)):
+        print(f'{name:<32} {"new":>11}')
+
+    if regressions:
+        print(f'Regressions: {", ".join(regressions)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+Load-test the sync (WSGI) and async (ASGI) item list endpoints at high
+concurrency and report throughput and tail latency side by side.
+
+Serve the same database both ways, for example:
+
+    gunicorn kaizntree_project.wsgi --workers 4 --threads 8 --bind 127.0.0.1:8000
+    uvicorn kaizntree_project.asgi:application --workers 4 --port 8001
+
+then, from kaizntree_backend:
+
+    python -m benchmarks.loadtest --username bench --password ... \\
+        --wsgi http://127.0.0.1:8000 --asgi http://127.0.0.1:8001 \\
+        --concurrency 256 --requests 20000 --output loadtest.json
+
+The WSGI target is driven through `item/` and `login/`, the ASGI target
+through `async/item/` and `async/login/`. Requests cycle over `--pages`
+pages so the response cache does not answer every request.
+"""
+import argparse
+import asyncio
+import json
+import time
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+TARGETS = {
+    'wsgi': {'login': '/login/', 'list': '/item/'},
+    'asgi': {'login': '/async/login/', 'list': '/async/item/'},
+}
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection; enough of the protocol for the API."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=b'', headers=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}',
+                 f'Content-Length: {len(body)}']
+        lines.extend(f'{name}: {value}' for name, value in (headers or {}).items())
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            await self.close()
+            raise ConnectionError('Connection closed by server')
+        status = int(status_line.split()[1])
+        response_headers = []
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers.append((name.strip().lower(), value.strip()))
+        header_map = dict(response_headers)
+
+        if header_map.get('transfer-encoding') == 'chunked':
+            content = b''
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                content += await self.reader.readexactly(size + 2)
+                if not size:
+                    break
+        else:
+            content = await self.reader.readexactly(int(header_map.get('content-length', 0)))
+        if header_map.get('connection') == 'close':
+            await self.close()
+        return status, response_headers, content
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+async def log_in(base_url, target, username, password):
+    url = urlsplit(base_url)
+    connection = Connection(url.hostname, url.port or 80)
+    body = json.dumps({'username': username, 'password': password}).encode()
+    status, headers, content = await connection.request(
+        'POST', TARGETS[target]['login'], body, {'Content-Type': 'application/json'})
+    await connection.close()
+    if status != 200:
+        raise RuntimeError(f'{target}: login failed with {status}: {content[:200]!r}')
+    cookie = SimpleCookie()
+    for name, value in headers:
+        if name == 'set-cookie':
+            cookie.load(value)
+    return '; '.join(f'{key}={morsel.value}' for key, morsel in cookie.items())
+
+
+async def run_target(base_url, target, args):
+    url = urlsplit(base_url)
+    headers = {'Cookie': await log_in(base_url, target, args.username, args.password)}
+    paths = [f"{TARGETS[target]['list']}?{urlencode({'page': page, 'page_size': args.page_size})}"
+             for page in range(1, args.pages + 1)]
+    counter = iter(range(args.requests))
+    timings, statuses = [], {}
+
+    async def worker():
+        connection = Connection(url.hostname, url.port or 80)
+        try:
+            for index in counter:
+                start = time.perf_counter()
+                try:
+                    status, _, _ = await connection.request('GET', paths[index % len(paths)], headers=headers)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    await connection.close()
+                    status = 'error'
+                timings.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+        finally:
+            await connection.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    timings.sort()
+    result = {
+        'url': base_url,
+        'requests': len(timings),
+        'concurrency': args.concurrency,
+        'seconds': elapsed,
+        'requests_per_second': len(timings) / elapsed,
+        'p50_ms': percentile(timings, 50) * 1000,
+        'p95_ms': percentile(timings, 95) * 1000,
+        'p99_ms': percentile(timings, 99) * 1000,
+        'max_ms': timings[-1] * 1000,
+        'statuses': {str(status): count for status, count in statuses.items()},
+    }
+    print(f'{target:<5} {result["requests_per_second"]:9.1f} req/s  p50 {result["p50_ms"]:8.2f}ms  '
+          f'p95 {result["p95_ms"]:8.2f}ms  p99 {result["p99_ms"]:8.2f}ms  statuses {result["statuses"]}')
+    return result
+
+
+def percentile(sorted_values, percent):
+    index = round(percent / 100 * (len(sorted_values) - 1))
+    return sorted_values[index]
+
+
+async def main(args):
+    results = {}
+    # One target at a time, so they do not compete for the database.
+    for target in TARGETS:
+        base_url = getattr(args, target)
+        if base_url:
+            results[target] = await run_target(base_url, target, args)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--wsgi', help='Base URL of the WSGI server')
+    parser.add_argument('--asgi', help='Base URL of the ASGI server')
+    parser.add_argument('--username', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--concurrency', type=int, default=256)
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--pages', type=int, default=50)
+    parser.add_argument('--page-size', type=int, default=10)
+    parser.add_argument('--output', help='Write the results as JSON to this file')
+    args = parser.parse_args()
+    if not (args.wsgi or args.asgi):
+        parser.error('give --wsgi, --asgi or both')
+
+    results = asyncio.run(main(args))
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
@@ -0,0 +1,313 @@
+"""
+Benchmark the item API hot paths on SQLite and write the results as JSON.
+
+Run from kaizntree_backend:
+
+    python -m benchmarks.run --items 10000 --output results.json
+    python -m benchmarks.compare before.json after.json
+
+Each scenario records latency percentiles, the number of SQL queries per
+request, the response size and the peak memory allocated while serving one
+request.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+import warnings
+
+from benchmarks.common import PASSWORD, load_items, migrate
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from kaizntree_app.middleware import brotli
+from kaizntree_app.models import Item
+from kaizntree_app.renderers import ORJSONRenderer
+from kaizntree_app.views import KeysetPagination
+
+LIST_FILTERS = {
+    'SKU': {'SKU': 'bench-SKU42'},
+    'name': {'name': 'Item 42'},
+    'tags': {'tags': 'OL'},
+    'category': {'category': 'Category 3'},
+    'date_range': {'start_date': '2000-01-01', 'end_date': '2100-01-01'},
+    'cost_range': {'min_cost': '100', 'max_cost': '200'},
+    'is_assembly': {'is_assembly': 'true'},
+    'is_component': {'is_component': 'true'},
+    'is_purchaseable': {'is_purchaseable': 'true'},
+    'is_sellable': {'is_sellable': 'true'},
+    'is_bundle': {'is_bundle': 'true'},
+    'category_and_flag': {'category': 'Category 3', 'is_assembly': 'true'},
+    'category_cost_dates': {'category': 'Category 3', 'min_cost': '100', 'max_cost': '500',
+                            'start_date': '2000-01-01', 'end_date': '2100-01-01'},
+    'all_flags': {'is_assembly': 'true', 'is_component': 'true', 'is_purchaseable': 'false',
+                  'is_sellable': 'false', 'is_bundle': 'false'},
+}
+
+
+PICKER_FIELDS = 'id,SKU,name,in_stock'
+
+
+class Runner:
+    def __init__(self, items, users, iterations):
+        self.item_count = items
+        self.user_count = users
+        self.iterations = iterations
+        self.results = {}
+
+    def setup(self):
+        setup_test_environment()
+        # The date filters compare dates against DateTimeFields; the resulting
+        # naive-datetime warnings would drown out the report.
+        warnings.filterwarnings('ignore', category=RuntimeWarning, module='django.db.models.fields')
+        migrate()
+        self.user = load_items('bench', self.item_count)
+        for index in range(1, self.user_count):
+            load_items(f'other{index}', self.item_count)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.list_url = reverse('item-list')
+
+    def measure(self, name, request, prepare=None, iterations=None, expected_status=200):
+        iterations = iterations or self.iterations
+        # One warm-up request so lazy imports and first-hit caches are excluded.
+        if prepare:
+            prepare()
+        request()
+
+        timings, queries = [], []
+        for _ in range(iterations):
+            if prepare:
+                prepare()
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                response = request()
+                timings.append(time.perf_counter() - start)
+            if response.status_code != expected_status:
+                raise RuntimeError(f'{name}: expected {expected_status}, got {response.status_code}')
+            queries.append(len(context.captured_queries))
+
+        if prepare:
+            prepare()
+        tracemalloc.start()
+        response = request()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        size = 0 if response.streaming else len(response.content)
+
+        timings.sort()
+        self.results[name] = {
+            'iterations': iterations,
+            'mean_ms': statistics.fmean(timings) * 1000,
+            'p50_ms': self.percentile(timings, 50) * 1000,
+            'p95_ms': self.percentile(timings, 95) * 1000,
+            'p99_ms': self.percentile(timings, 99) * 1000,
+            'queries': max(queries),
+            'peak_alloc_kb': peak / 1024,
+            'response_kb': size / 1024,
+        }
+        print(f'{name:<32} p50 {self.results[name]["p50_ms"]:8.2f}ms  '
+              f'p95 {self.results[name]["p95_ms"]:8.2f}ms  queries {max(queries):3d}  '
+              f'{size / 1024:9.1f}KB')
+
+    def measure_call(self, name, func, iterations=None):
+        """Time `func` on its own, outside any request; it returns the bytes produced."""
+        iterations = iterations or self.iterations
+        func()
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            content = func()
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        self.results[name] = {
+            'iterations': iterations,
+            'mean_ms': statistics.fmean(timings) * 1000,
+            'p50_ms': self.percentile(timings, 50) * 1000,
+            'p95_ms': self.percentile(timings, 95) * 1000,
+            'p99_ms': self.percentile(timings, 99) * 1000,
+            'queries': 0,
+            'response_kb': len(content) / 1024,
+        }
+        print(f'{name:<32} p50 {self.results[name]["p50_ms"]:8.2f}ms  '
+              f'p95 {self.results[name]["p95_ms"]:8.2f}ms  {len(content) / 1024:22.1f}KB')
+
+    @staticmethod
+    def percentile(sorted_values, percent):
+        index = round(percent / 100 * (len(sorted_values) - 1))
+        return sorted_values[index]
+
+    def run(self):
+        self.bench_list()
+        self.bench_pagination()
+        self.bench_render()
+        self.bench_writes()
+        self.bench_login()
+        self.bench_auth()
+        return self.results
+
+    def bench_list(self):
+        # Clearing the cache first keeps these numbers about the query and
+        # serialization path; list_cached measures the cache hit on its own.
+        self.measure('list', lambda: self.client.get(self.list_url), prepare=cache.clear)
+        for name, params in LIST_FILTERS.items():
+            self.measure(f'list_filter_{name}',
+                         lambda params=params: self.client.get(self.list_url, params),
+                         prepare=cache.clear)
+        self.measure('list_cached', lambda: self.client.get(self.list_url))
+
+    def bench_pagination(self):
+        page_size = 100
+        last_page = max(1, (self.item_count + page_size - 1) // page_size)
+        self.measure('list_page_size_1000', lambda: self.client.get(self.list_url, {'page_size': 1000}),
+                     prepare=cache.clear)
+        # The fields a picker needs, against the full rows above.
+        self.measure('list_page_size_1000_fields', lambda: self.client.get(
+            self.list_url, {'page_size': 1000, 'fields': PICKER_FIELDS}), prepare=cache.clear)
+        self.measure('list_deep_page', lambda: self.client.get(
+            self.list_url, {'page': last_page, 'page_size': page_size}), prepare=cache.clear)
+
+        deep_item = Item.objects.filter(user_id=self.user.id).order_by(
+            'created', 'id').values_list('created', 'id')[max(0, self.item_count - page_size - 1)]
+        paginator = KeysetPagination()
+        paginator.base_url = f'http://testserver{self.list_url}?pagination=cursor&page_size={page_size}'
+        cursor_url = paginator.encode_cursor(deep_item, reverse=False)
+        self.measure('list_deep_cursor', lambda: self.client.get(cursor_url), prepare=cache.clear)
+        self.measure('list_deep_cursor_skip_count',
+                     lambda: self.client.get(cursor_url + '&skip_count=true'), prepare=cache.clear)
+        self.measure('list_deep_cursor_fields',
+                     lambda: self.client.get(cursor_url + f'&fields={PICKER_FIELDS}'), prepare=cache.clear)
+
+    def bench_render(self):
+        # Renderer cost alone on a 1000-item page, then that page on the wire.
+        data = self.client.get(self.list_url, {'page_size': 1000}).data
+        for name, renderer in (('stdlib', JSONRenderer()), ('orjson', ORJSONRenderer())):
+            self.measure_call(f'render_1000_{name}', lambda renderer=renderer: renderer.render(data))
+        for encoding in ('gzip', 'br') if brotli else ('gzip',):
+            self.measure(f'list_page_size_1000_{encoding}', lambda encoding=encoding: self.client.get(
+                self.list_url, {'page_size': 1000}, HTTP_ACCEPT_ENCODING=encoding), prepare=cache.clear)
+
+    def bench_writes(self):
+        counter = iter(range(10 ** 9))
+
+        def item_data():
+            index = next(counter)
+            return {
+                'SKU': f'bench-new-{index}',
+                'name': f'bench new item {index}',
+                'category': 'Category 1',
+                'tags': 'OL',
+                'cost': '10.00',
+                'in_stock': 10,
+                'available_stock': 10,
+                'minimum_stock': 5,
+                'desired_stock': 8,
+                'is_assembly': False,
+                'is_component': False,
+                'is_purchaseable': True,
+                'is_sellable': True,
+                'is_bundle': False,
+            }
+
+        self.measure('create', lambda: self.client.post(self.list_url, item_data(), format='json'),
+                     expected_status=201)
+
+        item = Item.objects.filter(user_id=self.user.id).first()
+        self.measure('update', lambda: self.client.put(
+            self.list_url, {'id': item.id, 'in_stock': next(counter) % 100}, format='json'))
+
+        victims = []
+
+        def prepare_delete():
+            data = item_data()
+            victims.append(Item.objects.create(user_id=self.user, **data))
+
+        self.measure('delete', lambda: self.client.delete(
+            self.list_url, {'id': victims[-1].id}, format='json'),
+            prepare=prepare_delete, expected_status=204)
+
+    def bench_login(self):
+        client = APIClient()
+        data = {'username': self.user.username, 'password': PASSWORD}
+        # Password hashing dominates and is deliberately slow, so fewer rounds.
+        self.measure('login', lambda: client.post(reverse('login'), data, format='json'),
+                     iterations=max(3, self.iterations // 10))
+
+        # Credential stuffing once the username is locked out: no hashing.
+        attack = {'username': 'attacker-target', 'password': 'wrong'}
+        for _ in range(settings.LOGIN_FAILURE_LIMIT):
+            client.post(reverse('login'), attack, format='json')
+        self.measure('login_locked_out', lambda: client.post(reverse('login'), attack, format='json'),
+                     expected_status=429)
+        for name in ('login', 'login_locked_out'):
+            print(f'{name:<32} {1000 / self.results[name]["mean_ms"]:9.1f} requests/s')
+        cache.clear()
+
+    def bench_auth(self):
+        # A cached list page, so the queries left are the authentication ones.
+        session_client = APIClient()
+        session_client.login(username=self.user.username, password=PASSWORD)
+        self.measure('list_cached_session_auth', lambda: session_client.get(self.list_url))
+
+        token_client = APIClient()
+        token = token_client.post(reverse('login'), {
+            'username': self.user.username, 'password': PASSWORD, 'token': True
+        }, format='json').data['token']
+        token_client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        self.measure('list_cached_token_auth', lambda: token_client.get(self.list_url))
+
+        removed = (self.results['list_cached_session_auth']['queries']
+                   - self.results['list_cached_token_auth']['queries'])
+        print(f'token auth removes {removed} queries per request')
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--items', type=int, default=10000, help='items per user')
+    parser.add_argument('--users', type=int, default=3, help='users to load')
+    parser.add_argument('--iterations', type=int, default=50, help='requests per scenario')
+    parser.add_argument('--output', default='benchmark-results.json')
+    args = parser.parse_args()
+
+    runner = Runner(args.items, args.users, args.iterations)
+    runner.setup()
+    results = runner.run()
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'items_per_user': args.items,
+            'users': args.users,
+            'iterations': args.iterations,
+        },
+        'scenarios': results,
+    }
+    with open(args.output, 'w') as output:
+        json.dump(report, output, indent=2)
+    print(f'Wrote {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,21 @@
+"""
+Settings for the benchmark runners: the project settings on an in-memory
+SQLite database and a per-process cache, so results do not depend on a
+reachable MySQL or Redis server.
+"""
+from kaizntree_project.settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+DEBUG = False
@@ -0,0 +1,246 @@
+"""
+Native async variants of the item and auth endpoints, mounted under
+`async/`. Under ASGI they run on the event loop instead of hopping through
+the sync-to-async thread pool for every request the way DRF views do.
+
+They accept JSON or form bodies, authenticate with the session cookie only and
+render the same JSON as their DRF counterparts in views.py.
+"""
+import json
+import math
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import aauthenticate, alogin, alogout
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from . import cache as item_cache
+from . import lockout
+from .middleware import timed
+from .models import Item
+from .serializers import ItemSerializer, ItemReadSerializer, UserSerializer, LoginSerializer, SignupSerializer
+from .views import CustomPagination, ItemFilterMixin, ItemListApiView, KeysetPagination, delete_locked, save_locked
+
+
+class JsonResponse(HttpResponse):
+    def __init__(self, data=None, status=status.HTTP_200_OK, headers=None):
+        # The first configured renderer, as DRF would pick for these clients.
+        renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+        content = renderer.render(data) if data is not None else b''
+        super().__init__(content, status=status, headers=headers,
+                         content_type=renderer.media_type)
+
+
+@sync_to_async
+def atomic(func, *args, **kwargs):
+    # asave()/adelete() would run the post_save and post_delete handlers that
+    # maintain the search index and inventory counters outside a transaction,
+    # so writes go through one thread hop that keeps them together.
+    with transaction.atomic():
+        return func(*args, **kwargs)
+
+
+class AsyncApiView(View):
+    login_required = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if self.login_required and not request.user.is_authenticated:
+            return JsonResponse({'detail': 'Authentication credentials were not provided.'},
+                                status=status.HTTP_403_FORBIDDEN)
+        request.data = request.POST.dict()
+        if request.content_type == 'application/json':
+            try:
+                request.data = json.loads(request.body or b'{}')
+            except ValueError as error:
+                return JsonResponse({'detail': f'JSON parse error - {error}'},
+                                    status=status.HTTP_400_BAD_REQUEST)
+            if not isinstance(request.data, dict):
+                return JsonResponse({'error': 'Expected a JSON object'}, status=status.HTTP_400_BAD_REQUEST)
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncItemListView(ItemFilterMixin, AsyncApiView):
+    """Async counterpart of ItemListApiView, page-number pagination only."""
+    cache_namespace = 'async-item-list'
+    read_from_replica = True
+
+    async def get(self, request, *args, **kwargs):
+        if request.GET.get('pagination') == 'cursor' or request.GET.get(KeysetPagination.cursor_query_param):
+            return JsonResponse({'error': 'Cursor pagination is not available on this endpoint'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        # Cache backends are synchronous, so their calls go to the thread pool
+        # rather than blocking the event loop.
+        cache_key, data, etag = await sync_to_async(item_cache.get_response_data)(request, self.cache_namespace)
+        if data is not None:
+            if ItemListApiView.etag_matches(request, etag):
+                return JsonResponse(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+            return JsonResponse(data, headers={'ETag': etag, 'X-Cache': 'HIT'})
+
+        fields = ItemReadSerializer.fields()
+        if 'fields' in request.GET:
+            try:
+                fields = ItemReadSerializer.parse_fields(request.GET['fields'])
+            except ValidationError as error:
+                return JsonResponse(error.detail, status=status.HTTP_400_BAD_REQUEST)
+
+        items = self.filter_items(request)
+
+        state = await items.aaggregate(**ItemListApiView.etag_aggregates())
+        etag = ItemListApiView.make_etag(request, state)
+        if ItemListApiView.etag_matches(request, etag):
+            return JsonResponse(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        # The ETag aggregate already counted the matches; no separate COUNT.
+        page_size = self.get_page_size(request)
+        count = state['count']
+        num_pages = max(1, math.ceil(count / page_size))
+        page = request.GET.get(CustomPagination.page_query_param, 1)
+        if page in CustomPagination.last_page_strings:
+            page = num_pages
+        try:
+            page = int(page)
+        except (TypeError, ValueError):
+            page = 0
+        if not 1 <= page <= num_pages:
+            return JsonResponse({'detail': 'Invalid page.'}, status=status.HTTP_404_NOT_FOUND)
+
+        start = (page - 1) * page_size
+        rows = [row async for row in items.values(*fields)[start:start + page_size]]
+        with timed('serialize'):
+            results = ItemReadSerializer(rows, fields).data
+
+        url = request.build_absolute_uri()
+        data = {
+            'count': count,
+            'next': replace_query_param(url, CustomPagination.page_query_param, page + 1)
+            if page < num_pages else None,
+            'previous': None if page == 1 else
+            remove_query_param(url, CustomPagination.page_query_param) if page == 2 else
+            replace_query_param(url, CustomPagination.page_query_param, page - 1),
+            'results': results,
+        }
+        await sync_to_async(item_cache.set_response_data)(cache_key, data, etag)
+        return JsonResponse(data, headers={'ETag': etag, 'X-Cache': 'MISS'})
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.GET[CustomPagination.page_size_query_param])
+        except (KeyError, ValueError):
+            return CustomPagination.page_size
+        if page_size <= 0:
+            return CustomPagination.page_size
+        return min(page_size, CustomPagination.max_page_size)
+
+    async def post(self, request, *args, **kwargs):
+        data = {field: request.data.get(field) for field in ItemSerializer.Meta.fields
+                if field not in ItemSerializer.Meta.read_only_fields}
+        data['user_id'] = request.user.id
+        serializer = ItemSerializer(data=data)
+        # Validation looks up the owner and checks uniqueness in the database.
+        if await sync_to_async(serializer.is_valid)():
+            await atomic(serializer.save)
+            await sync_to_async(item_cache.bump_generation)(request.user.id)
+            return JsonResponse(serializer.data, status=status.HTTP_201_CREATED)
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    async def put(self, request, *args, **kwargs):
+        try:
+            item = await Item.objects.aget(id=request.data.get('id'), user_id=request.user.id)
+        except (Item.DoesNotExist, ValueError, TypeError):
+            return JsonResponse({'error': 'Item not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        data = {key: value for key, value in request.data.items() if key != 'user_id'}
+        serializer = ItemSerializer(item, data=data, partial=True)
+        if await sync_to_async(serializer.is_valid)():
+            try:
+                await sync_to_async(save_locked)(serializer)
+            except Item.DoesNotExist:
+                return JsonResponse({'error': 'Item not found'}, status=status.HTTP_404_NOT_FOUND)
+            await sync_to_async(item_cache.bump_generation)(request.user.id)
+            return JsonResponse(serializer.data, status=status.HTTP_200_OK)
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    async def delete(self, request, *args, **kwargs):
+        try:
+            item = await Item.objects.aget(id=request.data.get('id'), user_id=request.user.id)
+        except (Item.DoesNotExist, ValueError, TypeError):
+            return JsonResponse({'error': 'Item not found'}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            await sync_to_async(delete_locked)(item)
+        except Item.DoesNotExist:
+            return JsonResponse({'error': 'Item not found'}, status=status.HTTP_404_NOT_FOUND)
+        await sync_to_async(item_cache.bump_generation)(request.user.id)
+        return JsonResponse(status=status.HTTP_204_NO_CONTENT)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncLoginView(AsyncApiView):
+    login_required = False
+
+    async def post(self, request):
+        serializer = LoginSerializer(data=request.data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        username = serializer.validated_data['username']
+        ip = lockout.client_ip(request)
+        if not await sync_to_async(lockout.reserve_attempt)(username, ip):
+            return JsonResponse({
+                'error': 'Too many failed login attempts, try again later'
+            }, status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={'Retry-After': str(lockout.get_timeout())})
+
+        user = await aauthenticate(
+            request,
+            username=username,
+            password=serializer.validated_data['password']
+        )
+        if user:
+            await sync_to_async(lockout.release_attempt)(username, ip)
+            await alogin(request, user)
+            request.session.set_expiry(timedelta(days=1))
+            return JsonResponse({
+                'user': UserSerializer(user).data,
+                'message': 'Login successful'
+            }, status=status.HTTP_200_OK)
+        return JsonResponse({
+            'error': 'Invalid credentials'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncSignupView(AsyncApiView):
+    login_required = False
+
+    async def post(self, request):
+        serializer = SignupSerializer(data=request.data)
+        if not await sync_to_async(serializer.is_valid)():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        user = await sync_to_async(serializer.save)()
+
+        await alogin(request, user)
+        return JsonResponse({
+            'user': UserSerializer(user).data,
+            'message': 'Signup successful'
+        })
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncLogoutView(AsyncApiView):
+    login_required = False
+
+    async def post(self, request):
+        await alogout(request)
+        return JsonResponse({
+            'message': 'Logged out successfully'
+        })
@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+from rest_framework import authentication, exceptions
+
+USER_KEY = 'auth-user:{user_id}'
+TOKEN_SALT = 'kaizntree_app.authentication.token'
+
+
+def get_token_max_age():
+    return getattr(settings, 'API_TOKEN_MAX_AGE', 60 * 60 * 24)
+
+
+def create_token(user):
+    """
+    Signed, stateless API token for `user`. It carries the session auth hash,
+    so changing the password invalidates every token issued before.
+    """
+    return signing.dumps({'u': user.pk, 'h': user.get_session_auth_hash()},
+                         salt=TOKEN_SALT, compress=True)
+
+
+def get_cached_user(user_id):
+    """The user from the cache, loading and caching it on a miss."""
+    key = USER_KEY.format(user_id=user_id)
+    user = cache.get(key)
+    if user is None:
+        user = get_user_model().objects.filter(pk=user_id).first()
+        if user is None:
+            return None
+        cache.set(key, user, get_token_max_age())
+    return user
+
+
+def forget_user(user_id):
+    cache.delete(USER_KEY.format(user_id=user_id))
+
+
+class SignedTokenAuthentication(authentication.BaseAuthentication):
+    """
+    `Authorization: Token <token>` with tokens from `create_token()`.
+
+    The signature and expiry are checked without a lookup and the user comes
+    from the cache, so an authenticated request needs no session or user
+    query. Tokens cannot be revoked one by one; they expire after
+    API_TOKEN_MAX_AGE seconds or when the password changes.
+    """
+    keyword = 'Token'
+
+    def authenticate(self, request):
+        header = authentication.get_authorization_header(request).split()
+        if not header or header[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(header) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+
+        try:
+            payload = signing.loads(header[1].decode(), salt=TOKEN_SALT, max_age=get_token_max_age())
+        except (signing.BadSignature, UnicodeDecodeError):
+            raise exceptions.AuthenticationFailed('Invalid or expired token.')
+
+        user = get_cached_user(payload['u'])
+        if (user is None or not user.is_active
+                or not constant_time_compare(payload['h'], user.get_session_auth_hash())):
+            raise exceptions.AuthenticationFailed('Invalid or expired token.')
+        return user, None
+
+    def authenticate_header(self, request):
+        return self.keyword
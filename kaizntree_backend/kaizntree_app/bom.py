@@ -0,0 +1,143 @@
+import time
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Item, ItemComponent
+
+GENERATION_KEY = 'bom:generation:{user_id}'
+BUILDABLE_KEY = 'bom:buildable:{user_id}:{generation}'
+
+
+def get_edges(user_id):
+    """
+    Every BOM line of the user with both ends' available stock, in one query:
+    `(assembly, component, quantity, assembly_stock, component_stock)`.
+    """
+    return list(ItemComponent.objects.filter(assembly_id__user_id=user_id).values_list(
+        'assembly_id', 'component_id', 'quantity',
+        'assembly_id__available_stock', 'component_id__available_stock'))
+
+
+def lock_graph(user_id, *item_ids):
+    """
+    Lock the rows of `item_ids` and of every assembly of the user, in id
+    order, and return the locked ids. Must run inside a transaction.
+
+    Two lines that would close a cycle together always share a locked row,
+    so the second waits for the first and its cycle check sees it. Read the
+    edges after locking; a snapshot taken before would miss that line.
+    """
+    assemblies = ItemComponent.objects.filter(assembly_id__user_id=user_id).values('assembly_id')
+    return list(Item.objects.select_for_update().filter(
+        Q(id__in=item_ids) | Q(id__in=assemblies), user_id=user_id,
+    ).order_by('id').values_list('id', flat=True))
+
+
+def topological_order(edges):
+    """Items ordered so every component comes before the assemblies using it."""
+    users_of = defaultdict(list)
+    pending = defaultdict(int)
+    nodes = set()
+    for assembly, component, *_ in edges:
+        users_of[component].append(assembly)
+        pending[assembly] += 1
+        nodes.update((assembly, component))
+
+    ready = deque(sorted(node for node in nodes if not pending[node]))
+    order = []
+    while ready:
+        node = ready.popleft()
+        order.append(node)
+        for assembly in users_of[node]:
+            pending[assembly] -= 1
+            if not pending[assembly]:
+                ready.append(assembly)
+    if len(order) != len(nodes):
+        raise ValueError('Bill of materials contains a cycle')
+    return order
+
+
+def would_create_cycle(edges, assembly, component):
+    """True if `component` already (transitively) uses `assembly`."""
+    components_of = defaultdict(list)
+    for parent, child, *_ in edges:
+        components_of[parent].append(child)
+    seen, stack = set(), [component]
+    while stack:
+        node = stack.pop()
+        if node == assembly:
+            return True
+        if node not in seen:
+            seen.add(node)
+            stack.extend(components_of[node])
+    return False
+
+
+def compute_buildable(edges):
+    """
+    Map each assembly id to how many units current stock can build.
+
+    Walks the DAG once from the leaves up. A sub-assembly counts as its
+    available stock plus what can be built of it, so nested BOMs roll up;
+    components shared between branches are not reserved across them.
+    """
+    stock, lines = {}, defaultdict(list)
+    for assembly, component, quantity, assembly_stock, component_stock in edges:
+        stock[assembly] = assembly_stock
+        stock[component] = component_stock
+        lines[assembly].append((component, quantity))
+
+    buildable, effective = {}, {}
+    for node in topological_order(edges):
+        available = max(stock[node], 0)
+        if node in lines:
+            buildable[node] = min(effective[component] // quantity for component, quantity in lines[node])
+            available += buildable[node]
+        effective[node] = available
+    return buildable
+
+
+def get_timeout():
+    return getattr(settings, 'BOM_CACHE_TIMEOUT', 60 * 15)
+
+
+def get_generation(user_id):
+    key = GENERATION_KEY.format(user_id=user_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, time.time_ns(), None)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_generation(user_id):
+    key = GENERATION_KEY.format(user_id=user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
+
+
+def invalidate(user_id):
+    """
+    Drop the memoized buildable quantities after stock or BOM changes.
+
+    The generation is bumped now, so later reads in the same transaction see
+    the change, and again on commit, so a result another request memoized
+    from the stock as it was before the commit is never served.
+    """
+    bump_generation(user_id)
+    transaction.on_commit(lambda: bump_generation(user_id))
+
+
+def get_buildable(user_id):
+    key = BUILDABLE_KEY.format(user_id=user_id, generation=get_generation(user_id))
+    buildable = cache.get(key)
+    if buildable is None:
+        buildable = compute_buildable(get_edges(user_id))
+        cache.set(key, buildable, get_timeout())
+    return buildable
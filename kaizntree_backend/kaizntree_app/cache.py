@@ -0,0 +1,93 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import urlencode
+
+from .routers import current_replica
+
+GENERATION_KEY = 'item-list:generation:{user_id}'
+RESPONSE_KEY = '{namespace}:{user_id}:{generation}:{params}'
+STATS_KEY = '{namespace}:stats:{outcome}'
+OUTCOMES = ('hits', 'misses')
+
+
+def get_timeout():
+    return getattr(settings, 'ITEM_LIST_CACHE_TIMEOUT', 60 * 15)
+
+
+def get_generation(user_id):
+    # Seed missing generations from the clock rather than 0, so an evicted
+    # counter can never come back as a value that old entries were keyed on.
+    key = GENERATION_KEY.format(user_id=user_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, time.time_ns(), None)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_generation(user_id):
+    """Invalidate every cached item response (listings, summaries) for the user."""
+    key = GENERATION_KEY.format(user_id=user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
+
+
+def invalidate(user_id):
+    """
+    bump_generation() for writes inside a transaction: now, and again on
+    commit, so a listing another request cached from the rows as they were
+    before the commit is never served. See bom.invalidate().
+    """
+    bump_generation(user_id)
+    transaction.on_commit(lambda: bump_generation(user_id))
+
+
+def make_key(request, namespace='item-list'):
+    params = sorted((key, sorted(values)) for key, values in request.GET.lists())
+    digest = hashlib.md5(
+        (request.get_host() + '?' + urlencode(params, doseq=True)).encode()).hexdigest()
+    return RESPONSE_KEY.format(
+        namespace=namespace, user_id=request.user.id, generation=get_generation(request.user.id), params=digest)
+
+
+def get_response_data(request, namespace='item-list'):
+    """Return `(key, data, etag)`; `data` and `etag` are None on a miss."""
+    key = make_key(request, namespace)
+    entry = cache.get(key)
+    record('hits' if entry is not None else 'misses', namespace)
+    if entry is None:
+        return key, None, None
+    return (key, *entry)
+
+
+def set_response_data(key, data, etag=None):
+    timeout = get_timeout()
+    if current_replica() is not None:
+        # A replica may trail the write that bumped the generation, so its
+        # answer is kept no longer than the replication lag allowance.
+        timeout = min(timeout, settings.READ_REPLICA_LAG_SECONDS)
+    cache.set(key, (data, etag), timeout)
+
+
+def record(outcome, namespace='item-list'):
+    key = STATS_KEY.format(namespace=namespace, outcome=outcome)
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def get_stats(namespace='item-list'):
+    return {outcome: cache.get(STATS_KEY.format(namespace=namespace, outcome=outcome), 0)
+            for outcome in OUTCOMES}
+
+
+def reset_stats(namespace='item-list'):
+    cache.delete_many([STATS_KEY.format(namespace=namespace, outcome=outcome) for outcome in OUTCOMES])
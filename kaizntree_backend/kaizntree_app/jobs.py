@@ -0,0 +1,271 @@
+"""
+Database-backed job queue. Views enqueue Job rows and return at once;
+`manage.py run_jobs` claims them with SELECT ... FOR UPDATE SKIP LOCKED, so
+any number of workers can share the table without an external broker, and
+runs them in a thread or process pool.
+"""
+import json
+import logging
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import islice
+from multiprocessing import get_context
+
+import django
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import ledger
+from . import stats as inventory_stats
+from .models import Item, Job
+from .search import index_items
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+# Kinds that can be queued with POST job/; imports need an upload, so they
+# are queued by the import endpoint instead.
+REQUESTABLE_KINDS = ('export', 'reindex', 'rebuild_stats', 'compact_ledger')
+
+
+def handler(kind):
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+def get_stale_timeout():
+    return getattr(settings, 'JOB_STALE_SECONDS', 10 * 60)
+
+
+def get_max_attempts():
+    return getattr(settings, 'JOB_MAX_ATTEMPTS', 3)
+
+
+def get_heartbeat_interval():
+    # Well inside the stale timeout, so a live job is never mistaken for a dead one.
+    return getattr(settings, 'JOB_HEARTBEAT_SECONDS', get_stale_timeout() / 4)
+
+
+def enqueue(user, kind, **params):
+    return Job.objects.create(user_id=user, kind=kind, params=params)
+
+
+def file_name(job, name):
+    return f'jobs/{job.id}/{name}'
+
+
+def claim(limit=1):
+    """Mark up to `limit` queued jobs as running and return their ids, oldest first."""
+    with transaction.atomic():
+        ids = list(Job.objects.select_for_update(skip_locked=True).filter(
+            status=Job.QUEUED).order_by('created', 'id').values_list('id', flat=True)[:limit])
+        if ids:
+            Job.objects.filter(id__in=ids).update(
+                status=Job.RUNNING, started=timezone.now(), attempts=F('attempts') + 1)
+    return ids
+
+
+def requeue_stale():
+    """
+    Put running jobs whose worker stopped sending heartbeats back in the
+    queue, or fail them once they have used up JOB_MAX_ATTEMPTS.
+    """
+    stale = Job.objects.filter(
+        status=Job.RUNNING, updated__lt=timezone.now() - timedelta(seconds=get_stale_timeout()))
+    failed = stale.filter(attempts__gte=get_max_attempts()).update(
+        status=Job.FAILED, error='Worker stopped responding', finished=timezone.now())
+    return failed + stale.update(status=Job.QUEUED, progress=0)
+
+
+def owned(job):
+    """
+    The job's row while this run still owns it. Once requeue_stale() has
+    handed the job to another run, the attempt count no longer matches and
+    this run's updates match nothing.
+    """
+    return Job.objects.filter(id=job.id, status=Job.RUNNING, attempts=job.attempts)
+
+
+@contextmanager
+def heartbeat(job):
+    """
+    Touch the job's `updated` from a background thread while the handler
+    runs, so requeue_stale() only picks up jobs whose worker is gone, even
+    when a single step takes longer than JOB_STALE_SECONDS.
+    """
+    stopped = threading.Event()
+
+    def beat():
+        try:
+            while not stopped.wait(get_heartbeat_interval()):
+                owned(job).update(updated=timezone.now())
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=beat, name=f'job-{job.id}-heartbeat', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+
+class Progress:
+    def __init__(self, job):
+        self.job = job
+
+    def __call__(self, progress, total=None):
+        self.job.progress = progress
+        fields = {'progress': progress, 'updated': timezone.now()}
+        if total is not None:
+            self.job.total = fields['total'] = total
+        owned(self.job).update(**fields)
+
+
+def run(job_id):
+    """Run one claimed job and record its result or error."""
+    job = Job.objects.select_related('user_id').get(id=job_id)
+    try:
+        with heartbeat(job):
+            result = HANDLERS[job.kind](job, Progress(job))
+    except Exception as error:
+        logger.exception('Job %s (%s) failed', job.id, job.kind)
+        outcome, fields = Job.FAILED, {'error': f'{type(error).__name__}: {error}'}
+    else:
+        outcome, fields = Job.SUCCEEDED, {'result': result}
+    if not owned(job).update(status=outcome, finished=timezone.now(), **fields):
+        logger.warning('Job %s (%s) was requeued while running; dropping this run\'s outcome', job.id, job.kind)
+    return outcome
+
+
+def run_in_worker(job_id):
+    # Pool workers live as long as the command, so treat every job like a
+    # request and drop connections that are broken or past CONN_MAX_AGE.
+    close_old_connections()
+    try:
+        return run(job_id)
+    finally:
+        close_old_connections()
+
+
+def work(workers=4, processes=False, once=False, poll_interval=1.0):
+    """
+    Claim and run jobs until interrupted, or until the queue is empty when
+    `once` is set. Returns the number of jobs run.
+    """
+    if processes:
+        # Spawned rather than forked, so no worker inherits this process's
+        # database connections.
+        executor = ProcessPoolExecutor(workers, mp_context=get_context('spawn'), initializer=django.setup)
+    else:
+        executor = ThreadPoolExecutor(workers, thread_name_prefix='job')
+    running, done = set(), 0
+    with executor:
+        while True:
+            requeue_stale()
+            ids = claim(workers - len(running)) if len(running) < workers else []
+            running.update(executor.submit(run_in_worker, job_id) for job_id in ids)
+            if not running:
+                if once:
+                    return done
+                time.sleep(poll_interval)
+                continue
+            finished, running = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+            done += len(finished)
+
+
+@handler('reindex')
+def reindex(job, progress, batch_size=500):
+    items = Item.objects.filter(user_id=job.user_id_id).order_by('id')
+    total = items.count()
+    progress(0, total)
+    indexed = 0
+    rows = items.iterator(chunk_size=batch_size)
+    while batch := list(islice(rows, batch_size)):
+        with transaction.atomic():
+            index_items(batch)
+        indexed += len(batch)
+        progress(indexed)
+    return {'items': indexed}
+
+
+@handler('rebuild_stats')
+def rebuild_stats(job, progress):
+    progress(0, 1)
+    rows = inventory_stats.rebuild(job.user_id_id)
+    progress(1)
+    return {'rows': rows}
+
+
+@handler('compact_ledger')
+def compact_ledger(job, progress):
+    # The number of items to snapshot is not known up front; report the
+    # running count after each batch.
+    progress(0)
+    return {'snapshots': ledger.compact(user_id=job.user_id_id, progress=progress)}
+
+
+@handler('export')
+def export(job, progress):
+    """Write the items matching `params` (ItemListApiView filters) to a file in default_storage."""
+    from .views import ItemExportApiView
+
+    view = ItemExportApiView()
+    export_format = job.params.get('export_format', 'csv')
+    if export_format not in view.content_types:
+        raise ValueError('export_format must be csv or ndjson')
+    items = view.filter_params(job.user_id_id, job.params)
+    total = items.count()
+    progress(0, total)
+
+    rows = view.iter_rows(items)
+    lines = view.stream_csv(rows) if export_format == 'csv' else view.stream_ndjson(rows)
+    written = 0
+    with tempfile.TemporaryFile('w+b') as output:
+        if export_format == 'csv':
+            output.write(next(lines).encode())
+        for line in lines:
+            output.write(line.encode())
+            written += 1
+            if written % view.chunk_size == 0:
+                progress(written)
+        progress(written)
+        output.seek(0)
+        name = default_storage.save(file_name(job, f'items.{export_format}'), File(output))
+    return {'file': name, 'rows': written, 'content_type': view.content_types[export_format]}
+
+
+@handler('import')
+def import_items(job, progress, max_errors=1000):
+    """Upsert the uploaded file saved at `params['file']`, as ItemImportApiView does inline."""
+    from .views import ItemImportApiView
+
+    view = ItemImportApiView()
+    summary, errors = {}, []
+    try:
+        with default_storage.open(job.params['file'], 'rb') as upload:
+            rows = view.read_csv(upload) if job.params.get('import_format') == 'csv' else view.read_ndjson(upload)
+            for line in view.run_import(job.user_id, rows):
+                event = json.loads(line)
+                if event['event'] == 'error':
+                    raise RuntimeError(f"Import stopped after {event['rows']} rows: {event['error']}")
+                errors.extend(event.pop('errors', [])[:max_errors - len(errors)])
+                summary = event
+                progress(event['rows'])
+    finally:
+        # A run that was requeued leaves the upload to the run that replaced it.
+        if owned(job).exists():
+            default_storage.delete(job.params['file'])
+    summary.pop('event', None)
+    return {**summary, 'errors': errors}
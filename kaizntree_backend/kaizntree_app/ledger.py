@@ -0,0 +1,179 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.utils import timezone
+
+from . import bom, stats
+from . import cache as item_cache
+from .models import Item, StockMovement, StockSnapshot
+
+STOCK_FIELDS = ('in_stock', 'available_stock')
+DELTA_FIELDS = tuple(f'{field}_delta' for field in STOCK_FIELDS)
+
+
+def saved_movements(items, created=False):
+    """
+    Movements for the stock changes made by saving `items`, measured against
+    the values they were loaded with (or zero for newly created items).
+    Existing items must have been loaded with select_for_update() in the
+    saving transaction; a movement posted after an unlocked read would be
+    folded into the delta and counted twice.
+    """
+    movements = []
+    for item in items:
+        loaded = {} if created else getattr(item, '_loaded_values', None)
+        if loaded is None or (not created and any(field not in loaded for field in STOCK_FIELDS)):
+            continue
+        deltas = {f'{field}_delta': getattr(item, field) - loaded.get(field, 0) for field in STOCK_FIELDS}
+        if any(deltas.values()):
+            movements.append(StockMovement(
+                item_id_id=item.id, user_id_id=item.user_id_id,
+                reference='opening' if created else '', **deltas))
+    return movements
+
+
+def record_saves(items, created=False):
+    movements = saved_movements(items, created)
+    if movements:
+        StockMovement.objects.bulk_create(movements)
+
+
+def increment(item_ids_deltas, field):
+    """`field + delta` with the delta picked per row, for one UPDATE over many items."""
+    return F(field) + Case(
+        *(When(id=item_id, then=Value(delta)) for item_id, delta in item_ids_deltas.items()),
+        default=Value(0), output_field=IntegerField())
+
+
+class ItemsNotFound(Item.DoesNotExist):
+    def __init__(self, item_ids):
+        self.item_ids = sorted(item_ids)
+        super().__init__(f'Items not found: {self.item_ids}')
+
+
+class VersionConflict(Exception):
+    def __init__(self, versions):
+        # {item_id: current version} for every item whose version differed.
+        self.versions = versions
+        super().__init__(f'Version mismatch for items: {sorted(versions)}')
+
+
+def post_movements(user_id, movements, items=None, expected_versions=None):
+    """
+    Append `movements` (unsaved StockMovement instances) and apply their sum
+    to the items' stock columns in one `UPDATE ... SET in_stock = in_stock + ...`,
+    so concurrent channels never overwrite each other.
+
+    `items` are the user's items locked with select_for_update() by the
+    caller; they are loaded here otherwise. `expected_versions` maps item ids
+    to the version the caller last saw; the UPDATE only matches those rows at
+    that version. Returns `{item_id: item}` with the new stock values and
+    versions set. Raises ItemsNotFound for unknown items and VersionConflict,
+    with nothing written, when any expected version is stale.
+    """
+    totals = defaultdict(lambda: dict.fromkeys(DELTA_FIELDS, 0))
+    for movement in movements:
+        for field in DELTA_FIELDS:
+            totals[movement.item_id_id][field] += getattr(movement, field)
+
+    with transaction.atomic():
+        if items is None:
+            items = Item.objects.select_for_update().filter(user_id=user_id).in_bulk(list(totals))
+        missing = set(totals) - set(items)
+        if missing:
+            raise ItemsNotFound(missing)
+        expected_versions = expected_versions or {}
+        stale = {item_id: items[item_id].version for item_id, version in expected_versions.items()
+                 if items[item_id].version != version}
+        if stale:
+            raise VersionConflict(stale)
+
+        before = [stats.item_values(items[item_id]) for item_id in totals]
+        # The version check is repeated in the WHERE clause, so it also holds
+        # on backends where select_for_update() does not lock rows.
+        condition = Q(id__in=[item_id for item_id in totals if item_id not in expected_versions])
+        for item_id, version in expected_versions.items():
+            condition |= Q(id=item_id, version=version)
+        updated = Item.objects.filter(condition, user_id=user_id).update(
+            updated=timezone.now(), version=F('version') + 1,
+            **{field: increment({item_id: delta[f'{field}_delta'] for item_id, delta in totals.items()}, field)
+               for field in STOCK_FIELDS})
+        if updated != len(totals):
+            current = Item.objects.filter(id__in=list(expected_versions)).values_list('id', 'version')
+            raise VersionConflict({item_id: version for item_id, version in current
+                                   if version != expected_versions[item_id]})
+        for item_id, delta in totals.items():
+            items[item_id].version += 1
+            for field in STOCK_FIELDS:
+                setattr(items[item_id], field, getattr(items[item_id], field) + delta[f'{field}_delta'])
+
+        for movement in movements:
+            movement.user_id_id = user_id
+        StockMovement.objects.bulk_create(movements)
+        stats.apply_changes(user_id, removed=before,
+                            added=[stats.item_values(items[item_id]) for item_id in totals])
+
+    # queryset.update() sends no post_save, so invalidate explicitly.
+    item_cache.bump_generation(user_id)
+    if any(delta['available_stock_delta'] for delta in totals.values()):
+        bom.invalidate(user_id)
+    return {item_id: items[item_id] for item_id in totals}
+
+
+def stock_as_of(item_id, as_of):
+    """
+    `(in_stock, available_stock)` of the item at `as_of`: the closest snapshot
+    at or before it, found by index, plus the movements since that snapshot.
+    """
+    snapshot = StockSnapshot.objects.filter(
+        item_id=item_id, as_of__lte=as_of).order_by('-as_of').first()
+    movements = StockMovement.objects.filter(item_id=item_id, created__lte=as_of)
+    if snapshot is not None:
+        movements = movements.filter(created__gt=snapshot.as_of)
+    totals = movements.aggregate(**{field: Sum(f'{field}_delta') for field in STOCK_FIELDS})
+    base = (snapshot.in_stock, snapshot.available_stock) if snapshot else (0, 0)
+    return tuple(value + (totals[field] or 0) for value, field in zip(base, STOCK_FIELDS))
+
+
+def get_compaction_lag():
+    return getattr(settings, 'STOCK_SNAPSHOT_LAG_SECONDS', 60 * 60)
+
+
+def compact(before=None, user_id=None, batch_size=1000, progress=None):
+    """
+    Snapshot, as of `before`, every item with movements since its last
+    snapshot. `before` defaults to STOCK_SNAPSHOT_LAG_SECONDS ago, leaving
+    room for movements still being committed. Returns the snapshot count,
+    which is also passed to `progress` after every batch.
+    """
+    before = before or timezone.now() - timedelta(seconds=get_compaction_lag())
+    last_snapshot = StockSnapshot.objects.filter(
+        item_id=OuterRef('item_id'), as_of__lte=before).order_by('-as_of').values('as_of')[:1]
+    movements = StockMovement.objects.filter(created__lte=before).annotate(
+        since=Subquery(last_snapshot)).filter(Q(since__isnull=True) | Q(created__gt=F('since')))
+    if user_id is not None:
+        movements = movements.filter(user_id=user_id)
+    deltas = movements.values('item_id').annotate(
+        **{field: Sum(f'{field}_delta') for field in STOCK_FIELDS}).order_by('item_id')
+
+    created = 0
+    rows = iter(deltas)
+    while True:
+        batch = {row['item_id']: row for _, row in zip(range(batch_size), rows)}
+        if not batch:
+            return created
+        bases = {snapshot.item_id_id: snapshot for snapshot in StockSnapshot.objects.filter(
+            item_id__in=list(batch), as_of=Subquery(last_snapshot))}
+        snapshots = []
+        for item_id, row in batch.items():
+            base = bases.get(item_id)
+            snapshots.append(StockSnapshot(
+                item_id_id=item_id, as_of=before,
+                **{field: (getattr(base, field) if base else 0) + row[field] for field in STOCK_FIELDS}))
+        StockSnapshot.objects.bulk_create(snapshots, ignore_conflicts=True)
+        created += len(snapshots)
+        if progress is not None:
+            progress(created)
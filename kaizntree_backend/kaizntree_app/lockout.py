@@ -0,0 +1,94 @@
+from ipaddress import ip_address, ip_network
+
+from django.conf import settings
+from django.core.cache import cache
+
+FAILURE_KEY = 'login-failures:{scope}:{value}'
+
+
+def get_timeout():
+    return getattr(settings, 'LOGIN_LOCKOUT_SECONDS', 15 * 60)
+
+
+def failure_limits(username, ip):
+    """Cache key -> allowed failures, per username and per client address."""
+    return {
+        FAILURE_KEY.format(scope='user', value=username.lower()):
+            getattr(settings, 'LOGIN_FAILURE_LIMIT', 5),
+        FAILURE_KEY.format(scope='ip', value=ip):
+            getattr(settings, 'LOGIN_IP_FAILURE_LIMIT', 50),
+    }
+
+
+def trusted_proxies():
+    return [ip_network(proxy, strict=False) for proxy in getattr(settings, 'TRUSTED_PROXIES', [])]
+
+
+def is_trusted(address, proxies):
+    try:
+        address = ip_address(address)
+    except ValueError:
+        return False
+    return any(address in proxy for proxy in proxies)
+
+
+def client_ip(request):
+    """
+    The client's address: REMOTE_ADDR, or behind the load balancers listed
+    in TRUSTED_PROXIES, the rightmost X-Forwarded-For entry that is not one
+    of them. Entries left of it were sent by the client and can be forged.
+    """
+    remote = request.META.get('REMOTE_ADDR', '')
+    proxies = trusted_proxies()
+    if not proxies or not is_trusted(remote, proxies):
+        return remote
+    forwarded = [address.strip() for address in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',')
+                 if address.strip()]
+    for address in reversed(forwarded):
+        if not is_trusted(address, proxies):
+            return address
+    return forwarded[0] if forwarded else remote
+
+
+def increment(key):
+    # The window runs from the first failure; later ones do not extend it.
+    cache.add(key, 0, get_timeout())
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Expired between add() and incr().
+        cache.set(key, 1, get_timeout())
+        return 1
+
+
+def reserve_attempt(username, ip):
+    """
+    Count a login attempt against both limits before the password is
+    checked, and return False, counting nothing, once either is used up.
+    Each attempt claims its place with an atomic increment on the shared
+    cache, so concurrent attempts in other processes cannot all pass a
+    check before any of them is counted. Rejected attempts cost a few
+    cache calls rather than a hash.
+    """
+    limits = failure_limits(username, ip)
+    counts = {key: increment(key) for key in limits}
+    if all(counts[key] <= limit for key, limit in limits.items()):
+        return True
+    for key in limits:
+        try:
+            cache.decr(key)
+        except ValueError:
+            pass
+    return False
+
+
+def release_attempt(username, ip):
+    """
+    After a successful login: reset the username's failures and return the
+    address's reserved attempt. A failed attempt stays counted.
+    """
+    cache.delete(FAILURE_KEY.format(scope='user', value=username.lower()))
+    try:
+        cache.decr(FAILURE_KEY.format(scope='ip', value=ip))
+    except ValueError:
+        pass
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from kaizntree_app import ledger
+
+
+class Command(BaseCommand):
+    help = 'Fold stock movements into per-item snapshots so stock-as-of lookups stay cheap.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', help='Snapshot time (ISO 8601); defaults to STOCK_SNAPSHOT_LAG_SECONDS ago')
+        parser.add_argument('--user', type=int, help='Only this user id')
+
+    def handle(self, *args, **options):
+        before = None
+        if options['before']:
+            before = parse_datetime(options['before'])
+            if before is None:
+                raise CommandError('--before must be an ISO 8601 datetime')
+            if timezone.is_naive(before):
+                before = timezone.make_aware(before)
+        snapshots = ledger.compact(before=before, user_id=options['user'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {snapshots} stock snapshots'))
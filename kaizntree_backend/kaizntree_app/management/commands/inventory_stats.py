@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from kaizntree_app import stats
+
+
+class Command(BaseCommand):
+    help = 'Verify or rebuild the InventoryStats counters from Item rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['verify', 'rebuild'])
+        parser.add_argument('--user', type=int, help='Only this user id')
+
+    def handle(self, *args, **options):
+        user_id = options['user']
+        if options['action'] == 'rebuild':
+            rows = stats.rebuild(user_id)
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} inventory stats rows'))
+            return
+
+        mismatches = stats.verify(user_id)
+        for (user, category), actual, expected in mismatches:
+            self.stdout.write(f'user {user} category {category!r}: stored {actual}, expected {expected}')
+        if mismatches:
+            raise CommandError(f'{len(mismatches)} inventory stats rows are out of date; run rebuild')
+        self.stdout.write(self.style.SUCCESS('Inventory stats match the item data'))
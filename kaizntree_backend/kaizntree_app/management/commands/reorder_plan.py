@@ -0,0 +1,36 @@
+import csv
+
+from django.core.management.base import BaseCommand
+
+from kaizntree_app.reorder import CHUNK_SIZE, format_cents, reorder_chunks
+
+
+class Command(BaseCommand):
+    help = 'Write the reorder plan for a user as CSV, one chunk of items at a time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('user', type=int, help='User id')
+        parser.add_argument('--output', help='CSV file to write (default: stdout)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument('--include-unpurchaseable', action='store_true')
+
+    def handle(self, *args, **options):
+        output = open(options['output'], 'w', newline='') if options['output'] else self.stdout
+        try:
+            writer = csv.DictWriter(output, fieldnames=[
+                'id', 'SKU', 'name', 'quantity', 'unit_cost', 'purchase_cost'])
+            writer.writeheader()
+            total_items = total_quantity = total_cents = 0
+            for chunk in reorder_chunks(options['user'],
+                                        purchaseable_only=not options['include_unpurchaseable'],
+                                        chunk_size=options['chunk_size']):
+                writer.writerows(chunk.lines())
+                total_items += len(chunk)
+                total_quantity += int(chunk.quantity.sum())
+                total_cents += int(chunk.line_cost_cents.sum())
+        finally:
+            if output is not self.stdout:
+                output.close()
+
+        self.stderr.write(
+            f'{total_items} items to reorder, {total_quantity} units, {format_cents(total_cents)} total cost')
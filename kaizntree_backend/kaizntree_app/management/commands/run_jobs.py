@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from kaizntree_app import jobs
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs. Start as many workers as needed; they share the job table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Jobs run at the same time')
+        parser.add_argument('--processes', action='store_true',
+                            help='Run jobs in a process pool instead of threads')
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds between checks for new jobs')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+        try:
+            done = jobs.work(workers=options['workers'], processes=options['processes'],
+                             once=options['once'], poll_interval=options['poll_interval'])
+        except KeyboardInterrupt:
+            return
+        self.stdout.write(self.style.SUCCESS(f'Ran {done} jobs'))
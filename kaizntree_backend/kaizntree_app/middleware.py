@@ -0,0 +1,324 @@
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+from rest_framework.exceptions import AuthenticationFailed
+
+from . import routers
+from .authentication import SignedTokenAuthentication
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger('kaizntree_app.instrumentation')
+
+_current_metrics = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.view_name = None
+        self.query_count = 0
+        self.db_time = 0.0
+        self.timings = defaultdict(float)
+
+    def __call__(self, execute, sql, params, many, context):
+        # Installed with connection.execute_wrapper(), so it sees every query
+        # without needing DEBUG = True.
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.query_count += 1
+
+
+@contextmanager
+def timed(name):
+    """Add the time spent in the block to the current request's `name` timing."""
+    metrics = _current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.timings[name] += time.perf_counter() - start
+
+
+class InstrumentationMiddleware:
+    """
+    Per-request SQL query count, DB time, serialization and render time.
+
+    Enabled with `API_INSTRUMENTATION = True`. The numbers are sent back in a
+    `Server-Timing` header and logged as one JSON line per request. Work done
+    while a streaming response is being consumed is not included.
+
+    Sync and async capable, so ASGI requests to the async views stay on the
+    event loop.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'API_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                self.wrap_connections(stack, metrics)
+                response = self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            # Connections belong to a thread, and an async request's queries
+            # run on its thread-sensitive sync_to_async thread, so wrap there.
+            stack = ExitStack()
+            await sync_to_async(self.wrap_connections)(stack, metrics)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        finally:
+            _current_metrics.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - start)
+
+    def wrap_connections(self, stack, metrics):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(metrics))
+
+    def finish(self, request, response, metrics, total):
+        response['Server-Timing'] = self.server_timing(metrics, total)
+        logger.info(json.dumps({
+            'event': 'request',
+            'method': request.method,
+            'path': request.path,
+            'view': metrics.view_name,
+            'status': response.status_code,
+            'queries': metrics.query_count,
+            'db_ms': round(metrics.db_time * 1000, 3),
+            **{f'{name}_ms': round(value * 1000, 3) for name, value in metrics.timings.items()},
+            'total_ms': round(total * 1000, 3),
+        }))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current_metrics.get()
+        if metrics is not None:
+            match = request.resolver_match
+            metrics.view_name = match.view_name if match and match.view_name else view_func.__name__
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns; time that too.
+        metrics = _current_metrics.get()
+        if metrics is not None:
+            start = time.perf_counter()
+
+            def record_render(rendered):
+                metrics.timings['render'] += time.perf_counter() - start
+
+            response.add_post_render_callback(record_render)
+        return response
+
+    def server_timing(self, metrics, total):
+        entries = [f'db;dur={metrics.db_time * 1000:.3f};desc="{metrics.query_count} queries"']
+        entries.extend(f'{name};dur={value * 1000:.3f}' for name, value in metrics.timings.items())
+        entries.append(f'total;dur={total * 1000:.3f}')
+        return ', '.join(entries)
+
+
+class ReadReplicaMiddleware:
+    """
+    Route the reads of views with `read_from_replica = True` to a replica.
+
+    A successful write stamps the session, and for READ_REPLICA_LAG_SECONDS
+    afterwards that session keeps reading from the primary so it sees its
+    own changes. Token clients have no session, so their writes are marked
+    in the cache by user id instead. Enabled when READ_REPLICAS lists at
+    least one alias.
+    """
+    recent_write_key = '_recent_write'
+    recent_write_cache_key = 'recent-write:{user_id}'
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'READ_REPLICAS', None):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            # WSGI threads are reused across requests; never leak the choice.
+            routers.set_replica(None)
+
+        if request.method not in self.safe_methods and response.status_code < 400:
+            self.mark_write(request)
+        return response
+
+    async def __acall__(self, request):
+        # process_view runs through sync_to_async, which copies its context
+        # changes back here, so the async view sees the replica it picked.
+        with routers.use_replica(None):
+            response = await self.get_response(request)
+
+        if request.method not in self.safe_methods and response.status_code < 400:
+            await sync_to_async(self.mark_write)(request)
+        return response
+
+    def mark_write(self, request):
+        # Only an existing session is stamped; starting one would cost a
+        # session row and a cookie on every write by a token client.
+        if request.session.session_key is not None:
+            request.session[self.recent_write_key] = time.time()
+        elif request.user.is_authenticated:
+            cache.set(self.recent_write_cache_key.format(user_id=request.user.pk), True,
+                      settings.READ_REPLICA_LAG_SECONDS)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None)
+        if (request.method in self.safe_methods
+                and getattr(view_class, 'read_from_replica', False)
+                and not self.recently_wrote(request)):
+            routers.set_replica(random.choice(settings.READ_REPLICAS))
+
+    def recently_wrote(self, request):
+        if request.session.session_key is None:
+            user_id = self.token_user_id(request)
+            return user_id is not None and cache.get(self.recent_write_cache_key.format(user_id=user_id), False)
+        written = request.session.get(self.recent_write_key)
+        return written is not None and time.time() - written < settings.READ_REPLICA_LAG_SECONDS
+
+    def token_user_id(self, request):
+        # DRF authenticates in the view, after this runs, so check the token
+        # here; its user comes from the cache.
+        try:
+            authenticated = SignedTokenAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return None
+        return authenticated[0].pk if authenticated else None
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Brotli- or gzip-compress responses of at least COMPRESSION_MIN_SIZE
+    bytes, picking the encoding from Accept-Encoding. Brotli is offered
+    when the `brotli` package is installed and wins ties; gzip keeps the
+    BREACH length randomisation of Django's GZipMiddleware.
+    """
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < self.min_size():
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = self.negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        with timed('compress'):
+            if response.streaming:
+                if response.is_async:
+                    # Async streams are rare here; leave them uncompressed
+                    # rather than buffer or block the event loop.
+                    return response
+                response.streaming_content = self.compress_stream(encoding, response.streaming_content)
+                del response.headers['Content-Length']
+            else:
+                compressed = self.compress(encoding, response.content)
+                if len(compressed) >= len(response.content):
+                    return response
+                response.content = compressed
+                response.headers['Content-Length'] = str(len(compressed))
+
+        # A compressed body is a different representation; see GZipMiddleware.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def min_size():
+        return getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+
+    @staticmethod
+    def negotiate(accept_encoding):
+        """The supported encoding with the highest q-value, or None."""
+        supported = ('br', 'gzip') if brotli is not None else ('gzip',)
+        weights = {}
+        for part in accept_encoding.split(','):
+            coding, _, params = part.strip().partition(';')
+            coding, quality = coding.strip().lower(), 1.0
+            params = params.strip()
+            if params.startswith('q='):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    quality = 0.0
+            weights[coding] = quality
+        if '*' in weights:
+            for coding in supported:
+                weights.setdefault(coding, weights['*'])
+        best = max(supported, key=lambda coding: weights.get(coding, 0.0))
+        return best if weights.get(best, 0.0) > 0 else None
+
+    def compress(self, encoding, content):
+        if encoding == 'br':
+            return brotli.compress(content, quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 4))
+        return compress_string(content, max_random_bytes=self.max_random_bytes)
+
+    def compress_stream(self, encoding, chunks):
+        if encoding != 'br':
+            return compress_sequence(chunks, max_random_bytes=self.max_random_bytes)
+        return self.brotli_stream(chunks)
+
+    @staticmethod
+    def brotli_stream(chunks):
+        compressor = brotli.Compressor(quality=getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 4))
+        for chunk in chunks:
+            data = compressor.process(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.2 on 2026-10-17 12:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kaizntree_app', '0005_item_desired_stock_item_is_assembly_item_is_bundle_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['user_id', 'created', 'id'], name='item_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['user_id', 'SKU'], name='item_user_sku_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['user_id', 'category', 'created'], name='item_user_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['user_id', 'tags', 'created'], name='item_user_tags_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['user_id', 'cost'], name='item_user_cost_idx'),
+        ),
+    ]
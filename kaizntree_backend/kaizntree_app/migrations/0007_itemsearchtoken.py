@@ -0,0 +1,73 @@
+# Generated by Django 5.0.2 on 2026-10-17 12:36
+
+import re
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# A frozen copy of kaizntree_app.search as of this migration, so later
+# changes to the live tokenizer don't change what this backfill writes.
+MAX_TOKEN_LENGTH = 20
+FIELD_WEIGHTS = {
+    'name': 3,
+    'SKU': 2,
+    'category': 1,
+}
+WORD_RE = re.compile(r'[^\W_]+')
+
+
+def build_tokens(item):
+    tokens = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        text = str(getattr(item, field) or '').lower()
+        for word in (word[:MAX_TOKEN_LENGTH] for word in WORD_RE.findall(text)):
+            for length in range(1, len(word) + 1):
+                prefix = word[:length]
+                prefix_weight = weight * 2 if length == len(word) else weight
+                tokens[prefix] = max(tokens.get(prefix, 0), prefix_weight)
+    return tokens
+
+
+def index_existing_items(apps, schema_editor):
+    Item = apps.get_model('kaizntree_app', 'Item')
+    ItemSearchToken = apps.get_model('kaizntree_app', 'ItemSearchToken')
+    batch = []
+    for item in Item.objects.only('id', 'user_id', 'SKU', 'name', 'category').iterator(chunk_size=2000):
+        batch.extend(
+            ItemSearchToken(item_id_id=item.id, user_id_id=item.user_id_id, token=token, weight=weight)
+            for token, weight in build_tokens(item).items()
+        )
+        if len(batch) >= 5000:
+            ItemSearchToken.objects.bulk_create(batch)
+            batch = []
+    ItemSearchToken.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kaizntree_app', '0006_item_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=20)),
+                ('weight', models.PositiveSmallIntegerField()),
+                ('item_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='kaizntree_app.item')),
+                ('user_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user_id', 'token'], name='search_token_user_token_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='itemsearchtoken',
+            constraint=models.UniqueConstraint(fields=('item_id', 'token'), name='search_token_item_token_uniq'),
+        ),
+        migrations.RunPython(index_existing_items, migrations.RunPython.noop),
+    ]
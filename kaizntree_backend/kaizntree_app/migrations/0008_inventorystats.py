@@ -0,0 +1,50 @@
+# Generated by Django 5.0.2 on 2026-10-17 12:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_inventory_stats(apps, schema_editor):
+    Item = apps.get_model('kaizntree_app', 'Item')
+    InventoryStats = apps.get_model('kaizntree_app', 'InventoryStats')
+    stats = {}
+    for user_id, category, in_stock, cost, minimum_stock in Item.objects.values_list(
+            'user_id', 'category', 'in_stock', 'cost', 'minimum_stock').iterator(chunk_size=2000):
+        row = stats.setdefault((user_id, category), InventoryStats(
+            user_id_id=user_id, category=category, item_count=0, total_stock=0,
+            total_value=0, below_minimum_count=0))
+        row.item_count += 1
+        row.total_stock += in_stock
+        row.total_value += cost * in_stock
+        row.below_minimum_count += in_stock < minimum_stock
+    InventoryStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kaizntree_app', '0007_itemsearchtoken'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=100)),
+                ('item_count', models.IntegerField(default=0)),
+                ('total_stock', models.BigIntegerField(default=0)),
+                ('total_value', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('below_minimum_count', models.IntegerField(default=0)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('user_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='inventorystats',
+            constraint=models.UniqueConstraint(fields=('user_id', 'category'), name='inventory_stats_user_category_uniq'),
+        ),
+        migrations.RunPython(build_inventory_stats, migrations.RunPython.noop),
+    ]
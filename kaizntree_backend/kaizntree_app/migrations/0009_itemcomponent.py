@@ -0,0 +1,27 @@
+# Generated by Django 5.0.2 on 2026-10-17 12:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kaizntree_app', '0008_inventorystats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemComponent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField()),
+                ('assembly_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='components', to='kaizntree_app.item')),
+                ('component_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='used_in', to='kaizntree_app.item')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='itemcomponent',
+            constraint=models.UniqueConstraint(fields=('assembly_id', 'component_id'), name='item_component_uniq'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.0.2 on 2026-10-17 13:01
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def open_stock_ledger(apps, schema_editor):
+    # Current stock becomes each item's opening movement. The columns were
+    # last written at `updated`, so from then on the ledger is exact.
+    Item = apps.get_model('kaizntree_app', 'Item')
+    StockMovement = apps.get_model('kaizntree_app', 'StockMovement')
+    movements = (
+        StockMovement(item_id_id=item_id, user_id_id=user_id, reference='opening', created=updated,
+                      in_stock_delta=in_stock, available_stock_delta=available_stock)
+        for item_id, user_id, in_stock, available_stock, updated in Item.objects.values_list(
+            'id', 'user_id', 'in_stock', 'available_stock', 'updated').iterator(chunk_size=2000)
+        if in_stock or available_stock
+    )
+    StockMovement.objects.bulk_create(movements, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kaizntree_app', '0009_itemcomponent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of', models.DateTimeField()),
+                ('in_stock', models.IntegerField()),
+                ('available_stock', models.IntegerField()),
+                ('item_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='kaizntree_app.item')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(blank=True, choices=[('ET', 'Etsy'), ('CT', 'In Shop'), ('ST', 'Settings'), ('OL', 'Online'), ('SP', 'Shopify'), ('SQ', 'Square'), ('XE', 'Xero')], max_length=2)),
+                ('in_stock_delta', models.IntegerField(default=0)),
+                ('available_stock_delta', models.IntegerField(default=0)),
+                ('reference', models.CharField(blank=True, max_length=100)),
+                ('created', models.DateTimeField(default=django.utils.timezone.now)),
+                ('item_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='kaizntree_app.item')),
+                ('user_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['item_id', 'created'], name='stock_move_item_created_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='stocksnapshot',
+            constraint=models.UniqueConstraint(fields=('item_id', 'as_of'), name='stock_snapshot_item_as_of_uniq'),
+        ),
+        migrations.RunPython(open_stock_ledger, migrations.RunPython.noop),
+    ]
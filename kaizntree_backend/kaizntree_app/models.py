@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 
 
@@ -32,3 +33,187 @@ class Item(models.Model):
     updated = models.DateTimeField(auto_now=True, blank=True)
     created = models.DateTimeField(
         auto_now_add=True, auto_now=False, blank=True)
+    # Bumped by every write; stock adjustments can require a given version.
+    version = models.PositiveIntegerField(default=1)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Remember what was loaded so saves can tell which fields changed.
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        super().save(*args, **kwargs)
+
+    class Meta:
+        # Every listing is scoped to one user and ordered by (created, id), so
+        # each index leads with user_id to match ItemListApiView's access paths.
+        indexes = [
+            models.Index(fields=['user_id', 'created', 'id'],
+                         name='item_user_created_idx'),
+            models.Index(fields=['user_id', 'SKU'], name='item_user_sku_idx'),
+            models.Index(fields=['user_id', 'category', 'created'],
+                         name='item_user_category_idx'),
+            models.Index(fields=['user_id', 'tags', 'created'],
+                         name='item_user_tags_idx'),
+            models.Index(fields=['user_id', 'cost'], name='item_user_cost_idx'),
+        ]
+
+
+class ItemSearchToken(models.Model):
+    """
+    Word-prefix index over Item.name, SKU and category, kept in sync by
+    kaizntree_app.search. Each row says "this item has a word starting with
+    `token`", weighted by which field the word came from.
+    """
+    item_id = models.ForeignKey(
+        Item, on_delete=models.CASCADE, related_name='search_tokens')
+    user_id = models.ForeignKey(User, on_delete=models.CASCADE)
+    token = models.CharField(max_length=20)
+    weight = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['item_id', 'token'],
+                                    name='search_token_item_token_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['user_id', 'token'],
+                         name='search_token_user_token_idx'),
+        ]
+
+
+class InventoryStats(models.Model):
+    """
+    Running totals of a user's items per category, maintained incrementally
+    by kaizntree_app.stats. User-wide totals are the sum of the user's rows.
+    """
+    user_id = models.ForeignKey(User, on_delete=models.CASCADE)
+    category = models.CharField(max_length=100)
+    item_count = models.IntegerField(default=0)
+    total_stock = models.BigIntegerField(default=0)
+    total_value = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    below_minimum_count = models.IntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user_id', 'category'],
+                                    name='inventory_stats_user_category_uniq'),
+        ]
+
+
+class ItemComponent(models.Model):
+    """
+    One bill-of-materials line: building one `assembly_id` consumes
+    `quantity` units of `component_id`. The lines of a user form a DAG.
+    """
+    assembly_id = models.ForeignKey(
+        Item, on_delete=models.CASCADE, related_name='components')
+    component_id = models.ForeignKey(
+        Item, on_delete=models.CASCADE, related_name='used_in')
+    quantity = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['assembly_id', 'component_id'],
+                                    name='item_component_uniq'),
+        ]
+
+
+class StockMovement(models.Model):
+    """
+    Append-only record of a change to an item's stock, posted by a sales
+    channel or written when a save changes the stock columns. The stock
+    columns on Item are the running sum of these rows.
+    """
+    item_id = models.ForeignKey(
+        Item, on_delete=models.CASCADE, related_name='stock_movements')
+    user_id = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Blank for changes made through the item endpoints.
+    channel = models.CharField(max_length=2, choices=Item.TAG_CHOICES, blank=True)
+    in_stock_delta = models.IntegerField(default=0)
+    available_stock_delta = models.IntegerField(default=0)
+    reference = models.CharField(max_length=100, blank=True)
+    created = models.DateTimeField(default=timezone.now)
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Stock movements are append-only')
+        super().save(*args, **kwargs)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['item_id', 'created'], name='stock_move_item_created_idx'),
+        ]
+
+
+class StockSnapshot(models.Model):
+    """
+    An item's stock as of `as_of`, folded from every movement up to then by
+    kaizntree_app.ledger.compact(), so stock-as-of lookups only replay the
+    movements after the closest snapshot.
+    """
+    item_id = models.ForeignKey(
+        Item, on_delete=models.CASCADE, related_name='stock_snapshots')
+    as_of = models.DateTimeField()
+    in_stock = models.IntegerField()
+    available_stock = models.IntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['item_id', 'as_of'],
+                                    name='stock_snapshot_item_as_of_uniq'),
+        ]
+
+
+class Job(models.Model):
+    """
+    Long-running work queued from the API and run by `manage.py run_jobs`,
+    which claims queued rows with SELECT ... FOR UPDATE SKIP LOCKED.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    KIND_CHOICES = [
+        ('export', 'Export items'),
+        ('import', 'Import items'),
+        ('reindex', 'Rebuild the search index'),
+        ('rebuild_stats', 'Rebuild inventory stats'),
+        ('compact_ledger', 'Compact the stock ledger'),
+    ]
+
+    user_id = models.ForeignKey(User, on_delete=models.CASCADE, related_name='jobs')
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    progress = models.PositiveIntegerField(default=0)
+    # Unknown until the job has counted its work, e.g. for imports.
+    total = models.PositiveIntegerField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True)
+    # Touched by every progress report; running jobs that stop touching it
+    # are assumed to have lost their worker.
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created'], name='job_status_created_idx'),
+        ]
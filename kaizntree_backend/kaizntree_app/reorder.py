@@ -0,0 +1,108 @@
+from itertools import islice
+
+import numpy as np
+from django.db.models import F, IntegerField
+from django.db.models.functions import Cast, Round
+
+from .models import Item
+
+CHUNK_SIZE = 100_000
+
+
+class ReorderChunk:
+    """Column arrays for one chunk of items that need reordering."""
+
+    def __init__(self, ids, skus, names, quantity, unit_cost_cents):
+        self.ids = ids
+        self.skus = skus
+        self.names = names
+        self.quantity = quantity
+        self.unit_cost_cents = unit_cost_cents
+        self.line_cost_cents = quantity * unit_cost_cents
+
+    def __len__(self):
+        return len(self.ids)
+
+    def lines(self, order=None):
+        order = range(len(self)) if order is None else order
+        for index in order:
+            yield {
+                'id': int(self.ids[index]),
+                'SKU': self.skus[index],
+                'name': self.names[index],
+                'quantity': int(self.quantity[index]),
+                'unit_cost': format_cents(self.unit_cost_cents[index]),
+                'purchase_cost': format_cents(self.line_cost_cents[index]),
+            }
+
+
+def format_cents(cents):
+    cents = int(cents)
+    sign = '-' if cents < 0 else ''
+    return f'{sign}{abs(cents) // 100}.{abs(cents) % 100:02d}'
+
+
+def reorder_chunks(user_id, purchaseable_only=True, chunk_size=CHUNK_SIZE):
+    """
+    Yield ReorderChunks for the user's items whose available stock is below
+    minimum stock. Each needs `desired_stock - available_stock` more units.
+
+    Rows are streamed from the database and the arithmetic runs on whole
+    columns, so memory is bounded by `chunk_size` rather than the catalogue.
+    Costs are handled as integer cents to stay exact.
+    """
+    items = Item.objects.filter(user_id=user_id, available_stock__lt=F('minimum_stock'))
+    if purchaseable_only:
+        items = items.filter(is_purchaseable=True)
+    rows = items.annotate(
+        cost_cents=Cast(Round(F('cost') * 100), IntegerField()),
+    ).order_by('id').values_list(
+        'id', 'SKU', 'name', 'available_stock', 'desired_stock', 'cost_cents',
+    ).iterator(chunk_size=min(chunk_size, 10_000))
+
+    while True:
+        batch = list(islice(rows, chunk_size))
+        if not batch:
+            return
+        ids, skus, names, available, desired, cost_cents = zip(*batch)
+        quantity = np.array(desired, dtype=np.int64) - np.array(available, dtype=np.int64)
+        # Desired stock at or below what is available needs no order.
+        keep = np.flatnonzero(quantity > 0)
+        if len(keep):
+            yield ReorderChunk(
+                np.array(ids, dtype=np.int64)[keep],
+                [skus[index] for index in keep],
+                [names[index] for index in keep],
+                quantity[keep],
+                np.array(cost_cents, dtype=np.int64)[keep],
+            )
+
+
+def build_plan(user_id, limit=1000, purchaseable_only=True, chunk_size=CHUNK_SIZE):
+    """
+    Totals over every line plus the `limit` most expensive lines, most
+    expensive first (ties by id).
+    """
+    total_items = total_quantity = total_cents = 0
+    top_ids, top_cents, top_lines = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), []
+    for chunk in reorder_chunks(user_id, purchaseable_only, chunk_size):
+        total_items += len(chunk)
+        total_quantity += int(chunk.quantity.sum())
+        total_cents += int(chunk.line_cost_cents.sum())
+        if not limit:
+            continue
+        # Merge this chunk's best lines into the running top `limit`.
+        count = min(limit, len(chunk))
+        best = np.argpartition(-chunk.line_cost_cents, count - 1)[:count]
+        top_ids = np.concatenate([top_ids, chunk.ids[best]])
+        top_cents = np.concatenate([top_cents, chunk.line_cost_cents[best]])
+        top_lines.extend(chunk.lines(best))
+        order = np.lexsort((top_ids, -top_cents))[:limit]
+        top_ids, top_cents = top_ids[order], top_cents[order]
+        top_lines = [top_lines[index] for index in order]
+    return {
+        'total_items': total_items,
+        'total_quantity': total_quantity,
+        'total_cost': format_cents(total_cents),
+        'lines': top_lines,
+    }
@@ -0,0 +1,48 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_read_replica = ContextVar('read_replica', default=None)
+
+
+def current_replica():
+    """Alias reads of this request are routed to, or None for the primary."""
+    return _read_replica.get()
+
+
+def set_replica(alias):
+    """Route reads in the current context to `alias`; None means the primary."""
+    _read_replica.set(alias)
+
+
+@contextmanager
+def use_replica(alias):
+    token = _read_replica.set(alias)
+    try:
+        yield
+    finally:
+        _read_replica.reset(token)
+
+
+class ReadReplicaRouter:
+    """
+    Send kaizntree_app reads to the replica picked for the current request.
+
+    Sessions and users always come from the primary: a session created at
+    login may not have reached the replica yet.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == 'kaizntree_app':
+            return _read_replica.get()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {'default', *getattr(settings, 'READ_REPLICAS', [])}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
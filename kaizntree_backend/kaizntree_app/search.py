@@ -0,0 +1,65 @@
+import re
+
+from django.db.models import Count, Sum
+
+from .models import ItemSearchToken
+
+MAX_TOKEN_LENGTH = ItemSearchToken._meta.get_field('token').max_length
+FIELD_WEIGHTS = {
+    'name': 3,
+    'SKU': 2,
+    'category': 1,
+}
+WORD_RE = re.compile(r'[^\W_]+')
+
+
+def tokenize(text):
+    return [word[:MAX_TOKEN_LENGTH] for word in WORD_RE.findall(str(text).lower())]
+
+
+def build_tokens(item):
+    """
+    Map every prefix of every word in the searchable fields to its weight.
+    A prefix that is a whole word counts double, so exact words outrank
+    partial matches.
+    """
+    tokens = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        for word in tokenize(getattr(item, field) or ''):
+            for length in range(1, len(word) + 1):
+                prefix = word[:length]
+                prefix_weight = weight * 2 if length == len(word) else weight
+                tokens[prefix] = max(tokens.get(prefix, 0), prefix_weight)
+    return tokens
+
+
+def index_items(items):
+    """Rebuild the search tokens of saved items with one delete and one insert."""
+    items = list(items)
+    if not items:
+        return
+    ItemSearchToken.objects.filter(item_id__in=[item.id for item in items]).delete()
+    ItemSearchToken.objects.bulk_create(
+        (
+            ItemSearchToken(item_id_id=item.id, user_id_id=item.user_id_id, token=token, weight=weight)
+            for item in items
+            for token, weight in build_tokens(item).items()
+        ),
+        batch_size=1000,
+    )
+
+
+def search_items(items, user_id, query):
+    """
+    Narrow `items` to those where every word of `query` prefixes a word of
+    the name, SKU or category, annotated with `search_rank`.
+    """
+    terms = set(tokenize(query))
+    if not terms:
+        return items
+    return items.filter(
+        search_tokens__user_id=user_id, search_tokens__token__in=terms,
+    ).annotate(
+        search_rank=Sum('search_tokens__weight'),
+        search_hits=Count('search_tokens'),
+    ).filter(search_hits=len(terms))
@@ -1,6 +1,12 @@
 from rest_framework import serializers
-from .models import Item
+from .jobs import REQUESTABLE_KINDS
+from .models import Item, ItemComponent, Job, StockMovement
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.settings import api_settings
+from decimal import Decimal, InvalidOperation, getcontext
+from functools import lru_cache
 
 
 class ItemSerializer(serializers.ModelSerializer):
@@ -13,6 +19,147 @@ class ItemSerializer(serializers.ModelSerializer):
         extra_kwargs = {'user_id': {'write_only': True}}
 
 
+class ItemReadSerializer:
+    """
+    Read-only fast path for ItemSerializer list output.
+
+    Takes dicts from `Item.objects.values(*ItemReadSerializer.fields())` and
+    converts `cost` and the datetimes in place, skipping DRF's per-field
+    machinery. The JSON it renders is byte-identical to
+    `ItemSerializer(items, many=True).data`, or to the `fields` subset of it.
+    """
+
+    def __init__(self, rows, fields=None):
+        self.rows = rows
+        self.only = fields
+
+    @classmethod
+    def parse_fields(cls, value):
+        """
+        The readable fields named in a comma-separated `fields=` parameter,
+        in serializer order. Raises ValidationError for unknown names.
+        """
+        requested = {name.strip() for name in value.split(',') if name.strip()}
+        unknown = requested.difference(cls.fields())
+        if unknown:
+            raise serializers.ValidationError({'fields': [
+                f'Unknown fields: {", ".join(sorted(unknown))}. '
+                f'Choose from: {", ".join(cls.fields())}.']})
+        if not requested:
+            raise serializers.ValidationError({'fields': ['Name at least one field.']})
+        return tuple(name for name in cls.fields() if name in requested)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def fields():
+        serializer_fields = ItemSerializer().fields
+        return tuple(name for name in ItemSerializer.Meta.fields
+                     if not serializer_fields[name].write_only)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def converters(current_timezone):
+        serializer_fields = ItemSerializer().fields
+        cost_field = serializer_fields['cost']
+        converters = {
+            'cost': cost_field.to_representation,
+            'updated': serializer_fields['updated'].to_representation,
+            'created': serializer_fields['created'].to_representation,
+        }
+
+        if api_settings.COERCE_DECIMAL_TO_STRING and not cost_field.localize:
+            quantum = Decimal('.1') ** cost_field.decimal_places
+            context = getcontext().copy()
+            context.prec = cost_field.max_digits
+
+            def convert_cost(value):
+                return '{:f}'.format(value.quantize(quantum, context=context))
+
+            converters['cost'] = convert_cost
+
+        if current_timezone is not None and api_settings.DATETIME_FORMAT.lower() == 'iso-8601':
+            def convert_datetime(value):
+                value = value.astimezone(current_timezone).isoformat()
+                if value.endswith('+00:00'):
+                    value = value[:-6] + 'Z'
+                return value
+
+            converters['updated'] = converters['created'] = convert_datetime
+
+        return tuple(converters.items())
+
+    @property
+    def data(self):
+        current_timezone = timezone.get_current_timezone() if settings.USE_TZ else None
+        converters = self.converters(current_timezone)
+        if self.only is not None:
+            converters = [(name, convert) for name, convert in converters if name in self.only]
+        for row in self.rows:
+            for name, convert in converters:
+                value = row[name]
+                if value is not None:
+                    row[name] = convert(value)
+        return self.rows
+
+
+class ItemComponentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ItemComponent
+        fields = ["id", "assembly_id", "component_id", "quantity"]
+        read_only_fields = ('id',)
+        extra_kwargs = {'quantity': {'min_value': 1}}
+
+    def validate(self, data):
+        if data['assembly_id'] == data['component_id']:
+            raise serializers.ValidationError('An item cannot be a component of itself.')
+        return data
+
+
+class StockMovementSerializer(serializers.ModelSerializer):
+    # The id alone; ownership of every item in a batch is checked in one query.
+    item_id = serializers.IntegerField(source='item_id_id')
+
+    class Meta:
+        model = StockMovement
+        fields = ["id", "item_id", "channel", "in_stock_delta", "available_stock_delta", "reference",
+                  "created"]
+        read_only_fields = ('id', 'created')
+
+    def validate(self, data):
+        if not data.get('in_stock_delta') and not data.get('available_stock_delta'):
+            raise serializers.ValidationError('A movement must change in_stock or available_stock.')
+        return data
+
+
+class StockAdjustmentSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    in_stock = serializers.IntegerField(default=0)
+    available_stock = serializers.IntegerField(default=0)
+    # The version last read; the adjustment fails with 409 if it has moved on.
+    version = serializers.IntegerField(min_value=1, required=False)
+    channel = serializers.ChoiceField(choices=Item.TAG_CHOICES, required=False, allow_blank=True)
+    reference = serializers.CharField(max_length=100, required=False, allow_blank=True)
+
+    def validate(self, data):
+        if not data['in_stock'] and not data['available_stock']:
+            raise serializers.ValidationError('An adjustment must change in_stock or available_stock.')
+        return data
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ["id", "kind", "params", "status", "progress", "total", "result", "error", "created",
+                  "started", "finished"]
+        read_only_fields = ('id', 'status', 'progress', 'total', 'result', 'error', 'created', 'started',
+                            'finished')
+
+    def validate_kind(self, value):
+        if value not in REQUESTABLE_KINDS:
+            raise serializers.ValidationError(f'Jobs of kind {value!r} cannot be queued directly.')
+        return value
+
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -39,3 +186,84 @@ class SignupSerializer(serializers.ModelSerializer):
         user.set_password(validated_data['password'])
         user.save()
         return user
+
+
+class ItemImportValidator:
+    """
+    Cheap per-row validation for bulk imports.
+
+    Checks the same constraints as ItemSerializer for the writable Item
+    fields without building a serializer per row. Uniqueness is left to the
+    importer, which checks a whole chunk with one query.
+    """
+    string_fields = ['SKU', 'name', 'category', 'tags']
+    integer_fields = ['in_stock', 'available_stock',
+                      'minimum_stock', 'desired_stock']
+    boolean_fields = ['is_assembly', 'is_component',
+                      'is_purchaseable', 'is_sellable', 'is_bundle']
+    required_fields = string_fields + ['cost'] + integer_fields
+    true_values = {'true', '1', 'yes'}
+    false_values = {'false', '0', 'no', ''}
+
+    def __init__(self):
+        self.max_lengths = {field: Item._meta.get_field(field).max_length
+                            for field in self.string_fields}
+        self.tag_choices = {key for key, _ in Item.TAG_CHOICES}
+        cost_field = Item._meta.get_field('cost')
+        self.cost_quantum = Decimal(1).scaleb(-cost_field.decimal_places)
+        self.cost_limit = Decimal(10) ** (cost_field.max_digits - cost_field.decimal_places)
+
+    def validate(self, row, partial=False):
+        """
+        Return `(data, errors)` for one row. Missing fields are only an error
+        when `partial` is False, i.e. when the row creates a new item.
+        """
+        data, errors = {}, {}
+        for field in self.string_fields + ['cost'] + self.integer_fields + self.boolean_fields:
+            value = row.get(field)
+            if value is None or (value == '' and field not in self.boolean_fields):
+                if field in self.required_fields and not partial:
+                    errors[field] = ['This field is required.']
+                continue
+            try:
+                data[field] = self.clean(field, value)
+            except ValueError as error:
+                errors[field] = [str(error)]
+        return data, errors
+
+    def clean(self, field, value):
+        if field in self.string_fields:
+            value = str(value).strip()
+            if not value:
+                raise ValueError('This field may not be blank.')
+            if len(value) > self.max_lengths[field]:
+                raise ValueError(
+                    f'Ensure this field has no more than {self.max_lengths[field]} characters.')
+            if field == 'tags' and value not in self.tag_choices:
+                raise ValueError(f'"{value}" is not a valid choice.')
+            return value
+        if field == 'cost':
+            try:
+                cost = Decimal(str(value))
+            except InvalidOperation:
+                raise ValueError('A valid number is required.')
+            if not cost.is_finite() or abs(cost) >= self.cost_limit:
+                raise ValueError('A valid number is required.')
+            if cost != cost.quantize(self.cost_quantum):
+                raise ValueError('Too many decimal places.')
+            return cost.quantize(self.cost_quantum)
+        if field in self.integer_fields:
+            if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+                raise ValueError('A valid integer is required.')
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                raise ValueError('A valid integer is required.')
+        if isinstance(value, bool):
+            return value
+        value = str(value).strip().lower()
+        if value in self.true_values:
+            return True
+        if value in self.false_values:
+            return False
+        raise ValueError('Must be a valid boolean.')
@@ -0,0 +1,56 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import bom, ledger, stats
+from . import cache as item_cache
+from .authentication import forget_user
+from .models import Item
+from .search import FIELD_WEIGHTS as SEARCH_FIELDS, index_items
+
+
+@receiver(post_save, sender=Item)
+def item_saved(sender, instance, created=False, raw=False, **kwargs):
+    item_cache.invalidate(instance.user_id_id)
+    if raw:
+        return
+
+    loaded = getattr(instance, '_loaded_values', None)
+    if created or loaded is None or any(
+            getattr(instance, field) != loaded.get(field) for field in SEARCH_FIELDS):
+        index_items([instance])
+
+    if created:
+        stats.apply_changes(instance.user_id_id, added=[stats.item_values(instance)])
+    else:
+        before = stats.item_values(instance, loaded=True)
+        if before is None:
+            # The old values are unknown, so recount this user from scratch.
+            stats.rebuild(instance.user_id_id)
+        else:
+            stats.apply_changes(instance.user_id_id, removed=[before],
+                                added=[stats.item_values(instance)])
+
+    ledger.record_saves([instance], created=created)
+
+    if loaded is None or instance.available_stock != loaded.get('available_stock'):
+        bom.invalidate(instance.user_id_id)
+
+    # The saved values are what later saves of this instance should diff against.
+    instance._loaded_values = {
+        field.attname: getattr(instance, field.attname) for field in Item._meta.concrete_fields}
+
+
+@receiver(post_delete, sender=Item)
+def item_deleted(sender, instance, **kwargs):
+    item_cache.invalidate(instance.user_id_id)
+    bom.invalidate(instance.user_id_id)
+    values = stats.item_values(instance, loaded=True) or stats.item_values(instance)
+    stats.apply_changes(instance.user_id_id, removed=[values])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    # Token authentication serves users from the cache.
+    forget_user(instance.pk)
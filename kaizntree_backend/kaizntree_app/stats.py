@@ -0,0 +1,115 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, DecimalField, ExpressionWrapper, F, IntegerField, Sum, When
+
+from .models import InventoryStats, Item
+
+STAT_FIELDS = ['item_count', 'total_stock', 'total_value', 'below_minimum_count']
+SOURCE_FIELDS = ['category', 'in_stock', 'cost', 'minimum_stock']
+
+
+def item_values(item, loaded=False):
+    """
+    The fields the counters depend on, either as currently set on `item` or,
+    with `loaded=True`, as they were read from the database (None if unknown).
+    """
+    if loaded:
+        values = getattr(item, '_loaded_values', None)
+        if values is None or any(field not in values for field in SOURCE_FIELDS):
+            return None
+        return {field: values[field] for field in SOURCE_FIELDS}
+    return {field: getattr(item, field) for field in SOURCE_FIELDS}
+
+
+def contribution(values):
+    in_stock, cost = int(values['in_stock']), Decimal(str(values['cost']))
+    return {
+        'item_count': 1,
+        'total_stock': in_stock,
+        'total_value': cost * in_stock,
+        'below_minimum_count': 1 if in_stock < int(values['minimum_stock']) else 0,
+    }
+
+
+def apply_changes(user_id, removed=(), added=()):
+    """
+    Subtract the `removed` item values and add the `added` ones, issuing one
+    UPDATE per touched category. Call inside the transaction that wrote the
+    items so the counters commit or roll back with them.
+    """
+    deltas = defaultdict(lambda: dict.fromkeys(STAT_FIELDS, 0))
+    for sign, rows in ((-1, removed), (1, added)):
+        for values in rows:
+            delta = deltas[values['category']]
+            for field, amount in contribution(values).items():
+                delta[field] += sign * amount
+
+    for category, delta in deltas.items():
+        if not any(delta.values()):
+            continue
+        updates = {field: F(field) + amount for field, amount in delta.items()}
+        stats = InventoryStats.objects.filter(user_id=user_id, category=category)
+        if stats.update(**updates):
+            continue
+        try:
+            with transaction.atomic():
+                InventoryStats.objects.create(user_id_id=user_id, category=category, **delta)
+        except IntegrityError:
+            # Another writer created the row first; apply on top of theirs.
+            stats.update(**updates)
+
+
+def compute(user_id=None):
+    """Recompute the counters from Item rows, keyed by (user_id, category)."""
+    items = Item.objects.all()
+    if user_id is not None:
+        items = items.filter(user_id=user_id)
+    cost_field = Item._meta.get_field('cost')
+    value = ExpressionWrapper(F('cost') * F('in_stock'), output_field=DecimalField(
+        max_digits=20, decimal_places=cost_field.decimal_places))
+    rows = items.order_by().values('user_id', 'category').annotate(
+        stat_item_count=Count('id'),
+        stat_total_stock=Sum('in_stock'),
+        stat_total_value=Sum(value),
+        stat_below_minimum_count=Sum(Case(
+            When(in_stock__lt=F('minimum_stock'), then=1), default=0, output_field=IntegerField())),
+    )
+    return {
+        (row['user_id'], row['category']): {field: row[f'stat_{field}'] or 0 for field in STAT_FIELDS}
+        for row in rows
+    }
+
+
+def stored(user_id=None):
+    stats = InventoryStats.objects.exclude(item_count=0)
+    if user_id is not None:
+        stats = stats.filter(user_id=user_id)
+    return {
+        (row['user_id_id'], row['category']): {field: row[field] for field in STAT_FIELDS}
+        for row in stats.values('user_id_id', 'category', *STAT_FIELDS)
+    }
+
+
+def rebuild(user_id=None):
+    expected = compute(user_id)
+    with transaction.atomic():
+        stats = InventoryStats.objects.all()
+        if user_id is not None:
+            stats = stats.filter(user_id=user_id)
+        stats.delete()
+        InventoryStats.objects.bulk_create(
+            (InventoryStats(user_id_id=user, category=category, **values)
+             for (user, category), values in expected.items()),
+            batch_size=1000,
+        )
+    return len(expected)
+
+
+def verify(user_id=None):
+    """Return `(key, stored, expected)` for every (user, category) that differs."""
+    expected, actual = compute(user_id), stored(user_id)
+    return [(key, actual.get(key), expected.get(key))
+            for key in sorted(set(expected) | set(actual), key=str)
+            if actual.get(key) != expected.get(key)]
@@ -0,0 +1,108 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from kaizntree_app.models import InventoryStats, Item, StockMovement
+
+
+class StockAdjustmentTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('item-adjust')
+        self.user = User.objects.create_user(
+            username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.items = [Item.objects.create(
+            user_id=self.user, SKU=f'SKU{index}', name=f'Item {index}', category='Category 1',
+            tags='OL', cost='2.00', in_stock=10, available_stock=10, minimum_stock=5, desired_stock=8)
+            for index in range(3)]
+
+    def test_adjusts_many_items_in_one_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, [
+                {'id': self.items[0].id, 'in_stock': -3, 'available_stock': -3, 'channel': 'ET'},
+                {'id': self.items[1].id, 'in_stock': 4},
+                {'id': self.items[0].id, 'available_stock': -1},
+            ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['items'], [
+            {'id': self.items[0].id, 'in_stock': 7, 'available_stock': 6, 'version': 2},
+            {'id': self.items[1].id, 'in_stock': 14, 'available_stock': 10, 'version': 2},
+        ])
+        updates = [query['sql'] for query in queries.captured_queries
+                   if query['sql'].startswith('UPDATE "kaizntree_app_item"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"in_stock" = ("kaizntree_app_item"."in_stock" + CASE', updates[0])
+
+        self.items[0].refresh_from_db()
+        self.assertEqual((self.items[0].in_stock, self.items[0].available_stock), (7, 6))
+        self.assertEqual(StockMovement.objects.filter(reference='').exclude(channel='').count(), 1)
+        self.assertEqual(InventoryStats.objects.get(user_id=self.user).total_stock, 31)
+
+    def test_matching_version_is_applied(self):
+        response = self.client.post(self.url, [
+            {'id': self.items[0].id, 'in_stock': -1, 'version': 1},
+            {'id': self.items[1].id, 'in_stock': -1},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['version'] for item in response.data['items']], [2, 2])
+
+    def test_stale_version_conflicts_and_writes_nothing(self):
+        self.items[0].name = 'Renamed'
+        self.items[0].save()
+        response = self.client.post(self.url, [
+            {'id': self.items[1].id, 'in_stock': -1},
+            {'id': self.items[0].id, 'in_stock': -1, 'version': 1},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+        self.assertEqual(response.data['errors'][0]['version'], 2)
+        self.assertEqual(Item.objects.get(id=self.items[1].id).in_stock, 10)
+
+    def test_if_match_header(self):
+        response = self.client.post(self.url, [{'id': self.items[0].id, 'in_stock': 2}],
+                                    format='json', HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['ETag'], '"2"')
+
+        response = self.client.post(self.url, [{'id': self.items[0].id, 'in_stock': 2}],
+                                    format='json', HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        response = self.client.post(self.url, [
+            {'id': self.items[0].id, 'in_stock': 2}, {'id': self.items[1].id, 'in_stock': 2},
+        ], format='json', HTTP_IF_MATCH='"2"')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unknown_items_and_invalid_rows(self):
+        other = User.objects.create_user(username='other', password='testpassword')
+        foreign = Item.objects.create(
+            user_id=other, SKU='F', name='Foreign', cost='1.00',
+            in_stock=1, available_stock=1, minimum_stock=0, desired_stock=0)
+        response = self.client.post(self.url, [
+            {'id': self.items[0].id, 'in_stock': 1},
+            {'id': foreign.id, 'in_stock': 1},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+        self.assertEqual(Item.objects.get(id=self.items[0].id).in_stock, 10)
+
+        response = self.client.post(self.url, [{'id': self.items[0].id}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_writes_bump_version(self):
+        item = self.items[0]
+        item.name = 'Renamed'
+        item.save(update_fields=['name'])
+        self.assertEqual(Item.objects.get(id=item.id).version, 2)
+
+        response = self.client.put(reverse('item-bulk'), [{'id': item.id, 'category': 'Other'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Item.objects.get(id=item.id).version, 3)
+
+        response = self.client.get(reverse('item-stock'), {'item': item.id})
+        self.assertEqual(response.data['version'], 3)
@@ -0,0 +1,160 @@
+import asyncio
+from contextlib import ExitStack
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from kaizntree_app import cache as item_cache
+from kaizntree_app import lockout
+from kaizntree_app.models import InventoryStats, Item
+
+
+def item_data(index):
+    return {
+        'SKU': f'SKU{index}',
+        'name': f'Item {index}',
+        'category': 'Category 1',
+        'tags': 'OL',
+        'cost': '10.00',
+        'in_stock': 10,
+        'available_stock': 10,
+        'minimum_stock': 5,
+        'desired_stock': 8,
+        'is_assembly': False,
+        'is_component': False,
+        'is_purchaseable': True,
+        'is_sellable': True,
+        'is_bundle': False,
+    }
+
+
+class AsyncItemViewTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('async-item-list')
+        self.user = User.objects.create_user(
+            username='testuser', password='testpassword')
+        for index in range(15):
+            Item.objects.create(user_id=self.user, **item_data(index))
+
+    async def test_requires_login(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    async def test_list_matches_sync_view(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(self.url, {'page': 2, 'category': 'Category 1'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        expected = (await sync_to_async(client.get)(
+            reverse('item-list'), {'page': 2, 'category': 'Category 1'})).json()
+        data = response.json()
+        self.assertEqual(data['results'], expected['results'])
+        self.assertEqual(data['count'], 15)
+        self.assertIsNone(data['next'])
+        self.assertTrue(data['previous'].endswith('/async/item/?category=Category+1'))
+
+        response = await self.async_client.get(self.url, {'page': 2, 'category': 'Category 1'},
+                                               headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_invalid_page_and_cursor(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(self.url, {'page': 3})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = await self.async_client.get(self.url, {'pagination': 'cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_fields(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(self.url, {'fields': 'SKU,cost', 'page_size': 1})
+        self.assertEqual(response.json()['results'], [{'SKU': 'SKU0', 'cost': '10.00'}])
+        response = await self.async_client.get(self.url, {'fields': 'SKU,secret'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_create_update_delete(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(self.url, item_data(100), content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        item_id = response.json()['id']
+
+        response = await self.async_client.put(self.url, {'id': item_id, 'in_stock': 3},
+                                               content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['in_stock'], 3)
+
+        response = await self.async_client.delete(self.url, {'id': item_id}, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(await Item.objects.filter(id=item_id).aexists())
+        stats = await InventoryStats.objects.aget(user_id=self.user, category='Category 1')
+        self.assertEqual(stats.item_count, 15)
+
+    async def test_other_users_item_is_not_found(self):
+        other = await User.objects.acreate(username='other')
+        await self.async_client.aforce_login(other)
+        item = await Item.objects.afirst()
+        response = await self.async_client.put(self.url, {'id': item.id, 'in_stock': 3},
+                                               content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_login_and_logout(self):
+        response = await self.async_client.post(reverse('async-login'), {
+            'username': 'testuser', 'password': 'wrong'
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = await self.async_client.post(reverse('async-login'), {
+            'username': 'testuser', 'password': 'testpassword'
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['user']['username'], 'testuser')
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = await self.async_client.post(reverse('async-logout'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    async def test_cache_is_not_called_on_the_event_loop(self):
+        on_loop = []
+
+        def checked(func):
+            def call(*args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                    on_loop.append(func.__name__)
+                except RuntimeError:
+                    pass
+                return func(*args, **kwargs)
+            return call
+
+        with ExitStack() as stack:
+            for module, names in ((item_cache, ('get_response_data', 'set_response_data', 'bump_generation')),
+                                  (lockout, ('reserve_attempt', 'release_attempt'))):
+                for name in names:
+                    stack.enter_context(mock.patch.object(module, name, checked(getattr(module, name))))
+            for password in ('wrong', 'testpassword'):
+                await self.async_client.post(reverse('async-login'), {
+                    'username': 'testuser', 'password': password
+                }, content_type='application/json')
+            await self.async_client.get(self.url)
+            response = await self.async_client.post(self.url, item_data(100), content_type='application/json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(on_loop, [])
+
+    async def test_signup(self):
+        response = await self.async_client.post(reverse('async-signup'), {
+            'username': 'newuser', 'password': 'newpassword', 'email': 'new@example.com'
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(await User.objects.filter(username='newuser').aexists())
@@ -0,0 +1,65 @@
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from kaizntree_app.authentication import TOKEN_SALT, create_token
+from kaizntree_app.testing import QueryBudgetMixin
+
+
+class SignedTokenAuthenticationTestCase(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.list_url = reverse('item-list')
+        self.user = User.objects.create_user(
+            username='testuser', password='testpassword')
+
+    def get_token(self):
+        response = self.client.post(reverse('login'), {
+            'username': 'testuser', 'password': 'testpassword', 'token': True
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['token']
+
+    def test_login_returns_token_without_session(self):
+        token = self.get_token()
+        self.assertNotIn('sessionid', response_cookies(self.client))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_invalid_tokens_are_rejected(self):
+        expired = signing.dumps({'u': self.user.pk, 'h': 'stale'}, salt=TOKEN_SALT)
+        for token in ('garbage', expired):
+            self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+            response = self.client.get(self.list_url)
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_password_change_revokes_tokens(self):
+        token = create_token(self.user)
+        self.user.set_password('newpassword')
+        self.user.save()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_token_auth_runs_no_queries(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.get_token()}')
+        self.client.get(self.list_url)
+        # The user is cached and so is the page: nothing left to query.
+        response = self.assertQueryBudget(0, self.client.get, self.list_url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_cached_session_auth_runs_one_query(self):
+        self.client.login(username='testuser', password='testpassword')
+        self.client.get(self.list_url)
+        # The session comes from the cache; only the user is loaded.
+        self.assertQueryBudget(1, self.client.get, self.list_url)
+
+
+def response_cookies(client):
+    return {key for key, morsel in client.cookies.items() if morsel.value}
@@ -0,0 +1,166 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from kaizntree_app import bom
+from kaizntree_app.models import Item, ItemComponent
+
+
+class BuildableTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.screw = self.create_item('screw', 40)
+        self.panel = self.create_item('panel', 7)
+        self.shelf = self.create_item('shelf', 1, is_assembly=True)
+        self.bookcase = self.create_item('bookcase', 0, is_assembly=True)
+        # shelf = 4 screws + 1 panel; bookcase = 3 shelves + 2 panels + 8 screws
+        self.add(self.shelf, self.screw, 4)
+        self.add(self.shelf, self.panel, 1)
+        self.add(self.bookcase, self.shelf, 3)
+        self.add(self.bookcase, self.panel, 2)
+        self.add(self.bookcase, self.screw, 8)
+
+    def create_item(self, name, available_stock, is_assembly=False):
+        return Item.objects.create(
+            user_id=self.user, SKU=name.upper(), name=name, category='Furniture', tags='OL',
+            cost='1.00', in_stock=available_stock, available_stock=available_stock,
+            minimum_stock=0, desired_stock=0, is_assembly=is_assembly, is_component=not is_assembly,
+            is_purchaseable=True, is_sellable=True, is_bundle=False)
+
+    def add(self, assembly, component, quantity):
+        return ItemComponent.objects.create(
+            assembly_id=assembly, component_id=component, quantity=quantity)
+
+    def test_topological_order_puts_components_first(self):
+        order = bom.topological_order(bom.get_edges(self.user.id))
+        self.assertLess(order.index(self.screw.id), order.index(self.shelf.id))
+        self.assertLess(order.index(self.shelf.id), order.index(self.bookcase.id))
+
+    def test_buildable_rolls_up_sub_assemblies(self):
+        # shelves: min(40 // 4, 7 // 1) = 7, plus 1 in stock = 8 available
+        # bookcases: min(8 // 3, 7 // 2, 40 // 8) = 2
+        self.assertEqual(bom.get_buildable(self.user.id), {self.shelf.id: 7, self.bookcase.id: 2})
+
+    def test_buildable_is_memoized_until_stock_changes(self):
+        bom.get_buildable(self.user.id)
+        with self.assertNumQueries(0):
+            bom.get_buildable(self.user.id)
+
+        self.screw.available_stock = 4
+        self.screw.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(bom.get_buildable(self.user.id), {self.shelf.id: 1, self.bookcase.id: 0})
+
+    def test_memo_from_before_commit_is_discarded(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.screw.available_stock = 4
+            self.screw.save()
+            # A concurrent request memoizes while the write is uncommitted.
+            bom.get_buildable(self.user.id)
+        with self.assertNumQueries(1):
+            bom.get_buildable(self.user.id)
+
+    def test_memo_expires(self):
+        with self.settings(BOM_CACHE_TIMEOUT=0):
+            bom.get_buildable(self.user.id)
+            with self.assertNumQueries(1):
+                bom.get_buildable(self.user.id)
+
+    def test_unrelated_save_keeps_memoized_result(self):
+        bom.get_buildable(self.user.id)
+        self.screw.name = 'wood screw'
+        self.screw.save()
+        with self.assertNumQueries(0):
+            bom.get_buildable(self.user.id)
+
+    def test_bulk_update_invalidates(self):
+        bom.get_buildable(self.user.id)
+        response = self.client.put(reverse('item-bulk'), [
+            {'id': self.panel.id, 'available_stock': 100},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(bom.get_buildable(self.user.id), {self.shelf.id: 10, self.bookcase.id: 3})
+
+    def test_would_create_cycle(self):
+        edges = bom.get_edges(self.user.id)
+        self.assertTrue(bom.would_create_cycle(edges, self.screw.id, self.bookcase.id))
+        self.assertFalse(bom.would_create_cycle(edges, self.bookcase.id, self.screw.id))
+
+    def test_buildable_endpoint(self):
+        response = self.client.get(reverse('item-buildable'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), [
+            {'id': self.shelf.id, 'SKU': 'SHELF', 'name': 'shelf', 'buildable': 7},
+            {'id': self.bookcase.id, 'SKU': 'BOOKCASE', 'name': 'bookcase', 'buildable': 2},
+        ])
+
+    def test_add_component_rejects_cycles_and_duplicates(self):
+        url = reverse('item-components')
+        response = self.client.post(url, {
+            'assembly_id': self.screw.id, 'component_id': self.bookcase.id, 'quantity': 1
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(url, {
+            'assembly_id': self.shelf.id, 'component_id': self.screw.id, 'quantity': 1
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(url, {
+            'assembly_id': self.shelf.id, 'component_id': self.shelf.id, 'quantity': 1
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_adding_a_component_locks_the_graph(self):
+        glue = self.create_item('glue', 1)
+        self.create_item('unrelated', 1)
+        with transaction.atomic():
+            locked = bom.lock_graph(self.user.id, self.panel.id, glue.id)
+        self.assertEqual(locked, sorted([self.panel.id, glue.id, self.shelf.id, self.bookcase.id]))
+
+        with mock.patch.object(bom, 'lock_graph', wraps=bom.lock_graph) as lock_graph:
+            response = self.client.post(reverse('item-components'), {
+                'assembly_id': self.panel.id, 'component_id': glue.id, 'quantity': 1
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        lock_graph.assert_called_once_with(self.user.id, self.panel.id, glue.id)
+
+    def test_buildable_endpoint_reports_cycles_as_conflict(self):
+        # Left behind by two racing inserts before the graph was locked.
+        self.add(self.screw, self.bookcase, 1)
+        response = self.client.get(reverse('item-buildable'))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.json(), {'error': 'Bill of materials contains a cycle'})
+
+    def test_component_changes_invalidate(self):
+        bom.get_buildable(self.user.id)
+        glue = self.create_item('glue', 1)
+        response = self.client.post(reverse('item-components'), {
+            'assembly_id': self.shelf.id, 'component_id': glue.id, 'quantity': 1
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(bom.get_buildable(self.user.id)[self.shelf.id], 1)
+
+        response = self.client.delete(reverse('item-components'), {'id': response.json()['id']},
+                                      format='json')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(bom.get_buildable(self.user.id)[self.shelf.id], 7)
+
+    def test_other_users_items_are_rejected(self):
+        other = User.objects.create_user(username='other', password='testpassword')
+        self.client.force_authenticate(user=other)
+        response = self.client.post(reverse('item-components'), {
+            'assembly_id': self.shelf.id, 'component_id': self.panel.id, 'quantity': 1
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(reverse('item-buildable')).json(), [])
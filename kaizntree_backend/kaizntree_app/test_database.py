@@ -0,0 +1,112 @@
+import os
+import tempfile
+
+from django.db.backends.signals import connection_created
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase
+
+from kaizntree_project.caches import cache_config
+from kaizntree_project.database import database_config
+
+DEFAULTS = {
+    'ENGINE': 'django.db.backends.mysql',
+    'NAME': 'kaizndb',
+    'HOST': 'db.example.com',
+    'PORT': '3306',
+}
+
+
+class DatabaseConfigTestCase(SimpleTestCase):
+    def test_defaults_are_persistent(self):
+        config = database_config(DEFAULTS, environ={})
+        self.assertEqual(config['ENGINE'], 'django.db.backends.mysql')
+        self.assertEqual(config['HOST'], 'db.example.com')
+        self.assertEqual(config['CONN_MAX_AGE'], 60)
+        self.assertTrue(config['CONN_HEALTH_CHECKS'])
+
+    def test_environment_overrides(self):
+        config = database_config(DEFAULTS, environ={
+            'DB_HOST': 'other.example.com',
+            'DB_CONN_MAX_AGE': 'none',
+            'DB_CONN_HEALTH_CHECKS': 'false',
+        })
+        self.assertEqual(config['HOST'], 'other.example.com')
+        self.assertIsNone(config['CONN_MAX_AGE'])
+        self.assertFalse(config['CONN_HEALTH_CHECKS'])
+
+    def test_asgi_never_persists_connections(self):
+        config = database_config(DEFAULTS, environ={'DJANGO_ASGI': '1', 'DB_CONN_MAX_AGE': 'none'})
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+
+    def test_pool(self):
+        config = database_config(DEFAULTS, environ={'DB_POOL': 'true', 'DB_POOL_SIZE': '20'})
+        self.assertEqual(config['ENGINE'], 'dj_db_conn_pool.backends.mysql')
+        self.assertEqual(config['POOL_OPTIONS']['POOL_SIZE'], 20)
+        self.assertTrue(config['POOL_OPTIONS']['PRE_PING'])
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+
+        with self.assertRaises(ValueError):
+            database_config(DEFAULTS, environ={'DB_ENGINE': 'django.db.backends.sqlite3', 'DB_POOL': 'true'})
+
+
+class PersistentConnectionTestCase(SimpleTestCase):
+    requests = 50
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'db.sqlite3')
+
+    def count_connections(self, environ):
+        """Open connections while serving `requests` requests the way Django does."""
+        config = database_config({}, environ={
+            'DB_ENGINE': 'django.db.backends.sqlite3', 'DB_NAME': self.path, **environ})
+        handler = ConnectionHandler({'default': config})
+        created = []
+
+        def record(sender, connection, **kwargs):
+            if connection is handler['default']:
+                created.append(connection)
+
+        connection_created.connect(record)
+        self.addCleanup(connection_created.disconnect, record)
+        try:
+            for _ in range(self.requests):
+                # request_started and request_finished both run this check.
+                handler['default'].close_if_unusable_or_obsolete()
+                with handler['default'].cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                handler['default'].close_if_unusable_or_obsolete()
+        finally:
+            handler.close_all()
+        return len(created)
+
+    def test_connection_is_reused_across_requests(self):
+        self.assertEqual(self.count_connections({}), 1)
+
+    def test_connection_per_request_without_max_age(self):
+        self.assertEqual(self.count_connections({'DB_CONN_MAX_AGE': '0'}), self.requests)
+
+
+class CacheConfigTestCase(SimpleTestCase):
+    def test_default_is_used_without_cache_url(self):
+        config = cache_config('redis://127.0.0.1:6379/0', environ={})
+        self.assertEqual(config, {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': ['redis://127.0.0.1:6379/0'],
+        })
+
+    def test_shared_backends_from_environment(self):
+        config = cache_config('locmem://', environ={
+            'CACHE_URL': 'redis://cache-1:6379/0,cache-2:6379/0', 'CACHE_KEY_PREFIX': 'kzt'})
+        self.assertEqual(config['LOCATION'], ['redis://cache-1:6379/0', 'redis://cache-2:6379/0'])
+        self.assertEqual(config['KEY_PREFIX'], 'kzt')
+
+        config = cache_config('locmem://', environ={'CACHE_URL': 'memcached://cache-1:11211'})
+        self.assertEqual(config['BACKEND'], 'django.core.cache.backends.memcached.PyMemcacheCache')
+        self.assertEqual(config['LOCATION'], ['cache-1:11211'])
+
+    def test_invalid_urls(self):
+        for url in ('cache-1:6379', 'ftp://cache-1', 'redis://'):
+            with self.assertRaises(ValueError):
+                cache_config('locmem://', environ={'CACHE_URL': url})
@@ -0,0 +1,184 @@
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from kaizntree_app import jobs
+from kaizntree_app.models import Item, ItemSearchToken, Job
+
+
+class JobTestMixin:
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.client = APIClient()
+        self.url = reverse('job')
+        self.user = User.objects.create_user(
+            username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        for index in range(3):
+            Item.objects.create(
+                user_id=self.user, SKU=f'SKU{index}', name=f'Item {index}', category='Category 1',
+                tags='OL', cost='2.00', in_stock=10, available_stock=10, minimum_stock=5, desired_stock=8)
+
+    def run_queued(self):
+        for job_id in jobs.claim(limit=10):
+            jobs.run(job_id)
+
+
+class JobQueueTestCase(JobTestMixin, TestCase):
+    def test_queue_and_follow_a_job(self):
+        ItemSearchToken.objects.all().delete()
+        response = self.client.post(self.url, {'kind': 'reindex'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], Job.QUEUED)
+
+        self.run_queued()
+        response = self.client.get(self.url, {'id': response.data['id']})
+        self.assertEqual(response.data['status'], Job.SUCCEEDED)
+        self.assertEqual((response.data['progress'], response.data['total']), (3, 3))
+        self.assertEqual(response.data['result'], {'items': 3})
+        self.assertTrue(ItemSearchToken.objects.filter(token='item').exists())
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['count'], 1)
+
+    def test_only_requestable_kinds_can_be_queued(self):
+        response = self.client.post(self.url, {'kind': 'import'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_jobs_are_private(self):
+        other = User.objects.create_user(username='other', password='testpassword')
+        job = jobs.enqueue(other, 'rebuild_stats')
+        response = self.client.get(self.url, {'id': job.id})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(self.url).data['count'], 0)
+
+    def test_claim_takes_each_job_once(self):
+        first, second = jobs.enqueue(self.user, 'reindex'), jobs.enqueue(self.user, 'rebuild_stats')
+        self.assertEqual(jobs.claim(), [first.id])
+        self.assertEqual(jobs.claim(limit=5), [second.id])
+        self.assertEqual(jobs.claim(), [])
+        self.assertEqual(Job.objects.get(id=first.id).attempts, 1)
+
+    def test_failures_are_recorded(self):
+        job = jobs.enqueue(self.user, 'export', export_format='xml')
+        self.run_queued()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn('export_format', job.error)
+
+    def test_stale_jobs_are_requeued_then_failed(self):
+        job = jobs.enqueue(self.user, 'reindex')
+        jobs.claim()
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        Job.objects.filter(id=job.id).update(updated=an_hour_ago)
+        self.assertEqual(jobs.requeue_stale(), 1)
+        self.assertEqual(Job.objects.get(id=job.id).status, Job.QUEUED)
+
+        Job.objects.filter(id=job.id).update(status=Job.RUNNING, attempts=3, updated=an_hour_ago)
+        jobs.requeue_stale()
+        self.assertEqual(Job.objects.get(id=job.id).status, Job.FAILED)
+
+    def test_background_export(self):
+        response = self.client.get(reverse('item-export'), {'background': 'true', 'name': 'Item 1'})
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job_id = response.data['id']
+
+        response = self.client.get(reverse('job-result'), {'id': job_id})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.run_queued()
+        self.assertEqual(Job.objects.get(id=job_id).result['rows'], 1)
+        response = self.client.get(reverse('job-result'), {'id': job_id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn('Item 1', lines[1])
+
+    def test_background_import(self):
+        upload = SimpleUploadedFile(
+            'items.ndjson',
+            b'{"SKU": "SKU0", "in_stock": 4}\n{"SKU": "NEW", "name": "New"}\n',
+            content_type='application/x-ndjson')
+        response = self.client.post(reverse('item-import'), {'file': upload, 'background': 'true'},
+                                    format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        self.run_queued()
+        job = Job.objects.get(id=response.data['id'])
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual((job.result['updated'], job.result['failed']), (1, 1))
+        self.assertEqual(job.progress, 2)
+        self.assertEqual(Item.objects.get(SKU='SKU0').in_stock, 4)
+
+
+    def test_requeued_run_leaves_result_and_upload_to_its_replacement(self):
+        upload = SimpleUploadedFile('items.ndjson', b'{"SKU": "SKU0", "in_stock": 4}\n')
+        response = self.client.post(reverse('item-import'), {'file': upload, 'background': 'true'},
+                                    format='multipart')
+        job = Job.objects.get(id=response.data['id'])
+        import_items = jobs.HANDLERS['import']
+
+        def requeued_meanwhile(job, progress):
+            # requeue_stale() and another worker's claim() bump the attempt.
+            Job.objects.filter(id=job.id).update(attempts=F('attempts') + 1)
+            return import_items(job, progress)
+
+        with mock.patch.dict(jobs.HANDLERS, {'import': requeued_meanwhile}):
+            self.run_queued()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.RUNNING)
+        self.assertTrue(default_storage.exists(job.params['file']))
+
+    def test_maintenance_jobs_report_progress(self):
+        for kind in ('rebuild_stats', 'compact_ledger'):
+            job = jobs.enqueue(self.user, kind)
+            with mock.patch.object(jobs.Progress, '__call__', autospec=True,
+                                   side_effect=jobs.Progress.__call__) as progress:
+                self.run_queued()
+            self.assertTrue(progress.called, kind)
+            self.assertEqual(Job.objects.get(id=job.id).status, Job.SUCCEEDED)
+
+
+class JobWorkerTestCase(JobTestMixin, TransactionTestCase):
+    def test_run_jobs_command_drains_the_queue(self):
+        for kind in ('reindex', 'rebuild_stats', 'compact_ledger'):
+            jobs.enqueue(self.user, kind)
+        out = StringIO()
+        # One worker, so the in-memory test database never sees two writers.
+        call_command('run_jobs', '--once', '--workers', '1', '--poll-interval', '5', stdout=out)
+        self.assertIn('Ran 3 jobs', out.getvalue())
+        self.assertEqual(Job.objects.filter(status=Job.SUCCEEDED).count(), 3)
+
+    @override_settings(JOB_STALE_SECONDS=0.2, JOB_HEARTBEAT_SECONDS=0.02)
+    def test_heartbeat_keeps_long_steps_from_being_requeued(self):
+        requeued = []
+
+        def slow(job, progress):
+            time.sleep(0.5)
+            requeued.append(jobs.requeue_stale())
+            return {}
+
+        job = jobs.enqueue(self.user, 'reindex')
+        with mock.patch.dict(jobs.HANDLERS, {'reindex': slow}):
+            self.run_queued()
+        self.assertEqual(requeued, [0])
+        self.assertEqual(Job.objects.get(id=job.id).status, Job.SUCCEEDED)
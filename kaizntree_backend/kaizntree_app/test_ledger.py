@@ -0,0 +1,163 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from kaizntree_app import ledger
+from kaizntree_app.models import InventoryStats, Item, StockMovement, StockSnapshot
+from kaizntree_app.serializers import ItemImportValidator, ItemSerializer
+
+
+class StockLedgerTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('item-movements')
+        self.user = User.objects.create_user(
+            username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.items = [self.create_item(index) for index in range(2)]
+
+    def create_item(self, index):
+        return Item.objects.create(
+            user_id=self.user, SKU=f'SKU{index}', name=f'Item {index}', category='Category 1',
+            tags='OL', cost='2.00', in_stock=10, available_stock=10, minimum_stock=5, desired_stock=8)
+
+    def move(self, item, at, in_stock=0, available_stock=0):
+        return StockMovement.objects.create(
+            item_id=item, user_id=self.user, in_stock_delta=in_stock,
+            available_stock_delta=available_stock, created=at)
+
+    def test_post_movements_adds_deltas(self):
+        response = self.client.post(self.url, [
+            {'item_id': self.items[0].id, 'channel': 'ET', 'in_stock_delta': -3, 'available_stock_delta': -3},
+            {'item_id': self.items[0].id, 'channel': 'SP', 'in_stock_delta': -2, 'available_stock_delta': -2},
+            {'item_id': self.items[1].id, 'channel': 'SQ', 'in_stock_delta': 5},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['items'], [
+            {'id': self.items[0].id, 'in_stock': 5, 'available_stock': 5},
+            {'id': self.items[1].id, 'in_stock': 15, 'available_stock': 10},
+        ])
+        self.items[0].refresh_from_db()
+        self.assertEqual((self.items[0].in_stock, self.items[0].available_stock), (5, 5))
+        stats = InventoryStats.objects.get(user_id=self.user, category='Category 1')
+        self.assertEqual(stats.total_stock, 20)
+        self.assertEqual(stats.below_minimum_count, 0)
+
+    def test_post_is_all_or_nothing(self):
+        other = User.objects.create_user(username='other', password='testpassword')
+        foreign = Item.objects.create(
+            user_id=other, SKU='X', name='Foreign', category='C', tags='OL', cost='1.00',
+            in_stock=1, available_stock=1, minimum_stock=0, desired_stock=0)
+        response = self.client.post(self.url, [
+            {'item_id': self.items[0].id, 'in_stock_delta': 1},
+            {'item_id': foreign.id, 'in_stock_delta': 1},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.items[0].refresh_from_db()
+        self.assertEqual(self.items[0].in_stock, 10)
+
+        response = self.client.post(self.url, [{'item_id': self.items[0].id}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()['errors'][0]['index'], 0)
+
+    def test_saves_are_recorded(self):
+        item = self.items[0]
+        item.in_stock = 7
+        item.save()
+        deltas = list(StockMovement.objects.filter(item_id=item).order_by('id').values_list(
+            'reference', 'in_stock_delta', 'available_stock_delta'))
+        self.assertEqual(deltas, [('opening', 10, 10), ('', -3, 0)])
+
+    def test_movements_cannot_be_changed(self):
+        movement = StockMovement.objects.filter(item_id=self.items[0]).first()
+        movement.in_stock_delta = 100
+        with self.assertRaises(ValueError):
+            movement.save()
+
+    def test_stock_as_of_with_compaction(self):
+        item = self.items[0]
+        start = timezone.now() - timedelta(days=10)
+        StockMovement.objects.filter(item_id=item).update(created=start)
+        for day in range(1, 9):
+            self.move(item, start + timedelta(days=day), in_stock=-1)
+
+        as_of = start + timedelta(days=5, hours=1)
+        self.assertEqual(ledger.stock_as_of(item.id, as_of), (5, 10))
+
+        # Only the first item has movements that old.
+        self.assertEqual(ledger.compact(before=start + timedelta(days=4, hours=1)), 1)
+        # Compacting again with nothing new writes nothing.
+        self.assertEqual(ledger.compact(before=start + timedelta(days=4, hours=1)), 0)
+        snapshot = StockSnapshot.objects.get(item_id=item)
+        self.assertEqual((snapshot.in_stock, snapshot.available_stock), (6, 10))
+
+        # Only the movements after the snapshot are read, and the answer is the same.
+        with self.assertNumQueries(2):
+            self.assertEqual(ledger.stock_as_of(item.id, as_of), (5, 10))
+        self.assertEqual(ledger.stock_as_of(item.id, start + timedelta(days=2, hours=1)), (8, 10))
+
+        call_command('compact_stock_ledger', before=(start + timedelta(days=9)).isoformat(), stdout=StringIO())
+        self.assertEqual(ledger.stock_as_of(item.id, timezone.now()), (2, 10))
+
+    def test_stock_endpoint(self):
+        response = self.client.get(reverse('item-stock'), {'item': self.items[0].id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['in_stock'], 10)
+
+        yesterday = (timezone.now() - timedelta(days=1)).date().isoformat()
+        response = self.client.get(reverse('item-stock'), {'item': self.items[0].id, 'as_of': yesterday})
+        self.assertEqual(response.json()['in_stock'], 0)
+
+        response = self.client.get(reverse('item-stock'), {'item': self.items[0].id, 'as_of': 'soon'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_movements(self):
+        response = self.client.get(self.url, {'item': self.items[1].id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['count'], 1)
+        self.assertEqual(response.json()['results'][0]['reference'], 'opening')
+
+    def test_writes_after_a_concurrent_movement_keep_the_ledger_in_step(self):
+        # The item is read at 10, a channel sells 2 before the write is
+        # applied, and the write sets 15: the ledger must also end at 15.
+        item = self.items[0]
+        self.client.force_login(self.user)
+        writes = {
+            'put': (ItemSerializer, 'is_valid', lambda: self.client.put(
+                reverse('item-list'), {'id': item.id, 'in_stock': 15}, format='json')),
+            'async put': (ItemSerializer, 'is_valid', lambda: self.client.put(
+                reverse('async-item-list'), {'id': item.id, 'in_stock': 15}, format='json')),
+            'bulk put': (ItemSerializer, 'is_valid', lambda: self.client.put(
+                reverse('item-bulk'), [{'id': item.id, 'in_stock': 15}], format='json')),
+            'import': (ItemImportValidator, 'validate', lambda: b''.join(self.client.post(
+                reverse('item-import'),
+                {'file': SimpleUploadedFile('items.ndjson', b'{"SKU": "SKU0", "in_stock": 15}')},
+                format='multipart').streaming_content)),
+        }
+        for name, (cls, method, write) in writes.items():
+            with self.subTest(name):
+                # Back to 10 through the ledger, so it and the column agree.
+                ledger.post_movements(self.user.id, [StockMovement(
+                    item_id_id=item.id, in_stock_delta=10 - Item.objects.get(id=item.id).in_stock)])
+                original, sold = getattr(cls, method), []
+
+                def sell_then_validate(*args, **kwargs):
+                    if not sold:
+                        sold.extend(ledger.post_movements(self.user.id, [StockMovement(
+                            item_id_id=item.id, in_stock_delta=-2, channel='ET')]))
+                    return original(*args, **kwargs)
+
+                with mock.patch.object(cls, method, sell_then_validate):
+                    write()
+                self.assertTrue(sold)
+                self.assertEqual(Item.objects.get(id=item.id).in_stock, 15)
+                self.assertEqual(ledger.stock_as_of(item.id, timezone.now())[0], 15)
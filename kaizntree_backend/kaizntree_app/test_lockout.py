@@ -0,0 +1,98 @@
+from unittest import mock
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from kaizntree_app import lockout
+
+MD5 = 'django.contrib.auth.hashers.MD5PasswordHasher'
+PBKDF2 = 'kaizntree_app.hashers.PBKDF2PasswordHasher'
+
+
+@override_settings(LOGIN_FAILURE_LIMIT=3, LOGIN_IP_FAILURE_LIMIT=5, PASSWORD_HASHERS=[MD5])
+class LoginLockoutTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.login_url = reverse('login')
+        self.user = User.objects.create_user(
+            username='testuser', password='testpassword')
+
+    def login(self, password, username='testuser', ip='10.0.0.1', **headers):
+        return self.client.post(self.login_url, {'username': username, 'password': password},
+                                format='json', REMOTE_ADDR=ip, **headers)
+
+    def test_locked_out_after_failures_without_hashing(self):
+        for _ in range(3):
+            self.assertEqual(self.login('wrong').status_code, status.HTTP_400_BAD_REQUEST)
+
+        with mock.patch('kaizntree_app.views.authenticate') as authenticate:
+            response = self.login('testpassword')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        authenticate.assert_not_called()
+
+    def test_success_resets_username_failures(self):
+        for _ in range(2):
+            self.login('wrong')
+        self.assertEqual(self.login('testpassword').status_code, status.HTTP_200_OK)
+        for _ in range(2):
+            self.login('wrong')
+        self.assertEqual(self.login('testpassword').status_code, status.HTTP_200_OK)
+
+    def test_address_limit_spans_usernames(self):
+        for index in range(5):
+            self.login('wrong', username=f'guess{index}')
+        response = self.login('testpassword')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # Other addresses are unaffected.
+        self.assertEqual(self.login('testpassword', ip='10.0.0.2').status_code, status.HTTP_200_OK)
+
+    def test_concurrent_attempts_cannot_exceed_the_limit(self):
+        # Every attempt is counted before its password is checked, so
+        # attempts that have not failed yet still use up the limit.
+        allowed = [lockout.reserve_attempt('testuser', '10.0.0.1') for _ in range(5)]
+        self.assertEqual(allowed, [True, True, True, False, False])
+        self.assertEqual(self.login('testpassword').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(TRUSTED_PROXIES=['10.1.0.0/16'])
+    def test_clients_behind_trusted_proxies_are_told_apart(self):
+        for index in range(5):
+            self.login('wrong', username=f'guess{index}', ip='10.1.0.5', HTTP_X_FORWARDED_FOR='1.2.3.4, 10.1.0.9')
+        self.assertEqual(self.login('testpassword', ip='10.1.0.5', HTTP_X_FORWARDED_FOR='5.6.7.8').status_code,
+                         status.HTTP_200_OK)
+        # A forged entry left of the proxy's own does not move the client.
+        response = self.login('testpassword', ip='10.1.0.5', HTTP_X_FORWARDED_FOR='9.9.9.9, 1.2.3.4')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # Headers from untrusted peers are ignored.
+        self.assertEqual(self.login('testpassword', ip='10.2.0.1', HTTP_X_FORWARDED_FOR='1.2.3.4').status_code,
+                         status.HTTP_200_OK)
+
+
+@override_settings(PASSWORD_HASHERS=[PBKDF2, MD5])
+class PasswordRehashTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create(
+            username='testuser', password=make_password('testpassword', hasher='md5'))
+
+    def login(self):
+        response = self.client.post(reverse('login'), {
+            'username': 'testuser', 'password': 'testpassword'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        return self.user.password
+
+    @override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+    def test_login_upgrades_to_configured_hasher(self):
+        self.assertTrue(self.login().startswith('pbkdf2_sha256$1000$'))
+
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            self.assertTrue(self.login().startswith('pbkdf2_sha256$2000$'))
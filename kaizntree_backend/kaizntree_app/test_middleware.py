@@ -0,0 +1,174 @@
+import gzip
+import json
+from unittest import skipIf
+
+from asgiref.sync import iscoroutinefunction
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.test.client import AsyncClientHandler
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from kaizntree_app.middleware import CompressionMiddleware, InstrumentationMiddleware, brotli
+from kaizntree_app.models import Item
+from kaizntree_app.testing import QueryBudgetMixin
+
+
+def create_item(user, index):
+    return Item.objects.create(
+        user_id=user,
+        SKU=f'SKU{index}',
+        name=f'Item {index}',
+        category='Category 1',
+        tags='OL',
+        cost='10.00',
+        in_stock=10,
+        available_stock=10,
+        minimum_stock=5,
+        desired_stock=8,
+    )
+
+
+@override_settings(API_INSTRUMENTATION=True)
+class InstrumentationMiddlewareTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.list_url = reverse('item-list')
+        self.user = User.objects.create_user(
+            username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        create_item(self.user, 1)
+
+    def test_server_timing_header(self):
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="3 queries"')
+        self.assertIn('serialize;dur=', timing)
+        self.assertIn('render;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    def test_structured_log(self):
+        with self.assertLogs('kaizntree_app.instrumentation', level='INFO') as logs:
+            self.client.get(self.list_url)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'item-list')
+        self.assertEqual(record['queries'], 3)
+        self.assertEqual(record['status'], 200)
+        self.assertIn('db_ms', record)
+
+    async def test_async_views_are_measured_without_a_thread_hop(self):
+        await self.async_client.aforce_login(self.user)
+        with self.assertLogs('kaizntree_app.instrumentation', level='INFO') as logs:
+            response = await self.async_client.get(reverse('async-item-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'async-item-list')
+        self.assertGreater(record['queries'], 0)
+
+        middleware = InstrumentationMiddleware(AsyncClientHandler().get_response_async)
+        self.assertTrue(iscoroutinefunction(middleware))
+
+    @override_settings(API_INSTRUMENTATION=False)
+    def test_disabled_by_setting(self):
+        response = APIClient().get(self.list_url)
+        self.assertFalse(response.has_header('Server-Timing'))
+
+
+class CompressionMiddlewareTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.list_url = reverse('item-list')
+        self.user = User.objects.create_user(
+            username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        for index in range(20):
+            create_item(self.user, index)
+
+    def test_large_responses_are_compressed(self):
+        plain = self.client.get(self.list_url, {'page_size': 20})
+        response = self.client.get(self.list_url, {'page_size': 20}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'].count('Accept-Encoding'), 1)
+        self.assertLess(len(response.content), len(plain.content))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertTrue(response['ETag'].startswith('W/"'))
+
+        # The weak ETag still revalidates.
+        response = self.client.get(self.list_url, {'page_size': 20}, HTTP_ACCEPT_ENCODING='gzip',
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_small_responses_are_left_alone(self):
+        response = self.client.get(self.list_url, {'page_size': 1}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        with override_settings(COMPRESSION_MIN_SIZE=10):
+            response = self.client.get(self.list_url, {'page_size': 1}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_negotiation(self):
+        self.assertIsNone(CompressionMiddleware.negotiate(''))
+        self.assertIsNone(CompressionMiddleware.negotiate('gzip;q=0, identity'))
+        self.assertEqual(CompressionMiddleware.negotiate('deflate, *;q=0.5'), 'br' if brotli else 'gzip')
+        self.assertEqual(CompressionMiddleware.negotiate('br;q=0.5, gzip'), 'gzip')
+        self.assertEqual(CompressionMiddleware.negotiate('gzip, br'), 'br' if brotli else 'gzip')
+
+    @skipIf(brotli is None, 'brotli is not installed')
+    def test_brotli(self):
+        plain = self.client.get(self.list_url, {'page_size': 20})
+        response = self.client.get(self.list_url, {'page_size': 20}, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), plain.content)
+
+    def test_streamed_export_is_compressed(self):
+        response = self.client.get(reverse('item-export'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        content = gzip.decompress(b''.join(response.streaming_content)).decode()
+        self.assertEqual(len(content.splitlines()), 21)
+
+
+class ItemQueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.items = [create_item(self.user, index) for index in range(20)]
+
+    def test_list(self):
+        # count, ETag aggregate, page
+        self.assertQueryBudget(3, self.client.get, reverse('item-list'), {'page_size': 20})
+
+    def test_list_cursor_without_count(self):
+        self.assertQueryBudget(2, self.client.get, reverse('item-list'),
+                               {'pagination': 'cursor', 'skip_count': 'true'})
+
+    def test_create(self):
+        data = {'SKU': 'SKU99', 'name': 'Item 99', 'category': 'Category 1', 'tags': 'OL',
+                'cost': '1.00', 'in_stock': 1, 'available_stock': 1, 'minimum_stock': 1,
+                'desired_stock': 1, 'is_assembly': False, 'is_component': False,
+                'is_purchaseable': False, 'is_sellable': False, 'is_bundle': False}
+        # user, unique name check, savepoint, insert, search token delete and
+        # insert, inventory stats update, opening stock movement, release
+        self.assertQueryBudget(9, self.client.post, reverse('item-list'), data, format='json')
+
+    def test_update(self):
+        # lookup, savepoint, locked re-read, UPDATE, inventory stats update,
+        # stock movement, release
+        self.assertQueryBudget(7, self.client.put, reverse('item-list'),
+                               {'id': self.items[0].id, 'in_stock': 1}, format='json')
+
+    def test_bulk_update_does_not_grow_with_rows(self):
+        data = [{'id': item.id, 'in_stock': 1} for item in self.items]
+        # lookup, savepoint, locked re-read, one UPDATE, one stats UPDATE per
+        # category, one stock movement INSERT, release
+        self.assertQueryBudget(7, self.client.put, reverse('item-bulk'), data, format='json')
+
+    def test_export(self):
+        self.assertQueryBudget(1, self.client.get, reverse('item-export'))
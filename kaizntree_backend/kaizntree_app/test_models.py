@@ -0,0 +1,58 @@
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.db.models import Q
+from django.utils import timezone
+from kaizntree_app.models import Item
+from kaizntree_app.views import ItemFilterMixin
+
+
+class ItemIndexTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='testuser', password='testpassword')
+
+    def assertUsesIndex(self, queryset, index_name, ordered=False):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+        if ordered:
+            # The index also yields the (created, id) order: no sort step
+            # (SQLite's temporary B-tree, MySQL's filesort).
+            self.assertNotIn('TEMP B-TREE', plan)
+            self.assertNotIn('filesort', plan)
+
+    def test_list_uses_created_index(self):
+        queryset = Item.objects.filter(
+            user_id=self.user.id).order_by('created', 'id')
+        self.assertUsesIndex(queryset, 'item_user_created_idx')
+
+    def test_sku_filter_uses_sku_index(self):
+        queryset = Item.objects.filter(user_id=self.user.id, SKU='SKU1')
+        self.assertUsesIndex(queryset, 'item_user_sku_idx')
+
+    def filtered(self, **params):
+        # The queryset ItemListApiView pages through, ordered on (created, id).
+        return ItemFilterMixin().filter_params(self.user.id, params)
+
+    def test_category_filter_uses_category_index(self):
+        queryset = self.filtered(category='Category 1')
+        self.assertEqual(queryset.query.order_by, ('created', 'id'))
+        self.assertUsesIndex(queryset, 'item_user_category_idx', ordered=True)
+
+    def test_tags_filter_uses_tags_index(self):
+        queryset = self.filtered(tags='OL')
+        self.assertUsesIndex(queryset, 'item_user_tags_idx', ordered=True)
+
+    def test_keyset_page_uses_filter_index(self):
+        # The WHERE clause KeysetPagination adds for the page after a cursor.
+        created = timezone.now()
+        for params, index_name in (({'category': 'Category 1'}, 'item_user_category_idx'),
+                                   ({'tags': 'OL'}, 'item_user_tags_idx')):
+            queryset = self.filtered(**params).filter(
+                Q(created__gt=created) | Q(created=created, id__gt=1))
+            self.assertUsesIndex(queryset, index_name, ordered=True)
+
+    def test_cost_range_uses_cost_index(self):
+        queryset = Item.objects.filter(
+            user_id=self.user.id, cost__gte=5, cost__lte=10)
+        self.assertUsesIndex(queryset, 'item_user_cost_idx')
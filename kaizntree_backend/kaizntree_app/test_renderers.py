@@ -0,0 +1,51 @@
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from uuid import UUID
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from kaizntree_app.models import Item
+from kaizntree_app.renderers import ORJSONRenderer
+
+
+class ORJSONRendererTestCase(TestCase):
+    def assertRendersLikeStdlib(self, data, accepted_media_type=None):
+        self.assertEqual(ORJSONRenderer().render(data, accepted_media_type),
+                         JSONRenderer().render(data, accepted_media_type))
+
+    def test_matches_json_renderer(self):
+        self.assertRendersLikeStdlib({
+            'cost': Decimal('12.50'),
+            'created': datetime(2024, 3, 1, 12, 30, 5, 123456, tzinfo=dt_timezone.utc),
+            'naive': datetime(2024, 3, 1, 12, 30),
+            'offset': datetime(2024, 3, 1, 12, 30, tzinfo=dt_timezone(timedelta(hours=5))),
+            'date': date(2024, 3, 1),
+            'time': time(8, 15, 30, 250),
+            'duration': timedelta(minutes=3),
+            'uuid': UUID('12345678123456781234567812345678'),
+            'lazy': gettext_lazy('Item not found'),
+            'unicode': 'Café \u2028 \u2029 ✓',
+            'nested': [{1: None, 'flag': True}, (1.5, -2)],
+            'big': 2 ** 70,
+        })
+
+    def test_indent_and_none(self):
+        self.assertRendersLikeStdlib({'a': [1, 2]}, 'application/json; indent=4')
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_item_list_is_byte_identical(self):
+        user = User.objects.create_user(username='testuser', password='testpassword')
+        for index in range(3):
+            Item.objects.create(
+                user_id=user, SKU=f'SKU{index}', name=f'Item {index}', category='Category 1',
+                tags='OL', cost='10.25', in_stock=10, available_stock=10, minimum_stock=5, desired_stock=8)
+        client = APIClient()
+        client.force_authenticate(user=user)
+        response = client.get(reverse('item-list'))
+        self.assertIsInstance(response.accepted_renderer, ORJSONRenderer)
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
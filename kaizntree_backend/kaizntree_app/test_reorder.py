@@ -0,0 +1,72 @@
+import csv
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from kaizntree_app.models import Item
+from kaizntree_app.reorder import build_plan
+
+
+class ReorderPlanTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        # below minimum: needs 8 - 2 = 6 units at 10.99
+        self.create_item(1, '10.99', available_stock=2)
+        # below minimum: needs 8 - 4 = 4 units at 0.10
+        self.create_item(2, '0.10', available_stock=4)
+        # at minimum: nothing to order
+        self.create_item(3, '5.00', available_stock=5)
+        # below minimum but not purchaseable
+        self.create_item(4, '1.00', available_stock=0, is_purchaseable=False)
+        # below minimum with desired stock already met
+        self.create_item(5, '1.00', available_stock=1, desired_stock=1)
+
+    def create_item(self, index, cost, available_stock, desired_stock=8, is_purchaseable=True):
+        return Item.objects.create(
+            user_id=self.user,
+            SKU=f'SKU{index}',
+            name=f'Item {index}',
+            category='Category 1',
+            tags='OL',
+            cost=cost,
+            in_stock=available_stock,
+            available_stock=available_stock,
+            minimum_stock=min(5, desired_stock + 1),
+            desired_stock=desired_stock,
+            is_purchaseable=is_purchaseable,
+        )
+
+    def test_build_plan(self):
+        plan = build_plan(self.user.id)
+        self.assertEqual(plan['total_items'], 2)
+        self.assertEqual(plan['total_quantity'], 10)
+        self.assertEqual(plan['total_cost'], '66.34')
+        self.assertEqual([(line['SKU'], line['quantity'], line['purchase_cost']) for line in plan['lines']],
+                         [('SKU1', 6, '65.94'), ('SKU2', 4, '0.40')])
+
+    def test_small_chunks_and_limit(self):
+        plan = build_plan(self.user.id, limit=1, purchaseable_only=False, chunk_size=1)
+        self.assertEqual(plan['total_items'], 3)
+        self.assertEqual(plan['total_cost'], '74.34')
+        self.assertEqual([line['SKU'] for line in plan['lines']], ['SKU1'])
+
+    def test_endpoint(self):
+        response = self.client.get(reverse('item-reorder'), {'limit': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_items'], 2)
+        self.assertEqual(len(response.data['lines']), 1)
+
+    def test_management_command(self):
+        output = StringIO()
+        call_command('reorder_plan', str(self.user.id), stdout=output, stderr=StringIO())
+        rows = list(csv.DictReader(StringIO(output.getvalue())))
+        self.assertEqual([row['SKU'] for row in rows], ['SKU1', 'SKU2'])
+        self.assertEqual(rows[0]['purchase_cost'], '65.94')
@@ -0,0 +1,161 @@
+import time
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.test.client import AsyncClientHandler
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from django.contrib.sessions.models import Session
+
+from kaizntree_app.authentication import create_token
+from kaizntree_app.middleware import ReadReplicaMiddleware
+from kaizntree_app.models import Item
+from kaizntree_app.routers import current_replica, use_replica
+
+REPLICA = 'replica'
+
+
+def create_item(user, name, in_stock=10):
+    return Item(
+        user_id=user,
+        SKU=name.upper(),
+        name=name,
+        category='Category 1',
+        tags='OL',
+        cost='10.00',
+        in_stock=in_stock,
+        available_stock=in_stock,
+        minimum_stock=5,
+        desired_stock=8,
+    )
+
+
+@override_settings(READ_REPLICAS=[REPLICA], READ_REPLICA_LAG_SECONDS=5)
+class ReadReplicaTestCase(TestCase):
+    """
+    A second SQLite database stands in for the replica. It holds different
+    rows from the primary, so each response shows where it was read from.
+    """
+    databases = {'default', REPLICA}
+
+    @classmethod
+    def setUpClass(cls):
+        connections.settings[REPLICA] = connections.configure_settings({
+            'default': connections.settings['default'],
+            REPLICA: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'},
+        })[REPLICA]
+        call_command('migrate', database=REPLICA, verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='testuser', password='testpassword')
+        User.objects.using(REPLICA).create(id=self.user.id, username='testuser')
+        self.client.login(username='testuser', password='testpassword')
+        create_item(self.user, 'primary item').save()
+        # bulk_create skips the signals, which would update the primary.
+        Item.objects.using(REPLICA).bulk_create([create_item(self.user, 'replica item', in_stock=99)])
+
+    def list_names(self):
+        response = self.client.get(reverse('item-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['name'] for item in response.json()['results']]
+
+    def test_list_reads_from_replica(self):
+        self.assertEqual(self.list_names(), ['replica item'])
+        self.assertIsNone(current_replica())
+
+    def test_export_and_summary_read_from_replica(self):
+        response = self.client.get(reverse('item-export'), {'export_format': 'ndjson'})
+        self.assertIn(b'replica item', b''.join(response.streaming_content))
+
+        response = self.client.get(reverse('item-summary'))
+        self.assertEqual(response.json()['total']['in_stock'], 99)
+
+    def test_writes_go_to_primary_and_pin_the_session(self):
+        response = self.client.post(reverse('item-list'), {
+            'SKU': 'NEW', 'name': 'new item', 'category': 'Category 1', 'tags': 'OL',
+            'cost': '1.00', 'in_stock': 1, 'available_stock': 1, 'minimum_stock': 0,
+            'desired_stock': 0, 'is_assembly': False, 'is_component': False,
+            'is_purchaseable': True, 'is_sellable': True, 'is_bundle': False,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Item.objects.using('default').filter(name='new item').exists())
+        self.assertFalse(Item.objects.using(REPLICA).filter(name='new item').exists())
+
+        # Read-your-writes: this session now reads from the primary.
+        self.assertEqual(self.list_names(), ['primary item', 'new item'])
+
+        # Once the lag window has passed it goes back to the replica.
+        session = self.client.session
+        session[ReadReplicaMiddleware.recent_write_key] = time.time() - 10
+        session.save()
+        cache.clear()
+        self.assertEqual(self.list_names(), ['replica item'])
+
+    def test_token_writes_pin_the_user_without_a_session(self):
+        self.client.logout()
+        Session.objects.all().delete()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {create_token(self.user)}')
+        self.assertEqual(self.list_names(), ['replica item'])
+
+        item = Item.objects.get(name='primary item')
+        response = self.client.put(reverse('item-list'), {'id': item.id, 'in_stock': 3}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('sessionid', response.cookies)
+        self.assertFalse(Session.objects.exists())
+
+        self.assertEqual(self.list_names(), ['primary item'])
+        # Once the marker expires it goes back to the replica.
+        cache.clear()
+        self.assertEqual(self.list_names(), ['replica item'])
+
+    async def test_async_list_reads_from_replica_on_the_event_loop(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('async-item-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['name'] for item in response.json()['results']], ['replica item'])
+        self.assertIsNone(current_replica())
+
+        middleware = ReadReplicaMiddleware(AsyncClientHandler().get_response_async)
+        self.assertTrue(iscoroutinefunction(middleware))
+
+    async def test_async_writes_pin_the_session(self):
+        await self.async_client.aforce_login(self.user)
+        item = await Item.objects.aget(name='primary item')
+        response = await self.async_client.put(reverse('async-item-list'), {'id': item.id, 'in_stock': 3},
+                                               content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = await self.async_client.get(reverse('async-item-list'))
+        self.assertEqual([item['name'] for item in response.json()['results']], ['primary item'])
+
+    def test_other_endpoints_read_from_primary(self):
+        response = self.client.get(reverse('item-stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['total']['total_stock'], 10)
+
+    def test_router_only_routes_app_models(self):
+        with use_replica(REPLICA):
+            self.assertEqual(Item.objects.all().db, REPLICA)
+            self.assertEqual(User.objects.all().db, 'default')
+        self.assertEqual(Item.objects.all().db, 'default')
+
+    def test_replica_responses_are_cached_briefly(self):
+        self.list_names()
+        key = next(key for key in cache._cache if ':item-list:' in key and ':generation:' not in key)
+        self.assertLessEqual(cache._expire_info[key] - time.time(), 5)
@@ -1,6 +1,9 @@
 from django.test import TestCase
 from django.contrib.auth.models import User
-from kaizntree_app.serializers import UserSerializer, LoginSerializer, SignupSerializer, ItemSerializer
+from kaizntree_app.models import Item
+from kaizntree_app.serializers import UserSerializer, LoginSerializer, SignupSerializer, ItemSerializer, ItemImportValidator, ItemReadSerializer
+from rest_framework.renderers import JSONRenderer
+from decimal import Decimal
 
 
 class UserSerializerTestCase(TestCase):
@@ -139,3 +142,74 @@ class ItemSerializerTestCase(TestCase):
         self.serializer.is_valid()
         self.assertEqual(self.serializer.Meta.extra_kwargs,
                          {'user_id': {'write_only': True}})
+
+
+class ItemImportValidatorTestCase(TestCase):
+    def setUp(self):
+        self.validator = ItemImportValidator()
+        self.row = {
+            'SKU': 'ABC123',
+            'name': 'Test Item',
+            'category': 'Test Category',
+            'tags': 'OL',
+            'cost': '10.99',
+            'in_stock': '1000',
+            'available_stock': '500',
+            'minimum_stock': '100',
+            'desired_stock': '500',
+            'is_assembly': 'false',
+            'is_component': 'true',
+        }
+
+    def test_valid_row(self):
+        data, errors = self.validator.validate(self.row)
+        self.assertEqual(errors, {})
+        self.assertEqual(data['cost'], Decimal('10.99'))
+        self.assertEqual(data['in_stock'], 1000)
+        self.assertTrue(data['is_component'])
+        self.assertFalse(data['is_assembly'])
+
+    def test_invalid_values(self):
+        self.row.update({'cost': '1000.00', 'in_stock': 'many',
+                        'tags': 'XX', 'is_bundle': 'maybe'})
+        _, errors = self.validator.validate(self.row)
+        self.assertEqual(set(errors), {'cost', 'in_stock', 'tags', 'is_bundle'})
+
+    def test_missing_fields_only_fail_without_partial(self):
+        row = {'SKU': 'ABC123', 'in_stock': 4}
+        _, errors = self.validator.validate(row)
+        self.assertIn('name', errors)
+        data, errors = self.validator.validate(row, partial=True)
+        self.assertEqual(errors, {})
+        self.assertEqual(data, {'SKU': 'ABC123', 'in_stock': 4})
+
+
+class ItemReadSerializerTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='testuser', password='12345')
+        for index, cost in enumerate(['0.00', '0.10', '10.99', '999.99', '-5.50']):
+            Item.objects.create(
+                user_id=user,
+                SKU=f'SKU{index}',
+                name=f'Item {index}',
+                category='Category 1',
+                tags='OL',
+                cost=cost,
+                in_stock=index,
+                available_stock=index,
+                minimum_stock=1,
+                desired_stock=2,
+                is_bundle=bool(index % 2),
+            )
+
+    def test_renders_identical_json(self):
+        items = Item.objects.order_by('id')
+        expected = JSONRenderer().render(ItemSerializer(items, many=True).data)
+        rows = list(items.values(*ItemReadSerializer.fields()))
+        actual = JSONRenderer().render(ItemReadSerializer(rows).data)
+        self.assertEqual(actual, expected)
+
+    def test_fields_exclude_write_only(self):
+        self.assertNotIn('user_id', ItemReadSerializer.fields())
+        self.assertEqual(ItemReadSerializer.fields()[0], 'id')
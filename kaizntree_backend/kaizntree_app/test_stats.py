@@ -0,0 +1,136 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from kaizntree_app import ledger, stats
+from kaizntree_app.models import InventoryStats, Item, StockMovement
+from kaizntree_app.serializers import ItemImportValidator, ItemSerializer
+
+
+class InventoryStatsTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.list_url = reverse('item-list')
+        self.bulk_url = reverse('item-bulk')
+        self.user = User.objects.create_user(
+            username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+
+    def item_data(self, index, category='Category 1', cost='10.00', in_stock=10):
+        return {
+            'SKU': f'SKU{index}',
+            'name': f'Item {index}',
+            'category': category,
+            'tags': 'OL',
+            'cost': cost,
+            'in_stock': in_stock,
+            'available_stock': in_stock,
+            'minimum_stock': 5,
+            'desired_stock': 8,
+            'is_assembly': False,
+            'is_component': False,
+            'is_purchaseable': True,
+            'is_sellable': True,
+            'is_bundle': False
+        }
+
+    def assertStatsMatchItems(self):
+        self.assertEqual(stats.verify(self.user.id), [])
+
+    def test_single_writes_keep_counters_in_sync(self):
+        response = self.client.post(self.list_url, self.item_data(1), format='json')
+        self.client.post(self.list_url, self.item_data(2, 'Category 2', '2.50', 3), format='json')
+        self.assertStatsMatchItems()
+
+        row = InventoryStats.objects.get(user_id=self.user, category='Category 2')
+        self.assertEqual(row.item_count, 1)
+        self.assertEqual(row.total_stock, 3)
+        self.assertEqual(str(row.total_value), '7.50')
+        self.assertEqual(row.below_minimum_count, 1)
+
+        item_id = response.data['id']
+        self.client.put(self.list_url, {'id': item_id, 'category': 'Category 2', 'in_stock': 1},
+                        format='json')
+        self.assertStatsMatchItems()
+
+        self.client.delete(self.list_url, {'id': item_id}, format='json')
+        self.assertStatsMatchItems()
+        self.assertEqual(InventoryStats.objects.get(
+            user_id=self.user, category='Category 1').item_count, 0)
+
+    def test_bulk_writes_keep_counters_in_sync(self):
+        data = [self.item_data(i, f'Category {i % 2}') for i in range(4)]
+        response = self.client.post(self.bulk_url, data, format='json')
+        self.assertStatsMatchItems()
+
+        ids = [item['id'] for item in response.data]
+        self.client.put(self.bulk_url, [{'id': ids[0], 'in_stock': 0, 'cost': '1.00'},
+                                        {'id': ids[1], 'category': 'Category 0'}], format='json')
+        self.assertStatsMatchItems()
+
+        self.client.delete(self.bulk_url, {'ids': ids[:3]}, format='json')
+        self.assertStatsMatchItems()
+
+    def sell_during(self, cls, method, item_id):
+        """Patch `cls.method` so a channel sells 2 of the item while a write is being validated."""
+        original = getattr(cls, method)
+
+        def sell_then_validate(*args, **kwargs):
+            if not StockMovement.objects.filter(channel='ET').exists():
+                ledger.post_movements(self.user.id, [StockMovement(
+                    item_id_id=item_id, in_stock_delta=-2, channel='ET')])
+            return original(*args, **kwargs)
+        return mock.patch.object(cls, method, sell_then_validate)
+
+    def test_writes_diff_against_rows_changed_since_validation(self):
+        item_id = self.client.post(self.list_url, self.item_data(1), format='json').data['id']
+        writes = [
+            (ItemSerializer, 'is_valid',
+             lambda: self.client.put(self.list_url, {'id': item_id, 'in_stock': 15}, format='json')),
+            (ItemSerializer, 'is_valid',
+             lambda: self.client.put(self.bulk_url, [{'id': item_id, 'in_stock': 15}], format='json')),
+            (ItemImportValidator, 'validate',
+             lambda: self.client.post(reverse('item-import'), {'file': SimpleUploadedFile(
+                 'items.ndjson', b'{"SKU": "SKU1", "in_stock": 15}\n')}, format='multipart')),
+        ]
+        for cls, method, write in writes:
+            with self.subTest(cls=cls.__name__):
+                Item.objects.filter(id=item_id).update(in_stock=10)
+                stats.rebuild(self.user.id)
+                StockMovement.objects.filter(channel='ET').delete()
+                with self.sell_during(cls, method, item_id):
+                    response = write()
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                self.assertEqual(Item.objects.get(id=item_id).in_stock, 15)
+                self.assertStatsMatchItems()
+
+    def test_stats_endpoint(self):
+        self.client.post(self.bulk_url, [self.item_data(1), self.item_data(2, 'Category 2')],
+                         format='json')
+        response = self.client.get(reverse('item-stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total'], {
+            'item_count': 2, 'total_stock': 20, 'total_value': '200.00', 'below_minimum_count': 0})
+        self.assertEqual([row['category'] for row in response.data['by_category']],
+                         ['Category 1', 'Category 2'])
+
+    def test_management_command_verifies_and_rebuilds(self):
+        self.client.post(self.list_url, self.item_data(1), format='json')
+        Item.objects.filter(user_id=self.user).update(in_stock=1)
+
+        with self.assertRaises(CommandError):
+            call_command('inventory_stats', 'verify', stdout=StringIO())
+
+        call_command('inventory_stats', 'rebuild', stdout=StringIO())
+        output = StringIO()
+        call_command('inventory_stats', 'verify', stdout=output)
+        self.assertIn('match', output.getvalue())
+        self.assertEqual(InventoryStats.objects.get(user_id=self.user).below_minimum_count, 1)
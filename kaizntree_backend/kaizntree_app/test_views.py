@@ -1,9 +1,18 @@
+import json
+from unittest import mock
+from django.db import DatabaseError
 from django.test import TestCase, Client
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
-from .models import Item
+from .models import InventoryStats, Item, StockMovement
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from kaizntree_app import cache as item_cache
+from kaizntree_app.views import ItemExportApiView, ItemImportApiView
 
 
 class SignupApiViewTestCase(TestCase):
@@ -370,3 +379,612 @@ class ItemListApiViewTestCase(TestCase):
         response = self.client.delete(self.list_url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(Item.objects.filter(id=item.id).exists())
+
+
+class ItemListCursorPaginationTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.list_url = reverse('item-list')
+        self.user = User.objects.create_user(
+            username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        for i in range(5):
+            Item.objects.create(
+                user_id=self.user,
+                SKU=f'SKU{i}',
+                name=f'Item {i}',
+                category='Category 1',
+                tags='OL',
+                cost='10.00',
+                in_stock=10,
+                available_stock=10,
+                minimum_stock=5,
+                desired_stock=8,
+            )
+
+    def test_default_is_page_number_pagination(self):
+        response = self.client.get(self.list_url, {'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 5)
+        self.assertIn('page=2', response.data['next'])
+
+    def test_cursor_pagination_walks_forward_and_back(self):
+        response = self.client.get(
+            self.list_url, {'pagination': 'cursor', 'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 5)
+        self.assertIsNone(response.data['previous'])
+        self.assertEqual([item['SKU'] for item in response.data['results']],
+                         ['SKU0', 'SKU1'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([item['SKU'] for item in response.data['results']],
+                         ['SKU2', 'SKU3'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([item['SKU'] for item in response.data['results']],
+                         ['SKU4'])
+        self.assertIsNone(response.data['next'])
+
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([item['SKU'] for item in response.data['results']],
+                         ['SKU2', 'SKU3'])
+
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([item['SKU'] for item in response.data['results']],
+                         ['SKU0', 'SKU1'])
+        self.assertIsNone(response.data['previous'])
+
+    def test_cursor_pagination_skip_count(self):
+        response = self.client.get(
+            self.list_url, {'pagination': 'cursor', 'skip_count': 'true'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', response.data)
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.list_url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_fields_narrow_query_and_output(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.list_url, {'fields': 'name,id, SKU,in_stock'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0],
+                         {'id': Item.objects.get(SKU='SKU0').id, 'SKU': 'SKU0', 'name': 'Item 0', 'in_stock': 10})
+        page_query = queries.captured_queries[-1]['sql']
+        self.assertNotIn('"cost"', page_query)
+        self.assertIn('"in_stock"', page_query)
+
+    def test_fields_with_cursor_pagination(self):
+        response = self.client.get(
+            self.list_url, {'pagination': 'cursor', 'page_size': 2, 'fields': 'SKU,cost'})
+        self.assertEqual(response.data['results'], [{'SKU': 'SKU0', 'cost': '10.00'},
+                                                    {'SKU': 'SKU1', 'cost': '10.00'}])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([item['SKU'] for item in response.data['results']], ['SKU2', 'SKU3'])
+
+    def test_unknown_fields_are_rejected(self):
+        for fields in ('id,password', 'user_id', ''):
+            response = self.client.get(self.list_url, {'fields': fields})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('fields', response.data)
+
+
+class ItemBulkApiViewTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.bulk_url = reverse('item-bulk')
+        self.user = User.objects.create_user(
+            username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+
+    def item_data(self, index):
+        return {
+            'SKU': f'SKU{index}',
+            'name': f'Item {index}',
+            'category': 'Category 1',
+            'tags': 'OL',
+            'cost': '10.00',
+            'in_stock': 10,
+            'available_stock': 10,
+            'minimum_stock': 5,
+            'desired_stock': 8,
+            'is_assembly': False,
+            'is_component': True,
+            'is_purchaseable': True,
+            'is_sellable': True,
+            'is_bundle': False
+        }
+
+    def create_item(self, index):
+        return Item.objects.create(user_id=self.user, **self.item_data(index))
+
+    def test_bulk_create(self):
+        data = [self.item_data(i) for i in range(3)]
+        response = self.client.post(self.bulk_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([item['SKU'] for item in response.data],
+                         ['SKU0', 'SKU1', 'SKU2'])
+        self.assertTrue(all(item['id'] for item in response.data))
+        self.assertEqual(Item.objects.filter(user_id=self.user).count(), 3)
+
+    def test_bulk_create_reports_row_errors(self):
+        invalid = self.item_data(1)
+        invalid['cost'] = 'invalid_cost'
+        data = [self.item_data(0), invalid]
+        response = self.client.post(self.bulk_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+        self.assertIn('cost', response.data['errors'][0]['errors'])
+        self.assertFalse(Item.objects.exists())
+
+    def test_bulk_create_rolls_back_duplicate_names(self):
+        data = [self.item_data(0), self.item_data(0)]
+        response = self.client.post(self.bulk_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Item.objects.exists())
+
+    def test_bulk_update(self):
+        item1, item2 = self.create_item(1), self.create_item(2)
+        data = [
+            {'id': item1.id, 'in_stock': 3},
+            {'id': item2.id, 'name': 'Renamed', 'cost': '15.00'},
+        ]
+        response = self.client.put(self.bulk_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        item1.refresh_from_db()
+        item2.refresh_from_db()
+        self.assertEqual(item1.in_stock, 3)
+        self.assertEqual(item2.name, 'Renamed')
+        self.assertEqual(str(item2.cost), '15.00')
+
+    def test_bulk_update_unknown_item(self):
+        item = self.create_item(1)
+        other_user = User.objects.create_user(
+            username='otheruser', password='testpassword')
+        other_item = Item.objects.create(
+            user_id=other_user, **self.item_data(2))
+        data = [
+            {'id': item.id, 'in_stock': 3},
+            {'id': other_item.id, 'in_stock': 3},
+        ]
+        response = self.client.put(self.bulk_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+        item.refresh_from_db()
+        self.assertEqual(item.in_stock, 10)
+
+    def test_bulk_update_rejects_repeated_items(self):
+        item = self.create_item(1)
+        data = [{'id': item.id, 'in_stock': 20}, {'id': item.id, 'in_stock': 30}]
+        response = self.client.put(self.bulk_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'], [
+            {'index': 1, 'errors': {'id': ['Duplicate item in batch.']}}])
+
+        item.refresh_from_db()
+        self.assertEqual((item.in_stock, item.version), (10, 1))
+        stats = InventoryStats.objects.get(user_id=self.user)
+        self.assertEqual((stats.total_stock, str(stats.total_value)), (10, '100.00'))
+        self.assertEqual(list(StockMovement.objects.filter(item_id=item).values_list(
+            'in_stock_delta', flat=True)), [10])
+
+    def test_bulk_delete(self):
+        item1, item2 = self.create_item(1), self.create_item(2)
+        data = {'ids': [item1.id, item2.id, 999]}
+        response = self.client.delete(self.bulk_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['deleted'], 2)
+        self.assertEqual(response.data['not_found'], [999])
+        self.assertFalse(Item.objects.exists())
+
+
+class ItemExportApiViewTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.export_url = reverse('item-export')
+        self.user = User.objects.create_user(
+            username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        for i, category in enumerate(['Category 1', 'Category 2', 'Category 1']):
+            Item.objects.create(
+                user_id=self.user,
+                SKU=f'SKU{i}',
+                name=f'Item {i}',
+                category=category,
+                tags='OL',
+                cost='10.00',
+                in_stock=10,
+                available_stock=10,
+                minimum_stock=5,
+                desired_stock=8,
+            )
+
+    def test_export_csv(self):
+        response = self.client.get(self.export_url, {'category': 'Category 1'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith('id,SKU,name,category'))
+        self.assertIn('SKU0', lines[1])
+        self.assertIn('SKU2', lines[2])
+
+    def test_export_ndjson(self):
+        response = self.client.get(
+            self.export_url, {'export_format': 'ndjson'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row['SKU'] for row in rows], ['SKU0', 'SKU1', 'SKU2'])
+        self.assertEqual(rows[0]['cost'], '10.00')
+        self.assertNotIn('user_id', rows[0])
+
+    def test_export_reads_in_keyset_pages(self):
+        Item.objects.filter(user_id=self.user).update(created=Item.objects.first().created)
+        with mock.patch.object(ItemExportApiView, 'chunk_size', 2), \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.export_url, {'export_format': 'ndjson'})
+            rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['SKU'] for row in rows], ['SKU0', 'SKU1', 'SKU2'])
+        pages = [query['sql'] for query in queries.captured_queries if 'LIMIT 2' in query['sql']]
+        self.assertEqual(len(pages), 2)
+
+    def test_export_invalid_format(self):
+        response = self.client.get(
+            self.export_url, {'export_format': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ItemImportApiViewTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.import_url = reverse('item-import')
+        self.user = User.objects.create_user(
+            username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+
+    def upload(self, name, content, **data):
+        upload = SimpleUploadedFile(name, content.encode())
+        response = self.client.post(
+            self.import_url, {'file': upload, **data}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        return [json.loads(line) for line in lines]
+
+    def test_import_csv(self):
+        content = (
+            'SKU,name,category,tags,cost,in_stock,available_stock,minimum_stock,desired_stock,is_sellable\n'
+            'SKU1,Item 1,Category 1,OL,10.00,10,10,5,8,true\n'
+            'SKU2,Item 2,Category 1,SQ,20.50,5,5,2,4,false\n'
+        )
+        events = self.upload('items.csv', content)
+        self.assertEqual(events[-1], {'event': 'done', 'rows': 2,
+                         'created': 2, 'updated': 0, 'failed': 0})
+        item = Item.objects.get(user_id=self.user, SKU='SKU2')
+        self.assertEqual(str(item.cost), '20.50')
+        self.assertFalse(item.is_sellable)
+
+    def test_import_upserts_on_sku(self):
+        Item.objects.create(
+            user_id=self.user,
+            SKU='SKU1',
+            name='Item 1',
+            category='Category 1',
+            tags='OL',
+            cost='10.00',
+            in_stock=10,
+            available_stock=10,
+            minimum_stock=5,
+            desired_stock=8,
+        )
+        content = '\n'.join([
+            json.dumps({'SKU': 'SKU1', 'in_stock': 3}),
+            json.dumps({'SKU': 'SKU2', 'name': 'Item 2', 'category': 'Category 1', 'tags': 'OL',
+                        'cost': 5, 'in_stock': 1, 'available_stock': 1,
+                        'minimum_stock': 1, 'desired_stock': 1}),
+        ])
+        events = self.upload('items.ndjson', content)
+        self.assertEqual(events[-1]['created'], 1)
+        self.assertEqual(events[-1]['updated'], 1)
+        self.assertEqual(Item.objects.get(SKU='SKU1').in_stock, 3)
+        self.assertEqual(Item.objects.filter(user_id=self.user).count(), 2)
+
+    def test_import_reports_row_errors(self):
+        content = '\n'.join([
+            json.dumps({'SKU': 'SKU1', 'name': 'Item 1', 'category': 'Category 1', 'tags': 'XX',
+                        'cost': '1.999', 'in_stock': 1, 'available_stock': 1,
+                        'minimum_stock': 1, 'desired_stock': 1}),
+            'not json',
+            json.dumps({'SKU': 'SKU3'}),
+        ])
+        events = self.upload('items.txt', content, import_format='ndjson')
+        errors = events[0]['errors']
+        self.assertEqual([error['row'] for error in errors], [1, 2, 3])
+        self.assertIn('tags', errors[0]['errors'])
+        self.assertIn('cost', errors[0]['errors'])
+        self.assertIn('name', errors[2]['errors'])
+        self.assertEqual(events[-1]['failed'], 3)
+        self.assertFalse(Item.objects.exists())
+
+    def test_import_rejects_bad_uploads_before_streaming(self):
+        for name, content in [('items.csv', b'SKU,name\nSKU1,Caf\xe9\n'),
+                              ('items.csv', b'name,cost\nItem 1,1.00\n'),
+                              ('items.csv', b'')]:
+            response = self.client.post(
+                self.import_url, {'file': SimpleUploadedFile(name, content)}, format='multipart')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('error', response.data)
+        self.assertFalse(Item.objects.exists())
+
+    def test_import_reports_chunk_errors_in_the_stream(self):
+        content = '\n'.join(json.dumps({'SKU': f'SKU{index}', 'name': f'Item {index}', 'category': 'Category 1',
+                                         'tags': 'OL', 'cost': 1, 'in_stock': 1, 'available_stock': 1,
+                                         'minimum_stock': 1, 'desired_stock': 1})
+                            for index in range(3))
+        upsert_chunk = ItemImportApiView.upsert_chunk
+        calls = []
+
+        def fail_second_chunk(view, *args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise DatabaseError('connection lost')
+            return upsert_chunk(view, *args)
+
+        with mock.patch.object(ItemImportApiView, 'chunk_size', 2), \
+                mock.patch.object(ItemImportApiView, 'upsert_chunk', fail_second_chunk):
+            events = self.upload('items.ndjson', content)
+        self.assertEqual([event['event'] for event in events], ['progress', 'error'])
+        self.assertEqual(events[-1]['rows'], 2)
+        self.assertIn('connection lost', events[-1]['error'])
+        self.assertEqual(Item.objects.count(), 2)
+
+
+class ItemListCacheTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.list_url = reverse('item-list')
+        self.user = User.objects.create_user(
+            username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.item = self.create_item(self.user, 1)
+
+    def create_item(self, user, index):
+        return Item.objects.create(
+            user_id=user,
+            SKU=f'SKU{index}',
+            name=f'Item {index}',
+            category='Category 1',
+            tags='OL',
+            cost='10.00',
+            in_stock=10,
+            available_stock=10,
+            minimum_stock=5,
+            desired_stock=8,
+        )
+
+    def test_repeated_get_is_served_from_cache(self):
+        response = self.client.get(self.list_url, {'category': 'Category 1'})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                self.list_url, {'category': 'Category 1'})
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(item_cache.get_stats(), {'hits': 1, 'misses': 1})
+
+    def test_writes_invalidate_cache(self):
+        self.client.get(self.list_url)
+        self.client.put(
+            self.list_url, {'id': self.item.id, 'in_stock': 3}, format='json')
+        response = self.client.get(self.list_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['in_stock'], 3)
+
+        Item.objects.filter(id=self.item.id).first().delete()
+        response = self.client.get(self.list_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'], [])
+
+    def test_listing_cached_before_commit_is_discarded(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.in_stock = 3
+            self.item.save()
+            # A concurrent request caches the listing while the write is uncommitted.
+            self.client.get(self.list_url)
+        response = self.client.get(self.list_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_cache_is_per_user(self):
+        self.client.get(self.list_url)
+        other_user = User.objects.create_user(
+            username='otheruser', password='testpassword')
+        self.client.force_authenticate(user=other_user)
+        response = self.client.get(self.list_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'], [])
+
+
+class ItemListETagTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.list_url = reverse('item-list')
+        self.user = User.objects.create_user(
+            username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.item = Item.objects.create(
+            user_id=self.user,
+            SKU='SKU1',
+            name='Item 1',
+            category='Category 1',
+            tags='OL',
+            cost='10.00',
+            in_stock=10,
+            available_stock=10,
+            minimum_stock=5,
+            desired_stock=8,
+        )
+
+    def test_matching_etag_returns_not_modified(self):
+        response = self.client.get(self.list_url)
+        etag = response['ETag']
+        cache.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response.content, b'')
+
+    def test_cached_response_carries_etag(self):
+        etag = self.client.get(self.list_url)['ETag']
+        response = self.client.get(self.list_url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response['ETag'], etag)
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_changes_with_filters_and_writes(self):
+        etag = self.client.get(self.list_url)['ETag']
+        self.assertNotEqual(
+            self.client.get(self.list_url, {'category': 'Category 1'})['ETag'], etag)
+
+        self.client.put(
+            self.list_url, {'id': self.item.id, 'in_stock': 3}, format='json')
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class ItemSearchTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.list_url = reverse('item-list')
+        self.user = User.objects.create_user(
+            username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.create_item('W-100', 'Blue Widget', 'Hardware')
+        self.create_item('G-200', 'Blue Gadget', 'Widgets')
+        self.create_item('W-300', 'Red Widget', 'Hardware')
+
+    def create_item(self, sku, name, category):
+        return Item.objects.create(
+            user_id=self.user,
+            SKU=sku,
+            name=name,
+            category=category,
+            tags='OL',
+            cost='10.00',
+            in_stock=10,
+            available_stock=10,
+            minimum_stock=5,
+            desired_stock=8,
+        )
+
+    def search(self, query, **params):
+        response = self.client.get(self.list_url, {'search': query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['name'] for item in response.data['results']]
+
+    def test_prefix_match_ranks_name_above_category(self):
+        self.assertEqual(self.search('widg'),
+                         ['Blue Widget', 'Red Widget', 'Blue Gadget'])
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.search('blue WID'), ['Blue Widget', 'Blue Gadget'])
+        self.assertEqual(self.search('blue widget hardware'), ['Blue Widget'])
+        self.assertEqual(self.search('green'), [])
+
+    def test_sku_search_combines_with_filters(self):
+        self.assertEqual(self.search('w', category='Hardware'),
+                         ['Blue Widget', 'Red Widget'])
+        self.assertEqual(self.search('g 200'), ['Blue Gadget'])
+
+    def test_search_is_scoped_to_user(self):
+        other_user = User.objects.create_user(
+            username='otheruser', password='testpassword')
+        self.client.force_authenticate(user=other_user)
+        self.assertEqual(self.search('widget'), [])
+
+    def test_index_follows_updates_and_bulk_writes(self):
+        item = Item.objects.get(name='Red Widget')
+        self.client.put(self.list_url, {'id': item.id, 'name': 'Red Sprocket'}, format='json')
+        self.assertEqual(self.search('sprock'), ['Red Sprocket'])
+
+        data = [{
+            'SKU': 'S-400', 'name': 'Green Sprocket', 'category': 'Hardware', 'tags': 'OL',
+            'cost': '1.00', 'in_stock': 1, 'available_stock': 1, 'minimum_stock': 1,
+            'desired_stock': 1,
+        }]
+        self.client.post(reverse('item-bulk'), data, format='json')
+        self.assertEqual(self.search('sprocket'), ['Red Sprocket', 'Green Sprocket'])
+
+
+class ItemSummaryApiViewTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.summary_url = reverse('item-summary')
+        self.user = User.objects.create_user(
+            username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.create_item(1, 'Category 1', 'OL', '10.00', 4, is_sellable=True)
+        self.create_item(2, 'Category 1', 'SQ', '2.50', 10, is_bundle=True)
+        self.create_item(3, 'Category 2', 'OL', '1.25', 7, is_sellable=True)
+
+    def create_item(self, index, category, tags, cost, in_stock, **flags):
+        return Item.objects.create(
+            user_id=self.user,
+            SKU=f'SKU{index}',
+            name=f'Item {index}',
+            category=category,
+            tags=tags,
+            cost=cost,
+            in_stock=in_stock,
+            available_stock=in_stock,
+            minimum_stock=5,
+            desired_stock=8,
+            **flags
+        )
+
+    def test_summary(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.summary_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total'], {
+            'items': 3,
+            'in_stock': 21,
+            'below_minimum_stock': 1,
+            'below_desired_stock': 2,
+            'inventory_value': '73.75',
+        })
+        self.assertEqual(response.data['by_category'], [
+            {'category': 'Category 1', 'items': 2, 'inventory_value': '65.00'},
+            {'category': 'Category 2', 'items': 1, 'inventory_value': '8.75'},
+        ])
+        self.assertEqual(response.data['by_tags'], [
+            {'tags': 'OL', 'items': 2, 'inventory_value': '48.75'},
+            {'tags': 'SQ', 'items': 1, 'inventory_value': '25.00'},
+        ])
+        self.assertEqual(response.data['flags']['is_sellable'], 2)
+        self.assertEqual(response.data['flags']['is_bundle'], 1)
+        self.assertEqual(response.data['flags']['is_assembly'], 0)
+
+    def test_summary_uses_filters(self):
+        response = self.client.get(self.summary_url, {'category': 'Category 2'})
+        self.assertEqual(response.data['total']['items'], 1)
+        self.assertEqual(response.data['total']['inventory_value'], '8.75')
+        response = self.client.get(self.summary_url, {'search': 'sku1'})
+        self.assertEqual(response.data['total']['items'], 1)
+
+    def test_summary_is_cached_until_items_change(self):
+        self.client.get(self.summary_url)
+        with self.assertNumQueries(0):
+            self.client.get(self.summary_url)
+        self.create_item(4, 'Category 2', 'OL', '1.00', 1)
+        response = self.client.get(self.summary_url)
+        self.assertEqual(response.data['total']['items'], 4)
@@ -0,0 +1,23 @@
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """
+    TestCase mixin for pinning how many SQL queries an endpoint may run.
+
+        response = self.assertQueryBudget(3, self.client.get, self.list_url)
+    """
+
+    def assertQueryBudget(self, budget, request, *args, using=DEFAULT_DB_ALIAS, **kwargs):
+        with CaptureQueriesContext(connections[using]) as context:
+            response = request(*args, **kwargs)
+            # Streaming responses run their queries while being consumed.
+            if getattr(response, 'streaming', False):
+                response.streaming_content = [b''.join(response.streaming_content)]
+        executed = len(context.captured_queries)
+        if executed > budget:
+            queries = '\n'.join(
+                f'{index}. {query["sql"]}' for index, query in enumerate(context.captured_queries, start=1))
+            self.fail(f'{executed} queries executed, budget is {budget}\n{queries}')
+        return response
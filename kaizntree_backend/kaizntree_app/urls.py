@@ -1,10 +1,29 @@
 from django.urls import path
 from .views import (
     ItemListApiView,
+    ItemBulkApiView,
+    ItemExportApiView,
+    ItemImportApiView,
+    ItemSummaryApiView,
+    InventoryStatsApiView,
+    ReorderPlanApiView,
+    ItemComponentApiView,
+    BuildableApiView,
+    StockMovementApiView,
+    StockAdjustmentApiView,
+    StockLevelApiView,
+    JobApiView,
+    JobResultApiView,
     LoginApiView,
     SignupApiView,
     LogoutApiView,
 )
+from .async_views import (
+    AsyncItemListView,
+    AsyncLoginView,
+    AsyncSignupView,
+    AsyncLogoutView,
+)
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from rest_framework import permissions
@@ -24,6 +43,23 @@ urlpatterns = [
     path('logout/', LogoutApiView.as_view(), name='logout'),
     path('signup/', SignupApiView.as_view(), name='signup'),
     path('item/', ItemListApiView.as_view(), name='item-list'),
+    path('item/bulk/', ItemBulkApiView.as_view(), name='item-bulk'),
+    path('item/export/', ItemExportApiView.as_view(), name='item-export'),
+    path('item/import/', ItemImportApiView.as_view(), name='item-import'),
+    path('item/summary/', ItemSummaryApiView.as_view(), name='item-summary'),
+    path('item/stats/', InventoryStatsApiView.as_view(), name='item-stats'),
+    path('item/reorder/', ReorderPlanApiView.as_view(), name='item-reorder'),
+    path('item/components/', ItemComponentApiView.as_view(), name='item-components'),
+    path('item/buildable/', BuildableApiView.as_view(), name='item-buildable'),
+    path('item/movements/', StockMovementApiView.as_view(), name='item-movements'),
+    path('item/adjust/', StockAdjustmentApiView.as_view(), name='item-adjust'),
+    path('item/stock/', StockLevelApiView.as_view(), name='item-stock'),
+    path('job/', JobApiView.as_view(), name='job'),
+    path('job/result/', JobResultApiView.as_view(), name='job-result'),
+    path('async/login/', AsyncLoginView.as_view(), name='async-login'),
+    path('async/logout/', AsyncLogoutView.as_view(), name='async-logout'),
+    path('async/signup/', AsyncSignupView.as_view(), name='async-signup'),
+    path('async/item/', AsyncItemListView.as_view(), name='async-item-list'),
     path('swagger/', schema_view.with_ui('swagger',
          cache_timeout=0), name='schema-swagger-ui')
 ]
@@ -3,15 +3,39 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from django.utils.dateparse import parse_date
+from django.utils.dateparse import parse_date, parse_datetime
 from django.contrib.auth import login, logout, authenticate
+from django.contrib.auth.signals import user_logged_in
 from django.contrib.auth.models import User
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from rest_framework.pagination import PageNumberPagination
-from .models import Item
-from .serializers import ItemSerializer, UserSerializer, LoginSerializer, SignupSerializer
-from datetime import timedelta
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.utils.urls import replace_query_param
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Max, Q, Sum
+from django.http import FileResponse, StreamingHttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.files.storage import default_storage
+from django.utils.cache import parse_etags
+from django.utils.http import urlencode
+from django.utils import timezone
+from .models import InventoryStats, Item, ItemComponent, Job, StockMovement
+from . import bom, jobs, ledger, lockout, routers
+from .authentication import create_token
+from . import cache as item_cache
+from . import stats as inventory_stats
+from .reorder import build_plan
+from .middleware import timed
+from .search import FIELD_WEIGHTS as SEARCH_FIELDS, index_items, search_items
+from .serializers import ItemSerializer, ItemReadSerializer, ItemComponentSerializer, JobSerializer, StockAdjustmentSerializer, StockMovementSerializer, UserSerializer, LoginSerializer, SignupSerializer, ItemImportValidator
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from itertools import islice
+import codecs
+import csv
+import hashlib
+import json
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
@@ -20,12 +44,166 @@ class CustomPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 1000
+    # Columns the paginator reads from each row, beyond the ones shown.
+    position_fields = ()
 
 
-class ItemListApiView(APIView):
-    permission_classes = [IsAuthenticated]
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over (created, id) that never issues an OFFSET.
+
+    Cursors are opaque base64 tokens holding the boundary row's position and
+    the direction to walk from it. The total count is included unless the
+    client passes `skip_count=true`.
+    """
+    page_size = CustomPagination.page_size
+    page_size_query_param = CustomPagination.page_size_query_param
+    max_page_size = CustomPagination.max_page_size
+    cursor_query_param = 'cursor'
+    skip_count_query_param = 'skip_count'
+    position_fields = ('created', 'id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.count = None
+        if request.query_params.get(self.skip_count_query_param, '').lower() != 'true':
+            self.count = queryset.count()
+
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor['r']
+        if cursor is not None:
+            created, pk = cursor['c'], cursor['i']
+            if reverse:
+                queryset = queryset.filter(
+                    Q(created__lt=created) | Q(created=created, id__lt=pk))
+            else:
+                queryset = queryset.filter(
+                    Q(created__gt=created) | Q(created=created, id__gt=pk))
+
+        if reverse:
+            queryset = queryset.order_by('-created', '-id')
+        else:
+            queryset = queryset.order_by('created', 'id')
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+
+        # Walking backwards from a cursor always leaves rows after the page,
+        # and walking forwards from one always leaves rows before it.
+        if reverse:
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        if not self.page:
+            self.has_next = self.has_previous = False
+        else:
+            # Capture boundaries now; serializing the page may rewrite its rows.
+            self.first_position = self.get_position(self.page[0])
+            self.last_position = self.get_position(self.page[-1])
+        return self.page
+
+    def get_paginated_response(self, data):
+        response = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.count is not None:
+            response = {'count': self.count, **response}
+        return Response(response)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.last_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.first_position, reverse=True)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            cursor['c'] = parse_datetime(cursor['c'])
+            cursor['i'] = int(cursor['i'])
+            cursor['r'] = bool(cursor.get('r'))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if cursor['c'] is None:
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def get_position(self, item):
+        if isinstance(item, dict):
+            return item['created'], item['id']
+        return item.created, item.id
 
-    # @method_decorator(cache_page(60 * 15))  # Cache results for 15 minutes
+    def encode_cursor(self, position, reverse):
+        created, pk = position
+        token = {'c': created.isoformat(), 'i': pk}
+        if reverse:
+            token['r'] = 1
+        encoded = urlsafe_b64encode(json.dumps(
+            token, separators=(',', ':')).encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+
+item_fields_parameter = openapi.Parameter(
+    'fields', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+    description='Comma-separated item fields to return, e.g. id,SKU,name,in_stock')
+
+item_filter_parameters = [
+    openapi.Parameter('SKU', openapi.IN_QUERY,
+                      type=openapi.TYPE_STRING),
+    openapi.Parameter('name', openapi.IN_QUERY,
+                      type=openapi.TYPE_STRING),
+    openapi.Parameter('tags', openapi.IN_QUERY,
+                      type=openapi.TYPE_STRING),
+    openapi.Parameter('category', openapi.IN_QUERY,
+                      type=openapi.TYPE_STRING),
+    openapi.Parameter('start_date', openapi.IN_QUERY,
+                      type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+    openapi.Parameter('end_date', openapi.IN_QUERY,
+                      type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
+    openapi.Parameter('min_cost', openapi.IN_QUERY,
+                      type=openapi.TYPE_NUMBER),
+    openapi.Parameter('max_cost', openapi.IN_QUERY,
+                      type=openapi.TYPE_NUMBER),
+    openapi.Parameter('is_assembly', openapi.IN_QUERY,
+                      type=openapi.TYPE_BOOLEAN),
+    openapi.Parameter('is_component', openapi.IN_QUERY,
+                      type=openapi.TYPE_BOOLEAN),
+    openapi.Parameter('is_purchaseable',
+                      openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN),
+    openapi.Parameter('is_sellable', openapi.IN_QUERY,
+                      type=openapi.TYPE_BOOLEAN),
+    openapi.Parameter('is_bundle', openapi.IN_QUERY,
+                      type=openapi.TYPE_BOOLEAN),
+    openapi.Parameter('search', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                      description='Word prefixes to match in name, SKU and category'),
+]
+
+
+class ItemFilterMixin:
     query_params = {
         'SKU': 'SKU',
         'name': 'name__icontains',
@@ -42,59 +220,152 @@ class ItemListApiView(APIView):
         'is_bundle': 'is_bundle',
     }
 
-    @swagger_auto_schema(
-        operation_description="Get a list of items",
-        manual_parameters=[
-            openapi.Parameter('SKU', openapi.IN_QUERY,
-                              type=openapi.TYPE_STRING),
-            openapi.Parameter('name', openapi.IN_QUERY,
-                              type=openapi.TYPE_STRING),
-            openapi.Parameter('tags', openapi.IN_QUERY,
-                              type=openapi.TYPE_STRING),
-            openapi.Parameter('category', openapi.IN_QUERY,
-                              type=openapi.TYPE_STRING),
-            openapi.Parameter('start_date', openapi.IN_QUERY,
-                              type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
-            openapi.Parameter('end_date', openapi.IN_QUERY,
-                              type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
-            openapi.Parameter('min_cost', openapi.IN_QUERY,
-                              type=openapi.TYPE_NUMBER),
-            openapi.Parameter('max_cost', openapi.IN_QUERY,
-                              type=openapi.TYPE_NUMBER),
-            openapi.Parameter('is_assembly', openapi.IN_QUERY,
-                              type=openapi.TYPE_BOOLEAN),
-            openapi.Parameter('is_component', openapi.IN_QUERY,
-                              type=openapi.TYPE_BOOLEAN),
-            openapi.Parameter('is_purchaseable',
-                              openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN),
-            openapi.Parameter('is_sellable', openapi.IN_QUERY,
-                              type=openapi.TYPE_BOOLEAN),
-            openapi.Parameter('is_bundle', openapi.IN_QUERY,
-                              type=openapi.TYPE_BOOLEAN),
-        ],
-        responses={200: ItemSerializer(many=True)}
-    )
-    def get(self, request, *args, **kwargs):
+    boolean_fields = ['is_assembly', 'is_component',
+                      'is_purchaseable', 'is_sellable', 'is_bundle']
 
+    def filter_items(self, request):
+        return self.filter_params(request.user.id, request.GET)
+
+    def filter_params(self, user_id, params):
         items = Item.objects.filter(
-            user_id=request.user.id).order_by('created')
+            user_id=user_id).order_by('created', 'id')
 
         for param, field in self.query_params.items():
-            value = request.GET.get(param)
+            value = params.get(param)
             if value is not None:
                 if 'date' in param:
                     value = parse_date(value)
                 elif 'cost' in param:
                     value = float(value)
-                elif field in ['is_assembly', 'is_component', 'is_purchaseable', 'is_sellable', 'is_bundle']:
+                elif field in self.boolean_fields:
                     value = value.lower() == 'true'
                 items = items.filter(**{field: value})
 
-        paginator = CustomPagination()
-        paginated_items = paginator.paginate_queryset(items, request)
-        serializer = ItemSerializer(paginated_items, many=True)
+        # Best matches first; cursor pagination re-sorts on (created, id).
+        search = params.get('search')
+        if search:
+            items = search_items(items, user_id, search).order_by(
+                '-search_rank', 'created', 'id')
+
+        return items
+
+
+def save_locked(serializer):
+    """
+    Save a validated ItemSerializer onto its item re-read under a row lock.
+    The post_save handlers diff against the loaded values to keep the stock
+    ledger and inventory counters, so those must be the committed ones, not
+    what was read before a concurrent write.
+    """
+    with transaction.atomic():
+        serializer.instance = Item.objects.select_for_update().get(pk=serializer.instance.pk)
+        return serializer.save()
+
+
+def delete_locked(item):
+    """Delete `item` as re-read under a row lock, for the same reason as save_locked()."""
+    with transaction.atomic():
+        return Item.objects.select_for_update().get(pk=item.pk).delete()
+
+
+class ItemListApiView(ItemFilterMixin, APIView):
+    permission_classes = [IsAuthenticated]
+    read_from_replica = True
+
+    pagination_modes = {
+        'page': CustomPagination,
+        'cursor': KeysetPagination,
+    }
+
+    @swagger_auto_schema(
+        operation_description="Get a list of items",
+        manual_parameters=item_filter_parameters + [
+            openapi.Parameter('pagination', openapi.IN_QUERY,
+                              type=openapi.TYPE_STRING, enum=['page', 'cursor']),
+            openapi.Parameter('cursor', openapi.IN_QUERY,
+                              type=openapi.TYPE_STRING),
+            openapi.Parameter('skip_count', openapi.IN_QUERY,
+                              type=openapi.TYPE_BOOLEAN),
+            item_fields_parameter,
+        ],
+        responses={200: ItemSerializer(many=True)}
+    )
+    def get(self, request, *args, **kwargs):
+        # Cached pages are keyed on the user's generation counter, which every
+        # item write bumps, so a hit is never stale or another user's data.
+        cache_key, data, etag = item_cache.get_response_data(request)
+        if data is not None:
+            if self.etag_matches(request, etag):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+            return Response(data, headers={'ETag': etag, 'X-Cache': 'HIT'})
+
+        fields = ItemReadSerializer.fields()
+        if 'fields' in request.GET:
+            try:
+                fields = ItemReadSerializer.parse_fields(request.GET['fields'])
+            except ValidationError as error:
+                return Response(error.detail, status=status.HTTP_400_BAD_REQUEST)
+
+        items = self.filter_items(request)
 
-        return paginator.get_paginated_response(serializer.data)
+        etag = self.get_etag(request, items)
+        if self.etag_matches(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        paginator = self.get_paginator(request)
+        # Only the requested columns are selected, plus what the cursor needs.
+        extra = [name for name in paginator.position_fields if name not in fields]
+        paginated_items = paginator.paginate_queryset(
+            items.values(*fields, *extra), request)
+        for row in paginated_items if extra else ():
+            for name in extra:
+                del row[name]
+        with timed('serialize'):
+            data = ItemReadSerializer(paginated_items, fields).data
+
+        response = paginator.get_paginated_response(data)
+        item_cache.set_response_data(cache_key, response.data, etag)
+        response['ETag'] = etag
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def get_etag(self, request, items):
+        """
+        Strong ETag from one aggregate query: any write to a matching item
+        moves max(updated) and any insert or delete changes the count.
+        """
+        return self.make_etag(request, items.aggregate(**self.etag_aggregates()))
+
+    @staticmethod
+    def etag_aggregates():
+        return {'last_updated': Max('updated'), 'count': Count('id')}
+
+    @staticmethod
+    def make_etag(request, state):
+        last_updated = state['last_updated'].isoformat() if state['last_updated'] else ''
+        params = urlencode(sorted((key, sorted(values)) for key, values in request.GET.lists()), doseq=True)
+        digest = hashlib.md5(
+            f"{request.user.id}:{last_updated}:{state['count']}:{params}".encode()).hexdigest()
+        return f'"{digest}"'
+
+    @staticmethod
+    def etag_matches(request, etag):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if not if_none_match:
+            return False
+        # If-None-Match compares weakly, so the W/ form CompressionMiddleware
+        # sends on compressed responses matches too.
+        etags = [tag.removeprefix('W/') for tag in parse_etags(if_none_match)]
+        return etags == ['*'] or etag in etags
+
+    def get_paginator(self, request):
+        # A cursor token implies cursor mode, so next/previous links keep working
+        # without the client having to repeat `pagination=cursor`.
+        mode = request.GET.get('pagination', 'page')
+        if request.GET.get(KeysetPagination.cursor_query_param):
+            mode = 'cursor'
+        paginator_class = self.pagination_modes.get(mode, CustomPagination)
+        return paginator_class()
 
     # Create
     @swagger_auto_schema(
@@ -122,7 +393,10 @@ class ItemListApiView(APIView):
         }
         serializer = ItemSerializer(data=data)
         if serializer.is_valid():
-            serializer.save()
+            # post_save updates the inventory counters; keep them in this transaction.
+            with transaction.atomic():
+                serializer.save()
+            item_cache.bump_generation(request.user.id)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -138,7 +412,8 @@ class ItemListApiView(APIView):
 
         serializer = ItemSerializer(item, data=request.data, partial=True)
         if serializer.is_valid():
-            serializer.save()
+            save_locked(serializer)
+            item_cache.bump_generation(request.user.id)
             return Response(serializer.data, status=status.HTTP_200_OK)
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -150,29 +425,1005 @@ class ItemListApiView(APIView):
     )
     def delete(self, request, *args, **kwargs):
         item_id = Item.objects.get(id=request.data.get('id'))
-        item_id.delete()
+        delete_locked(item_id)
+        item_cache.bump_generation(request.user.id)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ItemBulkApiView(APIView):
+    """
+    Batch variants of the ItemListApiView writes.
+
+    Every row is validated up front and the batch is written in a single
+    transaction, so a request either applies completely or not at all.
+    Failures are reported per row as `{'index': ..., 'errors': ...}`.
+    """
+    permission_classes = [IsAuthenticated]
+    max_batch_size = 1000
+
+    def get_rows(self, request):
+        rows = request.data
+        if not isinstance(rows, list):
+            return None, Response({'error': 'Expected a list of items'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > self.max_batch_size:
+            return None, Response({
+                'error': f'At most {self.max_batch_size} items can be sent per request'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        return rows, None
+
+    @swagger_auto_schema(
+        operation_description="Create items in bulk",
+        request_body=ItemSerializer(many=True),
+        responses={201: ItemSerializer(many=True)}
+    )
+    def post(self, request, *args, **kwargs):
+        rows, error_response = self.get_rows(request)
+        if error_response:
+            return error_response
+
+        items, errors = [], []
+        for index, row in enumerate(rows):
+            if not isinstance(row, dict):
+                errors.append({'index': index, 'errors': {'non_field_errors': ['Expected an item object.']}})
+                continue
+            serializer = ItemSerializer(data={**row, 'user_id': request.user.id})
+            if serializer.is_valid():
+                items.append(Item(**serializer.validated_data))
+            else:
+                errors.append({'index': index, 'errors': serializer.errors})
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            with transaction.atomic():
+                items = Item.objects.bulk_create(items)
+                # Backends such as MySQL do not return primary keys from bulk
+                # inserts, so look the rows up again by their unique name.
+                if any(item.id is None for item in items):
+                    created = Item.objects.filter(
+                        user_id=request.user.id, name__in=[item.name for item in items]).in_bulk(field_name='name')
+                    items = [created[item.name] for item in items]
+                index_items(items)
+                ledger.record_saves(items, created=True)
+                inventory_stats.apply_changes(
+                    request.user.id, added=[inventory_stats.item_values(item) for item in items])
+        except IntegrityError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        # Bulk writes do not send post_save, so invalidate explicitly.
+        item_cache.bump_generation(request.user.id)
+
+        with timed('serialize'):
+            data = ItemSerializer(items, many=True).data
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    @swagger_auto_schema(
+        operation_description="Update items in bulk",
+        request_body=ItemSerializer(many=True, partial=True),
+        responses={200: ItemSerializer(many=True)}
+    )
+    def put(self, request, *args, **kwargs):
+        rows, error_response = self.get_rows(request)
+        if error_response:
+            return error_response
+
+        ids = [row.get('id') for row in rows if isinstance(row, dict)]
+        existing = Item.objects.filter(user_id=request.user.id).in_bulk(
+            [item_id for item_id in ids if isinstance(item_id, int)])
+
+        changes, fields, errors, seen = [], {'updated', 'version'}, [], set()
+        for index, row in enumerate(rows):
+            item = existing.get(row.get('id')) if isinstance(row, dict) else None
+            if item is None:
+                errors.append({'index': index, 'errors': {'id': ['Item not found.']}})
+                continue
+            if item.id in seen:
+                # Each row is diffed against the stored item for the ledger
+                # and counters, so a second row for it would count twice.
+                errors.append({'index': index, 'errors': {'id': ['Duplicate item in batch.']}})
+                continue
+            seen.add(item.id)
+            data = {key: value for key, value in row.items() if key != 'user_id'}
+            serializer = ItemSerializer(item, data=data, partial=True)
+            if not serializer.is_valid():
+                errors.append({'index': index, 'errors': serializer.errors})
+                continue
+            changes.append((index, item.id, serializer.validated_data))
+            fields.update(serializer.validated_data)
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            with transaction.atomic():
+                # Apply the changes to the rows re-read under lock, so the
+                # ledger and counters diff against current values rather than
+                # the ones read for validation.
+                locked = Item.objects.select_for_update().filter(user_id=request.user.id).in_bulk(
+                    [item_id for _, item_id, _ in changes])
+                gone = [{'index': index, 'errors': {'id': ['Item not found.']}}
+                        for index, item_id, _ in changes if item_id not in locked]
+                if gone:
+                    return Response({'errors': gone}, status=status.HTTP_400_BAD_REQUEST)
+                items = []
+                now = timezone.now()
+                for _, item_id, data in changes:
+                    item = locked[item_id]
+                    for field, value in data.items():
+                        setattr(item, field, value)
+                    # bulk_update() skips auto_now and Item.save(), so stamp the rows ourselves.
+                    item.updated = now
+                    item.version += 1
+                    items.append(item)
+                Item.objects.bulk_update(items, sorted(fields))
+                if fields & set(SEARCH_FIELDS):
+                    index_items(items)
+                ledger.record_saves(items)
+                inventory_stats.apply_changes(
+                    request.user.id,
+                    removed=[inventory_stats.item_values(item, loaded=True) for item in items],
+                    added=[inventory_stats.item_values(item) for item in items])
+        except IntegrityError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        item_cache.bump_generation(request.user.id)
+        if 'available_stock' in fields:
+            bom.invalidate(request.user.id)
+
+        with timed('serialize'):
+            data = ItemSerializer(items, many=True).data
+        return Response(data, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        operation_description="Delete items in bulk",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={'ids': openapi.Schema(
+                type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_INTEGER))}
+        ),
+        responses={200: 'Number of deleted items and ids that were not found'}
+    )
+    def delete(self, request, *args, **kwargs):
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        if not isinstance(ids, list) or not all(isinstance(item_id, int) for item_id in ids):
+            return Response({'error': 'Expected a list of item ids'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > self.max_batch_size:
+            return Response({
+                'error': f'At most {self.max_batch_size} items can be sent per request'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            items = Item.objects.filter(user_id=request.user.id, id__in=ids)
+            # Locked, so the counters are decremented by the values deleted.
+            found = set(items.select_for_update().values_list('id', flat=True))
+            _, deleted_by_model = items.delete()
+            deleted = deleted_by_model.get(Item._meta.label, 0)
+        item_cache.bump_generation(request.user.id)
+
+        return Response({
+            'deleted': deleted,
+            'not_found': [item_id for item_id in ids if item_id not in found]
+        }, status=status.HTTP_200_OK)
+
+
+class ItemSummaryApiView(ItemFilterMixin, APIView):
+    """
+    Inventory totals for the items matching the ItemListApiView filters.
+
+    Everything comes from one query grouped by (category, tags) that is
+    rolled up here. Responses are cached per user like item listings and
+    are invalidated by the same item writes.
+    """
+    permission_classes = [IsAuthenticated]
+    cache_namespace = 'item-summary'
+    read_from_replica = True
+
+    @swagger_auto_schema(
+        operation_description="Summarize inventory value, stock levels and flags",
+        manual_parameters=item_filter_parameters,
+        responses={200: 'Inventory summary'}
+    )
+    def get(self, request, *args, **kwargs):
+        cache_key, data, _ = item_cache.get_response_data(request, self.cache_namespace)
+        if data is None:
+            data = self.summarize(self.get_groups(request))
+            item_cache.set_response_data(cache_key, data)
+        return Response(data, status=status.HTTP_200_OK)
+
+    def get_groups(self, request):
+        items = self.filter_items(request).order_by()
+        if request.GET.get('search'):
+            # Search already groups by item; aggregate over the matching ids.
+            items = Item.objects.filter(id__in=items.values('id'))
+
+        cost_field = Item._meta.get_field('cost')
+        value = ExpressionWrapper(
+            F('cost') * F('in_stock'),
+            output_field=DecimalField(max_digits=cost_field.max_digits + 10,
+                                      decimal_places=cost_field.decimal_places))
+        # Annotation names must not shadow Item fields, hence the prefix.
+        flags = {f'total_{field}': Count('id', filter=Q(**{field: True})) for field in self.boolean_fields}
+        return items.values('category', 'tags').annotate(
+            total_items=Count('id'),
+            total_inventory_value=Sum(value),
+            total_in_stock=Sum('in_stock'),
+            total_below_minimum_stock=Count('id', filter=Q(in_stock__lt=F('minimum_stock'))),
+            total_below_desired_stock=Count('id', filter=Q(in_stock__lt=F('desired_stock'))),
+            **flags,
+        ).order_by('category', 'tags')
+
+    def summarize(self, groups):
+        counters = ['items', 'in_stock', 'below_minimum_stock', 'below_desired_stock']
+        total = {counter: 0 for counter in counters}
+        total['inventory_value'] = Decimal('0')
+        flags = {field: 0 for field in self.boolean_fields}
+        by_category, by_tags = {}, {}
+
+        for group in groups:
+            group_value = group['total_inventory_value'] or Decimal('0')
+            for counter in counters:
+                total[counter] += group[f'total_{counter}'] or 0
+            total['inventory_value'] += group_value
+            for field in self.boolean_fields:
+                flags[field] += group[f'total_{field}']
+            for key, rollup in ((group['category'], by_category), (group['tags'], by_tags)):
+                entry = rollup.setdefault(key, {'items': 0, 'inventory_value': Decimal('0')})
+                entry['items'] += group['total_items']
+                entry['inventory_value'] += group_value
+
+        quantum = Decimal('.1') ** Item._meta.get_field('cost').decimal_places
+
+        def rollup_rows(name, rollup):
+            return [{name: key, 'items': entry['items'],
+                     'inventory_value': str(entry['inventory_value'].quantize(quantum))}
+                    for key, entry in sorted(rollup.items())]
+
+        total['inventory_value'] = str(total['inventory_value'].quantize(quantum))
+        return {
+            'total': total,
+            'by_category': rollup_rows('category', by_category),
+            'by_tags': rollup_rows('tags', by_tags),
+            'flags': flags,
+        }
+
+
+class InventoryStatsApiView(APIView):
+    """
+    Totals read from the incrementally maintained InventoryStats rows, so
+    the cost does not grow with the number of items.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Get materialized inventory counters",
+        responses={200: 'Inventory counters per category and in total'}
+    )
+    def get(self, request, *args, **kwargs):
+        rows = InventoryStats.objects.filter(user_id=request.user.id, item_count__gt=0).order_by(
+            'category').values('category', *inventory_stats.STAT_FIELDS)
+        total = dict.fromkeys(inventory_stats.STAT_FIELDS, 0)
+        by_category = []
+        for row in rows:
+            for field in inventory_stats.STAT_FIELDS:
+                total[field] += row[field]
+            by_category.append({**row, 'total_value': str(row['total_value'])})
+        total['total_value'] = str(Decimal(total['total_value']).quantize(Decimal('.01')))
+        return Response({'total': total, 'by_category': by_category}, status=status.HTTP_200_OK)
+
+
+class ReorderPlanApiView(APIView):
+    """
+    Purchase plan for items whose available stock is below minimum stock.
+    Totals cover every such item; `limit` caps how many lines are returned.
+    """
+    permission_classes = [IsAuthenticated]
+    default_limit = 1000
+    max_limit = 10000
+
+    @swagger_auto_schema(
+        operation_description="Get reorder quantities and purchase cost",
+        manual_parameters=[
+            openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+            openapi.Parameter('include_unpurchaseable', openapi.IN_QUERY,
+                              type=openapi.TYPE_BOOLEAN),
+        ],
+        responses={200: 'Reorder plan'}
+    )
+    def get(self, request, *args, **kwargs):
+        try:
+            limit = min(int(request.GET.get('limit', self.default_limit)), self.max_limit)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        purchaseable_only = request.GET.get('include_unpurchaseable', '').lower() != 'true'
+        plan = build_plan(request.user.id, limit=max(limit, 0), purchaseable_only=purchaseable_only)
+        return Response(plan, status=status.HTTP_200_OK)
+
+
+class StockMovementApiView(APIView):
+    """
+    Append-only stock ledger. Channels post deltas, which are added to the
+    items' stock columns in one UPDATE, so concurrent posts never overwrite
+    each other the way absolute values sent to ItemListApiView.put can.
+    """
+    permission_classes = [IsAuthenticated]
+    max_batch_size = 1000
+
+    @swagger_auto_schema(
+        operation_description="List stock movements, newest first",
+        manual_parameters=[
+            openapi.Parameter('item', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+            openapi.Parameter('page', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+            openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        ],
+        responses={200: StockMovementSerializer(many=True)}
+    )
+    def get(self, request, *args, **kwargs):
+        movements = StockMovement.objects.filter(user_id=request.user.id).order_by('-created', '-id')
+        if 'item' in request.GET:
+            try:
+                movements = movements.filter(item_id=int(request.GET['item']))
+            except ValueError:
+                return Response({'error': 'item must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        paginator = CustomPagination()
+        page = paginator.paginate_queryset(movements, request)
+        return paginator.get_paginated_response(StockMovementSerializer(page, many=True).data)
+
+    @swagger_auto_schema(
+        operation_description="Post stock movements for one or more items",
+        request_body=StockMovementSerializer(many=True),
+        responses={201: 'Created movements and the resulting stock per item'}
+    )
+    def post(self, request, *args, **kwargs):
+        rows = request.data
+        if not isinstance(rows, list):
+            return Response({'error': 'Expected a list of movements'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > self.max_batch_size:
+            return Response({
+                'error': f'At most {self.max_batch_size} movements can be sent per request'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        movements, errors = [], []
+        for index, row in enumerate(rows):
+            serializer = StockMovementSerializer(data=row)
+            if serializer.is_valid():
+                movements.append(StockMovement(**serializer.validated_data))
+            else:
+                errors.append({'index': index, 'errors': serializer.errors})
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            items = ledger.post_movements(request.user.id, movements)
+        except Item.DoesNotExist as error:
+            return Response({'error': str(error)}, status=status.HTTP_404_NOT_FOUND)
+        return Response({
+            'movements': StockMovementSerializer(movements, many=True).data,
+            'items': [{'id': item.id, 'in_stock': item.in_stock, 'available_stock': item.available_stock}
+                      for item in items.values()],
+        }, status=status.HTTP_201_CREATED)
+
+
+class StockAdjustmentApiView(APIView):
+    """
+    Increment or decrement the stock of many items in one request. Each item
+    is changed with `SET in_stock = in_stock + %s` in a single UPDATE, and a
+    row may carry the `version` it was based on (or, for a single item, an
+    If-Match header) to fail with 409 instead of applying to newer stock.
+    The batch is applied completely or not at all.
+    """
+    permission_classes = [IsAuthenticated]
+    max_batch_size = 1000
+
+    @swagger_auto_schema(
+        operation_description="Adjust the stock of one or more items by a delta",
+        request_body=StockAdjustmentSerializer(many=True),
+        manual_parameters=[openapi.Parameter('If-Match', openapi.IN_HEADER, type=openapi.TYPE_STRING)],
+        responses={
+            200: 'Resulting stock and version per adjustment',
+            409: 'Adjustments whose version is stale, with the current version',
+        }
+    )
+    def post(self, request, *args, **kwargs):
+        rows = request.data
+        if not isinstance(rows, list):
+            return Response({'error': 'Expected a list of adjustments'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > self.max_batch_size:
+            return Response({
+                'error': f'At most {self.max_batch_size} adjustments can be sent per request'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        adjustments, errors = [], []
+        for index, row in enumerate(rows):
+            serializer = StockAdjustmentSerializer(data=row)
+            if serializer.is_valid():
+                adjustments.append(serializer.validated_data)
+            else:
+                errors.append({'index': index, 'errors': serializer.errors})
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        if_match = request.headers.get('If-Match')
+        if if_match:
+            if len({adjustment['id'] for adjustment in adjustments}) != 1:
+                return Response({'error': 'If-Match can only be used when adjusting a single item'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            etags = [tag.removeprefix('W/') for tag in parse_etags(if_match)]
+            if len(etags) != 1 or not etags[0].strip('"').isdigit():
+                return Response({'error': 'If-Match must be a single item version'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            for adjustment in adjustments:
+                adjustment.setdefault('version', int(etags[0].strip('"')))
+
+        expected_versions = {}
+        for index, adjustment in enumerate(adjustments):
+            if 'version' not in adjustment:
+                continue
+            if expected_versions.setdefault(adjustment['id'], adjustment['version']) != adjustment['version']:
+                errors.append({'index': index, 'errors': {'version': ['Conflicts with another row for this item.']}})
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        movements = [StockMovement(
+            item_id_id=adjustment['id'], channel=adjustment.get('channel', ''),
+            reference=adjustment.get('reference', ''), in_stock_delta=adjustment['in_stock'],
+            available_stock_delta=adjustment['available_stock']) for adjustment in adjustments]
+        try:
+            items = ledger.post_movements(request.user.id, movements, expected_versions=expected_versions)
+        except ledger.ItemsNotFound as error:
+            return Response({'errors': [
+                {'index': index, 'errors': {'id': ['Item not found.']}}
+                for index, adjustment in enumerate(adjustments) if adjustment['id'] in error.item_ids
+            ]}, status=status.HTTP_404_NOT_FOUND)
+        except ledger.VersionConflict as error:
+            return Response({'errors': [
+                {'index': index, 'id': adjustment['id'], 'version': error.versions[adjustment['id']],
+                 'errors': {'version': ['Item has changed since this version.']}}
+                for index, adjustment in enumerate(adjustments) if adjustment['id'] in error.versions
+            ]}, status=status.HTTP_409_CONFLICT)
+
+        results = [{
+            'id': item.id, 'in_stock': item.in_stock,
+            'available_stock': item.available_stock, 'version': item.version,
+        } for item in items.values()]
+        headers = {'ETag': f'"{results[0]["version"]}"'} if len(results) == 1 else None
+        return Response({'items': results}, status=status.HTTP_200_OK, headers=headers)
+
+
+class StockLevelApiView(APIView):
+    """Stock of an item as of a point in time, from snapshots and the ledger."""
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Get an item's stock as of a date",
+        manual_parameters=[
+            openapi.Parameter('item', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, required=True),
+            openapi.Parameter('as_of', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              format=openapi.FORMAT_DATETIME),
+        ],
+        responses={200: 'Stock levels'}
+    )
+    def get(self, request, *args, **kwargs):
+        try:
+            item_id = int(request.GET.get('item', ''))
+        except ValueError:
+            return Response({'error': 'item must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        as_of = timezone.now()
+        if request.GET.get('as_of'):
+            as_of = self.parse_as_of(request.GET['as_of'])
+            if as_of is None:
+                return Response({'error': 'as_of must be an ISO 8601 date or datetime'},
+                                status=status.HTTP_400_BAD_REQUEST)
+        version = Item.objects.filter(id=item_id, user_id=request.user.id).values_list('version', flat=True).first()
+        if version is None:
+            return Response({'error': 'Item not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        in_stock, available_stock = ledger.stock_as_of(item_id, as_of)
+        # The current version, for conditional adjustments through item/adjust/.
+        return Response({
+            'item_id': item_id,
+            'as_of': as_of,
+            'in_stock': in_stock,
+            'available_stock': available_stock,
+            'version': version,
+        }, status=status.HTTP_200_OK, headers={'ETag': f'"{version}"'})
+
+    @staticmethod
+    def parse_as_of(value):
+        try:
+            date = parse_date(value)
+            # A bare date means the end of that day.
+            as_of = datetime.combine(date, time.max) if date else parse_datetime(value)
+        except ValueError:
+            return None
+        if as_of is not None and timezone.is_naive(as_of):
+            as_of = timezone.make_aware(as_of)
+        return as_of
+
+
+class ItemComponentApiView(APIView):
+    """Bill-of-materials lines linking assemblies to their components."""
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="List bill-of-materials lines",
+        manual_parameters=[openapi.Parameter('assembly', openapi.IN_QUERY, type=openapi.TYPE_INTEGER)],
+        responses={200: ItemComponentSerializer(many=True)}
+    )
+    def get(self, request, *args, **kwargs):
+        lines = ItemComponent.objects.filter(assembly_id__user_id=request.user.id).order_by('id')
+        if 'assembly' in request.GET:
+            try:
+                lines = lines.filter(assembly_id=int(request.GET['assembly']))
+            except ValueError:
+                return Response({'error': 'assembly must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = ItemComponentSerializer(lines, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(
+        operation_description="Add a component to an assembly",
+        request_body=ItemComponentSerializer,
+        responses={201: ItemComponentSerializer}
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = ItemComponentSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        assembly = serializer.validated_data['assembly_id']
+        component = serializer.validated_data['component_id']
+        if assembly.user_id_id != request.user.id or component.user_id_id != request.user.id:
+            return Response({'error': 'Item not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            with transaction.atomic():
+                bom.lock_graph(request.user.id, assembly.id, component.id)
+                if bom.would_create_cycle(bom.get_edges(request.user.id), assembly.id, component.id):
+                    return Response({'error': 'Component already uses this assembly'},
+                                    status=status.HTTP_400_BAD_REQUEST)
+                serializer.save()
+        except IntegrityError:
+            return Response({'error': 'Component is already part of this assembly'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        bom.invalidate(request.user.id)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @swagger_auto_schema(
+        operation_description="Remove a component from an assembly",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={'id': openapi.Schema(type=openapi.TYPE_INTEGER)}
+        ),
+        responses={204: 'No Content'}
+    )
+    def delete(self, request, *args, **kwargs):
+        deleted, _ = ItemComponent.objects.filter(
+            id=request.data.get('id'), assembly_id__user_id=request.user.id).delete()
+        if not deleted:
+            return Response({'error': 'Component not found'}, status=status.HTTP_404_NOT_FOUND)
+        bom.invalidate(request.user.id)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class BuildableApiView(APIView):
+    """
+    How many units of each assembly the current stock can build. The
+    whole BOM is resolved in one pass and memoized until stock changes.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Get buildable quantities of assemblies",
+        responses={200: 'Buildable quantity per assembly', 409: 'Bill of materials contains a cycle'}
+    )
+    def get(self, request, *args, **kwargs):
+        try:
+            buildable = bom.get_buildable(request.user.id)
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_409_CONFLICT)
+        assemblies = Item.objects.filter(id__in=buildable).order_by('id').values('id', 'SKU', 'name')
+        data = [{**assembly, 'buildable': buildable[assembly['id']]} for assembly in assemblies]
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class Echo:
+    """File-like object whose write() hands the value back to csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+class ItemExportApiView(ItemFilterMixin, APIView):
+    """
+    Stream every item matching the ItemListApiView filters as CSV or NDJSON,
+    in (created, id) order.
+
+    Rows are read in keyset pages of `chunk_size` on the (created, id)
+    indexes, so memory use does not grow with the size of the inventory even
+    on MySQL, whose client buffers a whole result set despite `.iterator()`.
+    """
+    permission_classes = [IsAuthenticated]
+    read_from_replica = True
+    chunk_size = 2000
+    export_fields = [field for field in ItemSerializer.Meta.fields
+                     if field != 'user_id']
+    content_types = {
+        'csv': 'text/csv',
+        'ndjson': 'application/x-ndjson',
+    }
+
+    @swagger_auto_schema(
+        operation_description="Export all matching items",
+        manual_parameters=item_filter_parameters + [
+            openapi.Parameter('export_format', openapi.IN_QUERY,
+                              type=openapi.TYPE_STRING, enum=['csv', 'ndjson']),
+            openapi.Parameter('background', openapi.IN_QUERY, type=openapi.TYPE_BOOLEAN),
+        ],
+        responses={200: 'Streamed CSV or NDJSON file', 202: JobSerializer}
+    )
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get('export_format', 'csv')
+        if export_format not in self.content_types:
+            return Response({'error': 'export_format must be csv or ndjson'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if request.GET.get('background', '').lower() == 'true':
+            params = {key: value for key, value in request.GET.items() if key != 'background'}
+            job = jobs.enqueue(request.user, 'export', **params)
+            return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+        # The rows are read while the response streams, after the replica
+        # routing for this request has ended, so pin the database now.
+        items = self.filter_items(request)
+        rows = self.iter_rows(items.using(items.db))
+        if export_format == 'csv':
+            content = self.stream_csv(rows)
+        else:
+            content = self.stream_ndjson(rows)
+
+        response = StreamingHttpResponse(
+            content, content_type=self.content_types[export_format])
+        response['Content-Disposition'] = f'attachment; filename="items.{export_format}"'
+        return response
+
+    def iter_rows(self, items):
+        """`export_fields` tuples of `items`, one keyset page query at a time."""
+        items = items.order_by('created', 'id').values_list(*self.export_fields)
+        created, pk = self.export_fields.index('created'), self.export_fields.index('id')
+        page = items[:self.chunk_size]
+        while True:
+            rows = list(page)
+            yield from rows
+            if len(rows) < self.chunk_size:
+                return
+            last = rows[-1]
+            page = items.filter(
+                Q(created__gt=last[created]) | Q(created=last[created], id__gt=last[pk]))[:self.chunk_size]
+
+    def stream_csv(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.export_fields)
+        for row in rows:
+            yield writer.writerow(row)
+
+    def stream_ndjson(self, rows):
+        encoder = DjangoJSONEncoder()
+        for row in rows:
+            yield encoder.encode(dict(zip(self.export_fields, row))) + '\n'
+
+
+class ItemImportApiView(APIView):
+    """
+    Upsert items from an uploaded CSV or NDJSON file, keyed on (user, SKU).
+
+    The upload is parsed lazily and written in chunks, each in its own
+    transaction. The response is an NDJSON stream with one progress line per
+    chunk, carrying that chunk's row errors, followed by a final summary.
+    The encoding and CSV header are checked before the stream starts; a
+    failure after that ends the stream with an error line instead of the
+    summary, and the chunks written before it stay written.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+    chunk_size = 500
+
+    @swagger_auto_schema(
+        operation_description="Import items from a CSV or NDJSON file",
+        manual_parameters=[
+            openapi.Parameter('file', openapi.IN_FORM,
+                              type=openapi.TYPE_FILE, required=True),
+            openapi.Parameter('import_format', openapi.IN_FORM,
+                              type=openapi.TYPE_STRING, enum=['csv', 'ndjson']),
+            openapi.Parameter('background', openapi.IN_FORM, type=openapi.TYPE_BOOLEAN),
+        ],
+        responses={200: 'Streamed NDJSON progress lines', 202: JobSerializer}
+    )
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'No file uploaded'}, status=status.HTTP_400_BAD_REQUEST)
+
+        import_format = request.data.get('import_format')
+        if import_format is None:
+            import_format = 'ndjson' if upload.name.endswith(('.ndjson', '.jsonl')) else 'csv'
+        if import_format not in ('csv', 'ndjson'):
+            return Response({'error': 'import_format must be csv or ndjson'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        error = self.check_upload(upload, import_format)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+        if str(request.data.get('background', '')).lower() == 'true':
+            # The worker may run on another host, so the upload goes to storage.
+            name = default_storage.save(f'jobs/uploads/{default_storage.get_valid_name(upload.name)}', upload)
+            job = jobs.enqueue(request.user, 'import', file=name, import_format=import_format)
+            return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+        rows = self.read_csv(upload) if import_format == 'csv' else self.read_ndjson(upload)
+        return StreamingHttpResponse(self.run_import(request.user, rows),
+                                     content_type='application/x-ndjson')
+
+    def check_upload(self, upload, import_format):
+        """
+        The reason the upload cannot be imported, or None. Decodes the whole
+        file once, so no UnicodeDecodeError can surface mid-stream.
+        """
+        decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        try:
+            for chunk in upload.chunks():
+                decoder.decode(chunk)
+            decoder.decode(b'', final=True)
+        except UnicodeDecodeError as error:
+            return f'The file is not valid UTF-8: {error}'
+        finally:
+            upload.seek(0)
+
+        if import_format == 'csv':
+            try:
+                header = next(csv.reader(codecs.iterdecode(upload, 'utf-8-sig')), None)
+            except csv.Error as error:
+                return f'The CSV header could not be read: {error}'
+            finally:
+                upload.seek(0)
+            if not header or 'SKU' not in header:
+                return 'The CSV header must include a SKU column'
+        return None
+
+    def read_csv(self, upload):
+        reader = csv.DictReader(codecs.iterdecode(upload, 'utf-8-sig'))
+        for number, row in enumerate(reader, start=1):
+            yield number, row
+
+    def read_ndjson(self, upload):
+        number = 0
+        for line in upload:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield number, row
+
+    def run_import(self, user, rows):
+        validator = ItemImportValidator()
+        totals = {'rows': 0, 'created': 0, 'updated': 0, 'failed': 0}
+        while True:
+            try:
+                # The stream outlives the request's middleware, so pin the
+                # reads to the primary explicitly rather than by context.
+                with routers.use_replica(None):
+                    chunk = list(islice(rows, self.chunk_size))
+                    if not chunk:
+                        break
+                    created, updated, errors = self.upsert_chunk(user, chunk, validator)
+            except (UnicodeDecodeError, csv.Error, DatabaseError) as error:
+                # The 200 status has been sent; report the failure in the stream.
+                yield json.dumps({'event': 'error', **totals, 'error': str(error)}) + '\n'
+                return
+            totals['rows'] += len(chunk)
+            totals['created'] += created
+            totals['updated'] += updated
+            totals['failed'] += len(errors)
+            yield json.dumps({'event': 'progress', **totals, 'errors': errors}) + '\n'
+        yield json.dumps({'event': 'done', **totals}) + '\n'
+
+    def upsert_chunk(self, user, chunk, validator):
+        errors = []
+        skus = {str(row.get('SKU', '')).strip() for _, row in chunk if isinstance(row, dict)}
+        existing = {}
+        for item in Item.objects.filter(user_id=user.id, SKU__in=skus).order_by('id'):
+            existing.setdefault(item.SKU, item)
+
+        # Later rows for the same SKU win, as they would with one-by-one writes.
+        rows_by_sku = {}
+        for number, row in chunk:
+            if not isinstance(row, dict):
+                errors.append({'row': number, 'errors': {'non_field_errors': ['Expected an item object.']}})
+                continue
+            sku = str(row.get('SKU', '')).strip()
+            data, row_errors = validator.validate(row, partial=sku in existing)
+            if row_errors:
+                errors.append({'row': number, 'errors': row_errors})
+                continue
+            rows_by_sku[sku] = (number, data)
+
+        names = {data['name'] for _, data in rows_by_sku.values() if 'name' in data}
+        claimed = {name: (user_id, sku) for name, user_id, sku in
+                   Item.objects.filter(name__in=names).values_list('name', 'user_id', 'SKU')}
+        to_create, changes, fields, written = [], [], {'updated', 'version'}, []
+        for sku, (number, data) in rows_by_sku.items():
+            name = data.get('name')
+            if name is not None and claimed.get(name, (user.id, sku)) != (user.id, sku):
+                errors.append({'row': number, 'errors': {'name': ['item with this name already exists.']}})
+                continue
+            written.append(number)
+            if name is not None:
+                claimed[name] = (user.id, sku)
+
+            if sku not in existing:
+                to_create.append(Item(user_id=user, **data))
+                continue
+            changes.append((number, existing[sku].id, data))
+            fields.update(data)
+
+        try:
+            with transaction.atomic():
+                # Updates go to the rows re-read under lock, so the ledger and
+                # counters diff against current values; see ItemBulkApiView.put.
+                locked = Item.objects.select_for_update().filter(user_id=user.id).in_bulk(
+                    [item_id for _, item_id, _ in changes])
+                to_update = []
+                now = timezone.now()
+                for number, item_id, data in changes:
+                    item = locked.get(item_id)
+                    if item is None:
+                        errors.append({'row': number, 'errors': {'SKU': ['Item was deleted during the import.']}})
+                        written.remove(number)
+                        continue
+                    for field, value in data.items():
+                        setattr(item, field, value)
+                    item.updated = now
+                    item.version += 1
+                    to_update.append(item)
+                Item.objects.bulk_create(to_create)
+                Item.objects.bulk_update(to_update, sorted(fields))
+                if any(item.id is None for item in to_create):
+                    # Re-read so rows inserted without returned ids get them.
+                    to_create = list(Item.objects.filter(
+                        user_id=user.id, SKU__in=[item.SKU for item in to_create]))
+                reindex = list(to_create)
+                if fields & set(SEARCH_FIELDS):
+                    reindex.extend(to_update)
+                if reindex:
+                    index_items(reindex)
+                ledger.record_saves(to_create, created=True)
+                ledger.record_saves(to_update)
+                inventory_stats.apply_changes(
+                    user.id,
+                    removed=[inventory_stats.item_values(item, loaded=True) for item in to_update],
+                    added=[inventory_stats.item_values(item) for item in to_create + to_update])
+        except IntegrityError as error:
+            errors.extend({'row': number, 'errors': {'non_field_errors': [str(error)]}}
+                          for number in written)
+            return 0, 0, errors
+
+        if to_create or to_update:
+            item_cache.bump_generation(user.id)
+        if to_update and 'available_stock' in fields:
+            bom.invalidate(user.id)
+        return len(to_create), len(to_update), errors
+
+
+class JobApiView(APIView):
+    """
+    Queue long-running work for `manage.py run_jobs` and follow its status
+    and progress.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Get one job by id, or list jobs newest first",
+        manual_parameters=[
+            openapi.Parameter('id', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+            openapi.Parameter('status', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              enum=[choice for choice, _ in Job.STATUS_CHOICES]),
+            openapi.Parameter('page', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+            openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        ],
+        responses={200: JobSerializer(many=True)}
+    )
+    def get(self, request, *args, **kwargs):
+        user_jobs = Job.objects.filter(user_id=request.user.id)
+        if 'id' in request.GET:
+            try:
+                job = user_jobs.get(id=int(request.GET['id']))
+            except (Job.DoesNotExist, ValueError):
+                return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+            return Response(JobSerializer(job).data, status=status.HTTP_200_OK)
+
+        if 'status' in request.GET:
+            user_jobs = user_jobs.filter(status=request.GET['status'])
+        paginator = CustomPagination()
+        page = paginator.paginate_queryset(user_jobs.order_by('-created', '-id'), request)
+        return paginator.get_paginated_response(JobSerializer(page, many=True).data)
+
+    @swagger_auto_schema(
+        operation_description="Queue a job",
+        request_body=JobSerializer,
+        responses={202: JobSerializer}
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = JobSerializer(data=request.data)
+        if serializer.is_valid():
+            serializer.save(user_id=request.user)
+            return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class JobResultApiView(APIView):
+    """Download the file written by a finished export job."""
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Download the file produced by a job",
+        manual_parameters=[openapi.Parameter('id', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, required=True)],
+        responses={200: 'The exported file'}
+    )
+    def get(self, request, *args, **kwargs):
+        try:
+            job = Job.objects.get(id=int(request.GET.get('id', '')), user_id=request.user.id)
+        except (Job.DoesNotExist, ValueError):
+            return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+        if job.status != Job.SUCCEEDED or not (job.result or {}).get('file'):
+            return Response({'error': 'Job has no file to download'}, status=status.HTTP_404_NOT_FOUND)
+        return FileResponse(default_storage.open(job.result['file'], 'rb'), as_attachment=True,
+                            filename=job.result['file'].rsplit('/', 1)[-1],
+                            content_type=job.result.get('content_type'))
+
+
 class LoginApiView(APIView):
     authentication_classes = []  # disable authentication
     permission_classes = []  # disable permission
     csrf_exempt = True  # disable CSRF
 
     @swagger_auto_schema(
-        operation_description="Login to the app",
-        request_body=LoginSerializer,
+        operation_description="Login to the app. With token=true, returns a signed API token "
+                              "for `Authorization: Token <token>` instead of starting a session",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=['username', 'password'],
+            properties={
+                'username': openapi.Schema(type=openapi.TYPE_STRING),
+                'password': openapi.Schema(type=openapi.TYPE_STRING),
+                'token': openapi.Schema(type=openapi.TYPE_BOOLEAN),
+            }
+        ),
         responses={200: UserSerializer}
     )
     def post(self, request):
         serializer = LoginSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
+        username = serializer.validated_data['username']
+        ip = lockout.client_ip(request)
+        if not lockout.reserve_attempt(username, ip):
+            return Response({
+                'error': 'Too many failed login attempts, try again later'
+            }, status=status.HTTP_429_TOO_MANY_REQUESTS,
+                headers={'Retry-After': str(lockout.get_timeout())})
+
         user = authenticate(
-            username=serializer.validated_data['username'],
+            username=username,
             password=serializer.validated_data['password']
         )
         if user:
+            lockout.release_attempt(username, ip)
+            if str(request.data.get('token', '')).lower() in ('true', '1'):
+                # Stateless token instead of a session; see authentication.py.
+                user_logged_in.send(sender=user.__class__, request=request, user=user)
+                return Response({
+                    'user': UserSerializer(user).data,
+                    'token': create_token(user),
+                    'message': 'Login successful'
+                }, status=status.HTTP_200_OK)
+
             login(request, user)
 
             request.session.set_expiry(timedelta(days=1))
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kaizntree_project.settings')
+# Disables persistent database connections; see kaizntree_project.database.
+os.environ['DJANGO_ASGI'] = '1'
 
 application = get_asgi_application()
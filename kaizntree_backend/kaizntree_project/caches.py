@@ -0,0 +1,39 @@
+"""
+Cache settings read from the environment.
+
+`CACHE_URL` picks the backend every process shares: `redis://host:6379/0`
+(`rediss://` for TLS), `memcached://host:11211`, or `locmem://` for a
+per-process cache. Several servers are separated by commas. The item list
+cache generation, BOM memo, login failure counters, token user cache and
+cached_db sessions all live here, so a deployment with more than one worker
+process must point every process at the same Redis or memcached server.
+`CACHE_KEY_PREFIX` keeps apps that share a server apart.
+"""
+import os
+
+BACKENDS = {
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'rediss': 'django.core.cache.backends.redis.RedisCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+}
+
+
+def cache_config(default, environ=os.environ):
+    """Build the `CACHES['default']` entry from `CACHE_URL`, falling back to `default`."""
+    url = environ.get('CACHE_URL') or default
+    scheme, separator, location = url.partition('://')
+    if not separator or scheme not in BACKENDS:
+        raise ValueError(f'CACHE_URL must start with one of {", ".join(f"{name}://" for name in BACKENDS)}')
+    config = {'BACKEND': BACKENDS[scheme]}
+    servers = [server.strip() for server in location.split(',') if server.strip()]
+    if scheme.startswith('redis'):
+        # The Redis backend takes full URLs; the scheme only repeats on the first.
+        config['LOCATION'] = [server if '://' in server else f'{scheme}://{server}' for server in servers]
+    elif scheme == 'memcached':
+        config['LOCATION'] = servers
+    if scheme != 'locmem' and not servers:
+        raise ValueError(f'CACHE_URL needs a server address for {scheme}')
+    if environ.get('CACHE_KEY_PREFIX'):
+        config['KEY_PREFIX'] = environ['CACHE_KEY_PREFIX']
+    return config
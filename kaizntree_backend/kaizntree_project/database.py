@@ -0,0 +1,89 @@
+"""
+Database settings read from the environment.
+
+Every key has a `DB_` variable (`DB_ENGINE`, `DB_NAME`, `DB_USER`,
+`DB_PASSWORD`, `DB_HOST`, `DB_PORT`) falling back to the defaults passed in.
+Connections are persistent by default under WSGI:
+
+- `DB_CONN_MAX_AGE`: seconds a connection is reused across requests
+  (default 60, `0` closes it after every request, `none` keeps it forever).
+  Under ASGI it is always 0: each request's sync_to_async thread opens its
+  own connection and nothing closes it once the thread goes idle, so
+  persistent connections pile up. asgi.py sets `DJANGO_ASGI` to select this.
+- `DB_CONN_HEALTH_CHECKS`: ping a reused connection before the first query
+  of a request so one dropped by the server is replaced (default true).
+- `DB_POOL`: serve connections from a SQLAlchemy pool through
+  django-db-connection-pool, which must then be installed. Sized by
+  `DB_POOL_SIZE` (default 10), `DB_POOL_MAX_OVERFLOW` (default 10) and
+  `DB_POOL_RECYCLE` (seconds, default 300).
+
+`DB_REPLICAS` names read-replica aliases, configured the same way with
+`DB_<ALIAS>_` variables (`DB_REPLICA1_HOST`, ...).
+"""
+import os
+
+POOL_ENGINES = {
+    'django.db.backends.mysql': 'dj_db_conn_pool.backends.mysql',
+    'django.db.backends.postgresql': 'dj_db_conn_pool.backends.postgresql',
+    'django.db.backends.oracle': 'dj_db_conn_pool.backends.oracle',
+}
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+# Set by asgi.py before the settings are loaded.
+ASGI_ENV = 'DJANGO_ASGI'
+
+
+def env_bool(environ, name, default):
+    value = environ.get(name)
+    return default if value is None else value.strip().lower() in TRUE_VALUES
+
+
+def env_int(environ, name, default):
+    value = environ.get(name)
+    return default if value in (None, '') else int(value)
+
+
+def database_config(defaults, environ=os.environ, prefix='DB_'):
+    """Build one `DATABASES` entry from `{prefix}*` variables over `defaults`."""
+    config = {
+        key: environ.get(f'{prefix}{key}', defaults.get(key, ''))
+        for key in ('ENGINE', 'NAME', 'USER', 'PASSWORD', 'HOST', 'PORT')
+    }
+
+    conn_max_age = environ.get(f'{prefix}CONN_MAX_AGE', '60')
+    config['CONN_MAX_AGE'] = None if conn_max_age.lower() == 'none' else int(conn_max_age)
+    config['CONN_HEALTH_CHECKS'] = env_bool(environ, f'{prefix}CONN_HEALTH_CHECKS', True)
+    if env_bool(environ, ASGI_ENV, False):
+        config['CONN_MAX_AGE'] = 0
+
+    if env_bool(environ, f'{prefix}POOL', False):
+        if config['ENGINE'] not in POOL_ENGINES:
+            raise ValueError(f"{prefix}POOL is not supported for {config['ENGINE']}")
+        config['ENGINE'] = POOL_ENGINES[config['ENGINE']]
+        config['POOL_OPTIONS'] = {
+            'POOL_SIZE': env_int(environ, f'{prefix}POOL_SIZE', 10),
+            'MAX_OVERFLOW': env_int(environ, f'{prefix}POOL_MAX_OVERFLOW', 10),
+            'RECYCLE': env_int(environ, f'{prefix}POOL_RECYCLE', 300),
+            'PRE_PING': config['CONN_HEALTH_CHECKS'],
+        }
+        # The pool owns connection lifetime; Django hands each one back at
+        # the end of the request.
+        config['CONN_MAX_AGE'] = 0
+        config['CONN_HEALTH_CHECKS'] = False
+    return config
+
+
+def replica_configs(defaults, environ=os.environ):
+    """
+    `DATABASES` entries for the aliases listed in `DB_REPLICAS`. Each one is
+    read from `DB_<ALIAS>_*` variables over the same defaults as the primary.
+    """
+    aliases = [alias.strip() for alias in environ.get('DB_REPLICAS', '').split(',') if alias.strip()]
+    configs = {}
+    for alias in aliases:
+        config = database_config(defaults, environ, prefix=f'DB_{alias.upper()}_')
+        # Tests run against the primary; a replica is just another view of it.
+        config['TEST'] = {'MIRROR': 'default'}
+        configs[alias] = config
+    return configs
@@ -10,8 +10,13 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
+from .caches import cache_config
+from .database import database_config, replica_configs
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -48,11 +53,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'kaizntree_app.middleware.InstrumentationMiddleware',
+    'kaizntree_app.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'kaizntree_app.middleware.ReadReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -81,17 +89,28 @@ WSGI_APPLICATION = 'kaizntree_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# Overridable with DB_* environment variables, see kaizntree_project/database.py.
+DATABASE_DEFAULTS = {
+    'ENGINE': 'django.db.backends.mysql',
+    'NAME': 'kaizndb',
+    'USER': 'admin',
+    'PASSWORD': 'admin1234',
+    'HOST': 'database-1.cjygqaksmzot.us-east-2.rds.amazonaws.com',
+    'PORT': '3306',
+}
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME': 'kaizndb',
-        'USER': 'admin',
-        'PASSWORD': 'admin1234',
-        'HOST': 'database-1.cjygqaksmzot.us-east-2.rds.amazonaws.com',
-        'PORT': '3306',
-    }
+    'default': database_config(DATABASE_DEFAULTS),
+    **replica_configs(DATABASE_DEFAULTS),
 }
 
+# Item listing, export and summary reads go to one of these aliases, except
+# for a session that wrote within the last READ_REPLICA_LAG_SECONDS.
+READ_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+READ_REPLICA_LAG_SECONDS = 5
+
+DATABASE_ROUTERS = ['kaizntree_app.routers.ReadReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -112,6 +131,35 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# PASSWORD_HASHER picks the hasher for new and rehashed passwords; the others
+# stay listed so existing hashes still verify and are upgraded on login.
+# argon2 and bcrypt need argon2-cffi and bcrypt installed.
+PASSWORD_HASHER_CHOICES = {
+    'pbkdf2': 'kaizntree_app.hashers.PBKDF2PasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'bcrypt': 'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+}
+PASSWORD_HASHERS = [PASSWORD_HASHER_CHOICES[os.environ.get('PASSWORD_HASHER', 'pbkdf2')]]
+PASSWORD_HASHERS += [hasher for hasher in PASSWORD_HASHER_CHOICES.values() if hasher not in PASSWORD_HASHERS]
+PASSWORD_HASHERS += ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+
+# Iterations of the pbkdf2 hasher; Django's default when unset.
+if os.environ.get('PASSWORD_PBKDF2_ITERATIONS'):
+    PASSWORD_PBKDF2_ITERATIONS = int(os.environ['PASSWORD_PBKDF2_ITERATIONS'])
+
+# Failed logins allowed per username and per client address before further
+# attempts are rejected without checking the password, for LOGIN_LOCKOUT_SECONDS.
+LOGIN_FAILURE_LIMIT = 5
+LOGIN_IP_FAILURE_LIMIT = 50
+LOGIN_LOCKOUT_SECONDS = 15 * 60
+
+# Load balancers (addresses or networks) whose X-Forwarded-For header names
+# the client, from the comma-separated TRUSTED_PROXIES environment variable.
+# Without them every client behind a proxy shares the proxy's address.
+TRUSTED_PROXIES = [proxy.strip() for proxy in os.environ.get('TRUSTED_PROXIES', '').split(',') if proxy.strip()]
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
 
@@ -129,13 +177,68 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Job uploads and export files; point at shared storage when workers run on
+# other hosts.
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', BASE_DIR / 'media')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-# CACHES = {
-#     'default': {
-#         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-#     }
-# }
+# Test runs keep to a per-process cache; everything else shares one.
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+
+# Overridable with CACHE_URL, see kaizntree_project/caches.py. Every worker
+# process must share this cache: it holds the item list cache generation,
+# login failure counters and sessions.
+CACHES = {
+    'default': cache_config('locmem://' if TESTING else 'redis://127.0.0.1:6379/0'),
+}
+
+# Sessions are read from the cache and written through to the database.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# The JSON renderer, chosen with the API_JSON_RENDERER environment variable.
+# Both produce the same bytes; orjson is several times faster on large pages.
+JSON_RENDERER_CHOICES = {
+    'orjson': 'kaizntree_app.renderers.ORJSONRenderer',
+    'stdlib': 'rest_framework.renderers.JSONRenderer',
+}
+
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+        'kaizntree_app.authentication.SignedTokenAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        JSON_RENDERER_CHOICES[os.environ.get('API_JSON_RENDERER', 'orjson')],
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+# Responses at least this many bytes long are compressed for clients that
+# accept it: brotli when the `brotli` package is installed, gzip otherwise.
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_BROTLI_QUALITY = 4
+
+# Lifetime in seconds of the signed tokens returned by login with "token": true.
+API_TOKEN_MAX_AGE = 60 * 60 * 24
+
+# Seconds a cached GET /item/ response is kept. Writes invalidate earlier.
+ITEM_LIST_CACHE_TIMEOUT = 60 * 15
+
+# Seconds memoized buildable quantities are kept. Writes invalidate earlier.
+BOM_CACHE_TIMEOUT = 60 * 15
+
+# Per-request query counts and timings as Server-Timing headers and log lines
+# on the 'kaizntree_app.instrumentation' logger.
+API_INSTRUMENTATION = False
+
+# A running job's worker sends a heartbeat every JOB_HEARTBEAT_SECONDS. Jobs
+# without one for JOB_STALE_SECONDS are requeued by `manage.py run_jobs`, and
+# failed after JOB_MAX_ATTEMPTS tries.
+JOB_STALE_SECONDS = 10 * 60
+JOB_HEARTBEAT_SECONDS = 30
+JOB_MAX_ATTEMPTS = 3